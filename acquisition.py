@@ -0,0 +1,239 @@
+import time
+import random
+import threading
+from array import array
+
+# ------------------ Ring Buffer ------------------
+
+class SampleRing:
+    """
+    Preallocated single-producer / single-consumer ring buffer for pushed values.
+
+    The producer (DLL callback thread) only ever advances `_head`, the consumer
+    only ever advances `_tail`, so no lock is needed: each index has exactly one
+    writer and the slot is filled before `_head` is published.
+    When the ring is full new values are dropped and counted in `dropped`.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        if capacity < 2:
+            raise ValueError("Ring capacity must be at least 2.")
+        # Round up to a power of two so the slot index is a cheap mask
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self._mask = size - 1
+
+        self.t_ns = array("q", bytes(8 * size))
+        self.devicenr = array("h", bytes(2 * size))
+        self.address = array("h", bytes(2 * size))
+        self.kind = array("h", bytes(2 * size))
+        self.intval = array("L", bytes(array("L").itemsize * size))
+        self.value = array("d", bytes(8 * size))
+
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def push(self, t_ns: int, devicenr: int, address: int, kind: int, intval: int, value: float) -> bool:
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return False
+        i = head & self._mask
+        self.t_ns[i] = t_ns
+        self.devicenr[i] = devicenr
+        self.address[i] = address
+        self.kind[i] = kind
+        self.intval[i] = intval
+        self.value[i] = value
+        self._head = head + 1  # publish after the slot is complete
+        return True
+
+    def drain(self, max_items: int | None = None) -> list[tuple[int, int, int, int, int, float]]:
+        """
+        Remove and return up to `max_items` pending samples (all if None) as
+        (t_ns, devicenr, address, kind, intval, value) tuples, oldest first.
+        """
+        tail = self._tail
+        n = self._head - tail
+        if max_items is not None:
+            n = min(n, max_items)
+        mask = self._mask
+        out = []
+        for k in range(tail, tail + n):
+            i = k & mask
+            out.append((self.t_ns[i], self.devicenr[i], self.address[i],
+                        self.kind[i], self.intval[i], self.value[i]))
+        self._tail = tail + n
+        return out
+
+# ------------------ Push-mode Acquisition ------------------
+
+class CallbackAcquisition:
+    """
+    Push-mode acquisition: registers a DDK_FctPtr callback with the device and
+    stores each pushed value with a perf_counter_ns timestamp in a SampleRing.
+
+    `source` is anything with `register_callback(fn)` (IbrDll or
+    SimulatedCallbackSource); passing None to it unregisters.
+    """
+
+    def __init__(self, source, capacity: int = 65536):
+        self.source = source
+        self.ring = SampleRing(capacity)
+        self.running = False
+
+    def _on_value(self, devicenr, address, kind, intval, floatval):
+        # Runs on the DLL's thread: keep it to a timestamp and a ring write
+        self.ring.push(time.perf_counter_ns(), devicenr, address, kind, intval, floatval)
+
+    def start(self):
+        if self.running:
+            return
+        self.source.register_callback(self._on_value)
+        self.running = True
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.source.register_callback(None)
+
+    def drain(self, max_items: int | None = None):
+        return self.ring.drain(max_items)
+
+    @property
+    def dropped(self) -> int:
+        return self.ring.dropped
+
+# ------------------ Simulated Sources ------------------
+
+class SimulatedCallbackSource:
+    """
+    Stand-in for the DLL's push interface so CallbackAcquisition can run on Linux.
+
+    Once a callback is registered, a background thread calls it round-robin for
+    each address at `rate_hz` values per second per address with a random-walk
+    value. `out_of_range_rate` is the chance a value is pushed with intval=136.
+    """
+
+    def __init__(self, addresses, devicenr: int = 1, rate_hz: float = 100.0,
+                 noise: float = 1e-5, out_of_range_rate: float = 0.0, seed=None):
+        self.addresses = list(addresses)
+        self.devicenr = devicenr
+        self.rate_hz = rate_hz
+        self.noise = noise
+        self.out_of_range_rate = out_of_range_rate
+        self._rng = random.Random(seed)
+        self._values = {addr: 0.0 for addr in self.addresses}
+        self._callback = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register_callback(self, fn):
+        if fn is None:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+            self._callback = None
+            return
+        self._callback = fn
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = 1.0 / (self.rate_hz * max(len(self.addresses), 1))
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            for addr in self.addresses:
+                self._values[addr] += self._rng.gauss(0.0, self.noise)
+                intval = 136 if self._rng.random() < self.out_of_range_rate else 0
+                self._callback(self.devicenr, addr, 0, intval, self._values[addr])
+                next_t += period
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+class SimulatedIbr:
+    """
+    Stand-in for IbrDll (init_device, get_value, get_values, deinit_device,
+    get_version, register_callback) that needs no DLL or hardware.
+
+    Each address reads `address + random walk`; `read_latency` seconds are spent
+    per Device_Value and `out_of_range_rate` of reads return status 136.
+    `hang_rate` of reads stall for `hang_time` seconds, like a wedged bus.
+    """
+
+    def __init__(self, read_latency: float = 0.0, noise: float = 1e-5,
+                 out_of_range_rate: float = 0.0, init_time: float = 0.0, seed=None,
+                 hang_rate: float = 0.0, hang_time: float = 5.0):
+        self.initialized = False
+        self.read_latency = read_latency
+        self.noise = noise
+        self.out_of_range_rate = out_of_range_rate
+        self.init_time = init_time
+        self.hang_rate = hang_rate
+        self.hang_time = hang_time
+        self._rng = random.Random(seed)
+        self._offsets = {}
+        self._push = None
+        self.tracer = None
+
+    def init_device(self, setup_filename=None, *, timeout_s: float = 30.0, imb_control: int = 1) -> int:
+        time.sleep(self.init_time)
+        self.initialized = True
+        return 0
+
+    def get_version(self) -> tuple[int, int]:
+        return 0, 0
+
+    def get_value(self, devicenr: int, address: int) -> tuple[int, float]:
+        if self.read_latency:
+            time.sleep(self.read_latency)
+        if self.hang_rate and self._rng.random() < self.hang_rate:
+            time.sleep(self.hang_time)
+        if self._rng.random() < self.out_of_range_rate:
+            return 136, 0.0
+        offset = self._offsets.get(address, 0.0) + self._rng.gauss(0.0, self.noise)
+        self._offsets[address] = offset
+        return 0, address + offset
+
+    def get_values(self, devicenr: int, addresses, out=None, cancel=None):
+        n = len(addresses)
+        if out is None:
+            out = (array("d", bytes(8 * n)), array("h", bytes(2 * n)))
+        values, statuses = out[0], out[1]
+        times = out[2] if len(out) > 2 else None
+        tracer = self.tracer
+        for i, addr in enumerate(addresses):
+            if cancel is not None and cancel.is_set():
+                break
+            t0 = time.perf_counter_ns()
+            statuses[i], values[i] = self.get_value(devicenr, addr)
+            if times is not None or tracer is not None:
+                t1 = time.perf_counter_ns()
+                if times is not None:
+                    times[i] = (t0 + t1) >> 1
+                if tracer is not None:
+                    tracer.add(tracer.name_id("Device_Value"), t0, t1)
+        return out
+
+    def register_callback(self, fn):
+        if self._push is None:
+            self._push = SimulatedCallbackSource(range(1, 7), noise=self.noise,
+                                                 out_of_range_rate=self.out_of_range_rate)
+        self._push.register_callback(fn)
+
+    def deinit_device(self) -> int:
+        if not self.initialized:
+            return -1
+        self.initialized = False
+        return 0
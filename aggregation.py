@@ -0,0 +1,137 @@
+import math
+from array import array
+
+REDUCERS = ("mean", "median", "trimmed")
+
+# Adaptive output precision: (max spread, format), first match wins
+PRECISION_STEPS = (
+    (1e-6, "{:.8f}"),
+    (1e-5, "{:.7f}"),
+    (1e-4, "{:.6f}"),
+    (1e-3, "{:.5f}"),
+    (1e-2, "{:.4f}"),
+)
+DEFAULT_FORMAT = "{:.3f}"
+
+
+def precision_format(spread: float) -> str:
+    """Format string for a value whose oversamples span `spread`."""
+    for limit, fmt in PRECISION_STEPS:
+        if spread < limit:
+            return fmt
+    return DEFAULT_FORMAT
+
+# ------------------ Streaming Accumulator ------------------
+
+class GaugeAccumulator:
+    """
+    Running statistics for one gauge within one tick (Welford mean/variance, min, max)
+    plus the mean read timestamp, when samples are added with one.
+
+    Built once per session and reset() every tick. Raw samples are only kept
+    (in a preallocated array of `capacity`) when an order-statistic reducer
+    such as median or trimmed mean needs them.
+    """
+
+    __slots__ = ("count", "mean", "_m2", "min", "max", "_t_sum", "_samples", "_capacity")
+
+    def __init__(self, capacity: int = 0, keep_samples: bool = False):
+        self._capacity = capacity
+        self._samples = array("d", bytes(8 * capacity)) if keep_samples else None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._t_sum = 0
+
+    def add(self, x: float, t_ns: int = 0):
+        n = self.count + 1
+        self._t_sum += t_ns
+        self.count = n
+        d = x - self.mean
+        self.mean += d / n
+        self._m2 += d * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if self._samples is not None and n <= self._capacity:
+            self._samples[n - 1] = x
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def t_center(self) -> float:
+        """Mean timestamp (ns) of the valid samples: the effective time of the reduced value."""
+        return self._t_sum / self.count if self.count else 0.0
+
+    @property
+    def spread(self) -> float:
+        return self.max - self.min if self.count else 0.0
+
+    def _sorted(self):
+        return sorted(self._samples[:min(self.count, self._capacity)])
+
+    def median(self) -> float:
+        if self._samples is None:
+            raise RuntimeError("Median needs an accumulator built with keep_samples=True.")
+        s = self._sorted()
+        mid = len(s) // 2
+        return s[mid] if len(s) % 2 else 0.5 * (s[mid - 1] + s[mid])
+
+    def trimmed_mean(self, proportion: float = 0.1) -> float:
+        """Mean after cutting `proportion` of the samples from each end."""
+        if self._samples is None:
+            raise RuntimeError("Trimmed mean needs an accumulator built with keep_samples=True.")
+        s = self._sorted()
+        k = int(len(s) * proportion)
+        if k and len(s) - 2 * k > 0:
+            s = s[k:len(s) - k]
+        return math.fsum(s) / len(s)
+
+# ------------------ Per-tick Aggregator ------------------
+
+class TickAggregator:
+    """
+    One GaugeAccumulator per address, reused for every tick.
+
+    reducer picks the reported value: "mean" (streaming, no samples kept),
+    "median" or "trimmed" (trimmed mean cutting `trim` from each end).
+    """
+
+    def __init__(self, gauge_addresses, capacity: int, reducer: str = "mean", trim: float = 0.1):
+        if reducer not in REDUCERS:
+            raise ValueError(f"Unknown reducer '{reducer}'. Valid: {REDUCERS}")
+        self.reducer = reducer
+        self.trim = trim
+        keep = reducer != "mean"
+        self.accumulators = {addr: GaugeAccumulator(capacity, keep_samples=keep) for addr in gauge_addresses}
+        self.gauge_addresses = list(gauge_addresses)
+
+    def reset(self):
+        for acc in self.accumulators.values():
+            acc.reset()
+
+    def add(self, addr: int, value: float, t_ns: int = 0):
+        self.accumulators[addr].add(value, t_ns)
+
+    def value(self, addr: int):
+        """Reduced value for `addr`, or None if the gauge had no valid sample this tick."""
+        acc = self.accumulators[addr]
+        if not acc.count:
+            return None
+        if self.reducer == "mean":
+            return acc.mean
+        if self.reducer == "median":
+            return acc.median()
+        return acc.trimmed_mean(self.trim)
@@ -0,0 +1,103 @@
+from timeindex import parse_time, read_range, gauge_columns
+
+# ------------------ Time Alignment ------------------
+#
+# Every CSV row carries one timestamp taken before the read burst, but the gauges
+# are read one after another, so gauge i's value really belongs to row time plus
+# its "<name> t" column (mean read time, ms after the row timestamp). The helpers
+# below turn those skews into per-gauge sample times and interpolate all gauges
+# onto one common grid, so differences such as Z1 - Z2 compare simultaneous values.
+# NumPy is only needed here, not for recording.
+
+
+def sample_times(header, rows):
+    """
+    Per-gauge sample times from rows as returned by timeindex.read_range().
+
+    Returns (names, times, values): gauge names, and (rows, gauges) float arrays of
+    epoch seconds and values. NaN marks a missing value or time; a failed read has
+    no sample time either. Gauges without a "<name> t" column fall back to the row
+    timestamp.
+    """
+    import numpy as np
+
+    columns = {name: i for i, name in enumerate(header)}
+    names = gauge_columns(header)
+    n = len(rows)
+    row_t = np.array([parse_time(row[0]) for row in rows], dtype=float).reshape(n, 1)
+
+    values = np.full((n, len(names)), np.nan)
+    skew = np.zeros((n, len(names)))
+    for j, name in enumerate(names):
+        c = columns[name]
+        values[:, j] = [np.nan if row[c] is None else row[c] for row in rows]
+        t = columns.get(f"{name} t")
+        if t is not None:
+            skew[:, j] = [np.nan if row[t] is None else row[t] for row in rows]
+    times = row_t + skew / 1e3
+    times[np.isnan(values)] = np.nan
+    return names, times, values
+
+
+def common_grid(times, step=None):
+    """
+    Regular grid over the span where every gauge has samples: from the latest
+    first valid time to the earliest last valid time. Gauges without any valid
+    sample are ignored. step defaults to the median row spacing.
+    """
+    import numpy as np
+
+    valid = ~np.isnan(times)
+    columns = valid.any(axis=0)
+    if not len(times) or not columns.any():
+        return np.array([0.0])
+    t = times[:, columns]
+    start = float(np.max(np.nanmin(t, axis=0)))  # first instant where every gauge has a sample
+    end = float(np.min(np.nanmax(t, axis=0)))
+    if step is None:
+        rows = valid.any(axis=1)
+        spacing = np.diff(np.nanmean(times[rows], axis=1))
+        step = float(np.median(spacing)) if len(spacing) else 1.0
+    if not end > start:
+        return np.array([start])
+    return np.arange(start, end + step * 1e-6, step)  # last point not past `end`
+
+
+def resample(times, values, grid, max_gap=None):
+    """
+    Linearly interpolate every gauge onto `grid` (epoch seconds).
+
+    times/values: (rows, gauges) arrays from sample_times(). Missing samples are
+    skipped; grid points outside a gauge's samples, or inside a gap longer than
+    max_gap seconds, come out as NaN. Returns a (len(grid), gauges) array.
+    """
+    import numpy as np
+
+    grid = np.asarray(grid, dtype=float)
+    out = np.full((len(grid), values.shape[1]), np.nan)
+    for j in range(values.shape[1]):
+        ok = ~(np.isnan(times[:, j]) | np.isnan(values[:, j]))
+        t = times[ok, j]
+        v = values[ok, j]
+        if len(t) < 2:
+            continue
+        order = np.argsort(t, kind="stable")
+        t = t[order]
+        v = v[order]
+        col = np.interp(grid, t, v, left=np.nan, right=np.nan)
+        if max_gap is not None:
+            right = np.clip(np.searchsorted(t, grid), 1, len(t) - 1)
+            col[t[right] - t[right - 1] > max_gap] = np.nan
+        out[:, j] = col
+    return out
+
+
+def align_csv(path, t0=None, t1=None, step=None, max_gap=None):
+    """
+    Read a measurement CSV (optionally only t0..t1) and resample all gauges onto a
+    common grid. Returns (names, grid, values) with values shaped (len(grid), gauges).
+    """
+    header, rows = read_range(path, float("-inf") if t0 is None else t0, float("inf") if t1 is None else t1)
+    names, times, values = sample_times(header, rows)
+    grid = common_grid(times, step)
+    return names, grid, resample(times, values, grid, max_gap=max_gap)
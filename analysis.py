@@ -0,0 +1,594 @@
+"""
+Post-processing of recorded runs: per-gauge drift fits, overlapping Allan
+deviation, Welch power spectral density and gauge-difference channels
+(e.g. Z1 - Z2), computed with NumPy on fixed-size chunks of the measurement CSV.
+
+Memory stays bounded by `chunk_rows` plus the longest Allan / PSD window,
+whatever the length of the run. A large plain CSV is split into byte ranges
+that worker processes analyze in parallel; each range reads just enough rows
+past its end to finish the windows that start inside it, so merged drift and
+Allan results equal a single pass (Welch segments restart at each range).
+Gzipped segments are analyzed one per worker.
+
+Empty cells are not failed reads. In a deadband recording they hold the last
+written value and suppressed rows are missing altogether, so each file is
+rebuilt on a regular grid (forward-filled) before the statistics. In a
+multi-rate recording they mark a gauge whose period is not over, so every
+gauge is analyzed on its own samples with its own sample interval. holds="auto"
+tells the two apart from the head of the first file: multi-rate gauges are
+written at a fixed period, deadband gauges whenever they move.
+
+    python analysis.py Measurements/measurement_<time>.csv --diff "Z direction 1,Z direction 2" --workers 4
+    python analysis.py Measurements/measurement_<time>_*.csv.gz --psd-out psd.csv
+"""
+import os
+import sys
+import csv
+import glob
+import gzip
+import argparse
+import re
+
+from timeindex import parse_time, gauge_columns
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_NPERSEG = 4096  # samples per Welch segment (50 % overlap, Hann window)
+DEFAULT_MAX_M = 1 << 16  # largest Allan averaging factor; tau = m * sample interval
+MIN_TASK_BYTES = 8 * 1024 * 1024  # don't split plain CSVs into ranges smaller than this
+MISSING = ("", "error", "gap")  # non-numeric cells; empty = deadband hold or multi-rate gauge not due
+HOLD_MODES = ("auto", "deadband", "multirate", "none")  # how empty cells are read, see the module docstring
+HEAD_ROWS = 10_000  # rows of the first file used for references, sample intervals and holds="auto"
+PERIODIC_JITTER = 0.25  # multi-rate: a gauge's samples are spaced within this fraction of their median
+MAX_SEGMENT_MISSING = 0.01  # Welch segments with up to this fraction missing are mean-filled, others skipped
+_OFFSET = re.compile(r"[+-]\d\d:\d\d$")
+
+# ------------------ Chunked Reading ------------------
+
+def _open(path):
+    return gzip.open(path, "rb") if str(path).endswith(".gz") else open(path, "rb")
+
+
+def read_header(path) -> list[str]:
+    with _open(path) as f:
+        return next(csv.reader([f.readline().decode("utf-8")]))
+
+
+def _epoch_seconds(stamps):
+    """parse_time() for a block of ISO timestamps; vectorized when they share one UTC offset."""
+    import numpy as np
+
+    suffix = stamps[0][-6:] if stamps else ""
+    if _OFFSET.match(suffix) and all(s.endswith(suffix) for s in stamps):
+        local = np.array([s[:-6] for s in stamps], dtype="datetime64[us]").astype(np.int64) / 1e6
+        sign = -1 if suffix[0] == "-" else 1
+        return local - sign * (int(suffix[1:3]) * 3600 + int(suffix[4:6]) * 60)
+    return np.array([parse_time(s) for s in stamps], dtype=float)
+
+
+def _lines(path, start=0, end=None, lookahead=0):
+    """
+    Yield (line, own) for the rows starting in byte range [start, end) of the
+    file (own=True), then up to `lookahead` following rows (own=False).
+    start must be 0 or the start of a line; end=None reads to the end.
+    """
+    with _open(path) as f:
+        if start:
+            f.seek(start)
+            pos = start
+        else:
+            pos = len(f.readline())  # header
+        extra = 0
+        for line in f:
+            own = end is None or pos < end
+            if not own:
+                if extra >= lookahead:
+                    break
+                extra += 1
+            pos += len(line)
+            yield line.decode("utf-8"), own
+
+
+def read_chunks(path, chunk_rows: int = DEFAULT_CHUNK_ROWS, start=0, end=None, lookahead=0, columns=None):
+    """
+    Stream a measurement CSV as NumPy blocks of at most `chunk_rows` rows.
+
+    Yields (times, values, errors, empty, own): epoch seconds (rows,), values
+    (rows, gauges) with NaN for missing cells, bool masks of "error" and of
+    empty cells, and the number of leading rows inside [start, end) (the rest
+    are lookahead).
+    columns: gauge column names to read (default: all gauges in the header).
+    """
+    import numpy as np
+
+    header = read_header(path)
+    if columns is None:
+        columns = gauge_columns(header)
+    index = [header.index(name) for name in columns]
+
+    def block(lines, own):
+        rows = [r for r in csv.reader(lines) if r]
+        times = _epoch_seconds([r[0] for r in rows])
+        cells = np.array([[r[c] if c < len(r) else "" for c in index] for r in rows], dtype=str)
+        cells = cells.reshape(len(rows), len(index))
+        numeric = ~np.isin(cells, MISSING)
+        values = np.full(cells.shape, np.nan)
+        values[numeric] = cells[numeric].astype(float)
+        return times, values, cells == "error", cells == "", own
+
+    lines = []
+    own = 0
+    for line, is_own in _lines(path, start, end, lookahead):
+        lines.append(line)
+        own += is_own
+        if len(lines) >= chunk_rows:
+            yield block(lines, own)
+            lines = []
+            own = 0
+    if lines:
+        yield block(lines, own)
+
+
+def _split(path, parts: int) -> list[tuple[int, int]]:
+    """Byte ranges of whole rows covering the file after the header."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        bounds = [len(f.readline())]
+        for k in range(1, parts):
+            f.seek(max(size * k // parts, bounds[-1]))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+# ------------------ Empty Cells ------------------
+
+def _periodic(times) -> bool:
+    import numpy as np
+
+    if len(times) < 3:
+        return False
+    gaps = np.diff(times)
+    median = np.median(gaps)
+    # A skipped tick now and then (overrun, gap) still leaves the bulk on the period
+    return median > 0 and (np.abs(gaps - median) <= PERIODIC_JITTER * median).mean() >= 0.9
+
+
+def _detect_holds(times, empty) -> str:
+    """
+    "deadband", "multirate" or "none" for a block of rows from read_chunks:
+    "none" without empty cells, "multirate" if every gauge with empty cells is
+    written at a fixed period, else "deadband".
+    """
+    held = [j for j in range(empty.shape[1]) if empty[:, j].any()]
+    if not held:
+        return "none"
+    if all(_periodic(times[~empty[:, j]]) for j in held):
+        return "multirate"
+    return "deadband"
+
+
+def _grid_step(times) -> float:
+    """Acquisition interval of a deadband recording: the typical spacing of consecutive ticks."""
+    import numpy as np
+
+    gaps = np.diff(times)
+    gaps = gaps[gaps > 0]
+    if not len(gaps):
+        return 1.0
+    ticks = gaps[gaps <= 1.5 * np.percentile(gaps, 5)]  # suppressed rows only make gaps longer
+    return round(float(np.median(ticks)), 6)
+
+
+def _regrid(chunks, step):
+    """
+    Deadband rows from read_chunks -> rows on a regular grid of `step` seconds
+    from the first row, each holding the last written value of every gauge
+    (NaN until a gauge is first written and while its last written cell is
+    "error" or "gap"). Errors mark grid rows whose held cell is "error".
+    """
+    import numpy as np
+
+    held = held_errors = None
+    t0 = None
+    k = 0  # next grid index
+    for times, values, errors, empty, _ in chunks:
+        n, c = values.shape
+        if t0 is None:
+            t0 = times[0]
+            held = np.full(c, np.nan)
+            held_errors = np.zeros(c, dtype=bool)
+        # Row index of the last written cell at or before each row, -1 = before this chunk
+        last = np.maximum.accumulate(np.where(empty, -1, np.arange(n)[:, None]), axis=0)
+        cols = np.arange(c)
+        filled = np.where(last >= 0, values[np.maximum(last, 0), cols], held)
+        filled_errors = np.where(last >= 0, errors[np.maximum(last, 0), cols], held_errors)
+        stop = int(np.floor((times[-1] - t0) / step + 1e-6)) + 1
+        if stop > k:
+            grid = t0 + step * np.arange(k, stop)
+            row = np.searchsorted(times, grid + step * 1e-6, side="right") - 1
+            before = (row < 0)[:, None]
+            out = np.where(before, held, filled[np.maximum(row, 0)])
+            out_errors = np.where(before, held_errors, filled_errors[np.maximum(row, 0)])
+            k = stop
+            yield grid, out, out_errors, np.zeros(out.shape, dtype=bool), len(grid)
+        held, held_errors = filled[-1], filled_errors[-1]
+
+# ------------------ Streaming Statistics ------------------
+
+def octave_factors(max_m: int) -> list[int]:
+    m = 1
+    factors = []
+    while m <= max_m:
+        factors.append(m)
+        m *= 2
+    return factors
+
+
+class _RangeStats:
+    """
+    Drift sums, Allan and Welch accumulators for all channels of one row stream.
+
+    Rows are buffered only until every window starting at them is complete:
+    Allan terms at row j need rows up to j + 2m - 1, Welch segments nperseg rows.
+    Only windows starting at an own row (see read_chunks) are counted.
+    """
+
+    def __init__(self, n_channels, t_ref, x_ref, factors, nperseg, detrend):
+        import numpy as np
+
+        self.t_ref = t_ref
+        self.x_ref = np.asarray(x_ref, dtype=float)
+        self.factors = factors
+        self.nperseg = nperseg
+        self.step = nperseg // 2
+        self.detrend = detrend
+        c = n_channels
+        self.rows = 0
+        self.t_first = np.inf
+        self.t_last = -np.inf
+        self.valid = np.zeros(c, dtype=np.int64)
+        self.errors = np.zeros(c, dtype=np.int64)
+        # Drift: sums of t, t^2, x, t*x, x^2 over valid samples (t - t_ref, x - x_ref)
+        self.drift = np.zeros((5, c))
+        self.allan_sum = np.zeros((len(factors), c))
+        self.allan_n = np.zeros((len(factors), c), dtype=np.int64)
+        self.psd_sum = np.zeros((nperseg // 2 + 1, c))
+        self.segments = np.zeros(c, dtype=np.int64)
+
+        self._buf = np.empty((0, c))
+        self._buf_start = 0  # stream row index of _buf[0]
+        self._own = 0  # own rows seen so far
+        self._next_allan = [0] * len(factors)
+        self._next_seg = 0
+
+    def add(self, times, values, errors, own):
+        import numpy as np
+
+        if own:
+            # Drift, counts and time span from own rows only; lookahead rows just complete windows
+            t = times[:own] - self.t_ref
+            x = values[:own] - self.x_ref
+            ok = ~np.isnan(x)
+            tt = np.where(ok, t[:, None], 0.0)
+            xx = np.where(ok, x, 0.0)
+            self.drift += [tt.sum(0), (tt * tt).sum(0), xx.sum(0), (tt * xx).sum(0), (xx * xx).sum(0)]
+            self.valid += ok.sum(0)
+            self.errors += errors[:own].sum(0)
+            self.rows += own
+            self.t_first = min(self.t_first, times[0])
+            self.t_last = max(self.t_last, times[own - 1])
+            self._own += own
+
+        self._buf = np.concatenate([self._buf, values - self.x_ref])
+        self._allan()
+        self._welch()
+        keep_from = min(min(self._next_allan), self._next_seg)
+        drop = max(0, min(keep_from, self._buf_start + len(self._buf)) - self._buf_start)
+        self._buf = self._buf[drop:]
+        self._buf_start += drop
+
+    def _allan(self):
+        # sigma^2(m) = 1/2 < (mean of y[j+m:j+2m] - mean of y[j:j+m])^2 > over all overlapping j
+        import numpy as np
+
+        buf = self._buf
+        end = self._buf_start + len(buf)
+        ok = ~np.isnan(buf)
+        c = np.concatenate([np.zeros((1, buf.shape[1])), np.cumsum(np.where(ok, buf, 0.0), axis=0)])
+        k = np.concatenate([np.zeros((1, buf.shape[1]), dtype=np.int64), np.cumsum(ok, axis=0)])
+        for i, m in enumerate(self.factors):
+            first = self._next_allan[i]
+            stop = min(end - 2 * m + 1, self._own)
+            if stop <= first:
+                continue
+            a = first - self._buf_start
+            b = stop - self._buf_start
+            lo = (c[a + m:b + m] - c[a:b]) / m
+            hi = (c[a + 2 * m:b + 2 * m] - c[a + m:b + m]) / m
+            full = (k[a + m:b + m] - k[a:b] == m) & (k[a + 2 * m:b + 2 * m] - k[a + m:b + m] == m)
+            d = np.where(full, hi - lo, 0.0)
+            self.allan_sum[i] += (d * d).sum(0)
+            self.allan_n[i] += full.sum(0)
+            self._next_allan[i] = stop
+
+    def _welch(self):
+        import numpy as np
+
+        n = self.nperseg
+        buf = self._buf
+        end = self._buf_start + len(buf)
+        last = min(end - n, self._own - 1)  # last allowed segment start
+        if last < self._next_seg:
+            return
+        starts = np.arange(self._next_seg, last + 1, self.step) - self._buf_start
+        self._next_seg += len(starts) * self.step
+        segs = np.lib.stride_tricks.sliding_window_view(buf, n, axis=0)[starts]  # (segments, channels, n)
+        missing = np.isnan(segs)
+        n_missing = missing.sum(axis=2)
+        complete = n_missing <= MAX_SEGMENT_MISSING * n
+        # Isolated failed reads would otherwise discard whole segments: fill them with the segment mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fill = np.nansum(segs, axis=2, keepdims=True) / (n - n_missing)[..., None]
+        segs = np.where(missing, np.where(complete[..., None], fill, 0.0), segs)
+        segs = np.where(complete[..., None], segs, 0.0)
+        if self.detrend == "linear":
+            x = np.arange(n) - (n - 1) / 2
+            slope = (segs * x).sum(axis=2, keepdims=True) / (x * x).sum()
+            segs = segs - segs.mean(axis=2, keepdims=True) - slope * x
+        else:
+            segs = segs - segs.mean(axis=2, keepdims=True)
+        spectra = np.abs(np.fft.rfft(segs * np.hanning(n), axis=2)) ** 2
+        self.psd_sum += np.where(complete[..., None], spectra, 0.0).sum(axis=0).T
+        self.segments += complete.sum(0)
+
+    def state(self) -> dict:
+        return {name: getattr(self, name) for name in (
+            "rows", "t_first", "t_last", "valid", "errors", "drift",
+            "allan_sum", "allan_n", "psd_sum", "segments")}
+
+
+def _merge(states):
+    total = dict(states[0])
+    for s in states[1:]:
+        for key, value in s.items():
+            if key == "t_first":
+                total[key] = min(total[key], value)
+            elif key == "t_last":
+                total[key] = max(total[key], value)
+            else:
+                total[key] = total[key] + value
+    return total
+
+
+def _stack(states):
+    """Per-channel states (multi-rate) -> one state with the channels side by side."""
+    import numpy as np
+
+    if len(states) == 1:
+        return states[0]
+    total = {key: np.concatenate([s[key] for s in states], axis=-1) for key in (
+        "valid", "errors", "drift", "allan_sum", "allan_n", "psd_sum", "segments")}
+    total["rows"] = max(s["rows"] for s in states)
+    total["t_first"] = min(s["t_first"] for s in states)
+    total["t_last"] = max(s["t_last"] for s in states)
+    return total
+
+
+def _analyze_range(path, start, end, lookahead, gauges, differences, t_ref, x_ref, factors, nperseg,
+                   detrend, chunk_rows, holds="none", step=None):
+    """Worker body: one byte range of one file -> mergeable accumulator state."""
+    import numpy as np
+
+    n_channels = len(gauges) + len(differences)
+    if holds == "multirate":
+        # Each channel streams only its own samples
+        stats = [_RangeStats(1, t_ref, x_ref[j:j + 1], factors, nperseg, detrend) for j in range(n_channels)]
+    else:
+        stats = [_RangeStats(n_channels, t_ref, x_ref, factors, nperseg, detrend)]
+    chunks = read_chunks(path, chunk_rows, start, end, lookahead, gauges)
+    if holds == "deadband":
+        chunks = _regrid(chunks, step)
+    for times, values, errors, empty, own in chunks:
+        if differences:
+            values = np.concatenate([values, np.stack([values[:, a] - values[:, b] for a, b in differences], 1)], 1)
+            errors = np.concatenate([errors, np.stack([errors[:, a] | errors[:, b] for a, b in differences], 1)], 1)
+            empty = np.concatenate([empty, np.stack([empty[:, a] | empty[:, b] for a, b in differences], 1)], 1)
+        if holds == "multirate":
+            for j, channel in enumerate(stats):
+                keep = ~empty[:, j]
+                channel.add(times[keep], values[keep, j:j + 1], errors[keep, j:j + 1], int(keep[:own].sum()))
+        else:
+            stats[0].add(times, values, errors, own)
+    return _stack([channel.state() for channel in stats])
+
+# ------------------ Results ------------------
+
+class ChannelResult:
+    """Analysis of one gauge or difference channel."""
+
+    def __init__(self, name, samples, errors, slope, intercept, residual_std, tau0, taus, adev, adev_terms,
+                 freqs, psd, segments):
+        self.name = name
+        self.samples = samples  # valid samples (grid rows for a deadband recording)
+        self.errors = errors  # "error" cells
+        self.slope = slope  # drift in units per second (least-squares line)
+        self.intercept = intercept  # fitted value at the first timestamp
+        self.residual_std = residual_std  # scatter around the drift line
+        self.tau0 = tau0  # sample interval in seconds
+        self.taus = taus  # seconds
+        self.adev = adev  # overlapping Allan deviation per tau
+        self.adev_terms = adev_terms  # averaged difference terms per tau
+        self.freqs = freqs  # Hz
+        self.psd = psd  # units^2 / Hz, one-sided
+        self.segments = segments  # complete Welch segments averaged
+
+    @property
+    def drift_per_hour(self) -> float:
+        return self.slope * 3600
+
+    def __repr__(self):
+        return (f"ChannelResult({self.name!r}, {self.samples} samples, drift {self.drift_per_hour:.3e}/h, "
+                f"residual {self.residual_std:.3e})")
+
+
+def _results(state, names, x_ref, tau0, factors, nperseg):
+    import numpy as np
+
+    n = state["valid"].astype(float)
+    st, stt, sx, stx, sxx = state["drift"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_t = n * stt - st * st
+        slope = np.where(var_t > 0, (n * stx - st * sx) / var_t, np.nan)
+        intercept = (sx - slope * st) / n
+        sse = sxx - 2 * slope * stx - 2 * intercept * sx + slope * slope * stt + 2 * slope * intercept * st \
+            + n * intercept * intercept
+        residual = np.sqrt(np.maximum(sse, 0) / np.maximum(n - 2, 1))
+        adev = np.sqrt(state["allan_sum"] / (2 * state["allan_n"]))
+    tau0 = np.broadcast_to(np.asarray(tau0, dtype=float), n.shape)  # one sample interval per channel
+    taus = np.outer(factors, tau0)
+    window = np.hanning(nperseg)
+    fs = 1 / tau0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        psd = state["psd_sum"] / (fs * (window * window).sum() * state["segments"])
+    psd[1:-1 if nperseg % 2 == 0 else None] *= 2  # one-sided: fold negative frequencies
+
+    results = []
+    for j, name in enumerate(names):
+        has = state["allan_n"][:, j] > 0
+        results.append(ChannelResult(
+            name, int(state["valid"][j]), int(state["errors"][j]), float(slope[j]),
+            float(intercept[j] + x_ref[j]),
+            float(residual[j]), float(tau0[j]), taus[has, j], adev[has, j], state["allan_n"][has, j],
+            np.fft.rfftfreq(nperseg, tau0[j]), psd[:, j], int(state["segments"][j])))
+    return results
+
+
+def analyze(paths, differences=(), gauges=None, max_m: int = DEFAULT_MAX_M, nperseg: int = DEFAULT_NPERSEG,
+            detrend: str = "constant", chunk_rows: int = DEFAULT_CHUNK_ROWS, workers=None, holds: str = "auto",
+            step=None):
+    """
+    Analyze one recording or its segments (in time order).
+
+    differences: (name_a, name_b) pairs analyzed as extra "a - b" channels.
+    gauges: gauge column names to analyze (default: all).
+    workers: processes for the ranges / segments (default: CPU count; 1 = no pool).
+    holds: how empty cells are read, one of HOLD_MODES ("none" = as missing samples).
+    step: grid interval in seconds for a deadband recording (default: from its row spacing).
+    Returns a list of ChannelResult, gauges first, then differences.
+    """
+    import numpy as np
+
+    if holds not in HOLD_MODES:
+        raise ValueError(f"Unknown holds '{holds}'. Valid: {list(HOLD_MODES)}")
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    header = read_header(paths[0])
+    names = gauge_columns(header) if gauges is None else list(gauges)
+    for path in paths[1:]:
+        if gauge_columns(read_header(path)) != gauge_columns(header):
+            raise ValueError(f"{path}: gauge columns differ from {paths[0]}")
+    missing = [name for pair in differences for name in pair if name not in names]
+    if missing:
+        raise ValueError(f"Unknown gauge(s) in differences: {missing}. Gauges: {names}")
+    pairs = [(names.index(a), names.index(b)) for a, b in differences]
+
+    # Reference time / values, holds and sample intervals from the head of the first file
+    times, values, _, empty, _ = next(read_chunks(paths[0], HEAD_ROWS, columns=names))
+    if holds == "auto":
+        holds = _detect_holds(times, empty)
+    t_ref = float(times[0])
+    row_tau = round(float(np.median(np.diff(times))), 6) if len(times) > 1 else 1.0
+    first = np.array([col[~np.isnan(col)][0] if (~np.isnan(col)).any() else 0.0 for col in values.T])
+    x_ref = np.concatenate([first, [first[a] - first[b] for a, b in pairs]])
+    if holds == "deadband":
+        step = step or _grid_step(times)
+        tau0 = np.full(len(x_ref), step)
+    elif holds == "multirate":
+        written = ~empty
+        if pairs:
+            written = np.concatenate([written, np.stack([written[:, a] & written[:, b] for a, b in pairs], 1)], 1)
+        tau0 = np.array([round(float(np.median(np.diff(times[w]))), 6) if w.sum() > 1 else row_tau
+                         for w in written.T])
+    else:
+        tau0 = np.full(len(x_ref), row_tau)
+
+    factors = octave_factors(max_m)
+    lookahead = max(2 * max_m, nperseg)
+    if holds == "multirate":
+        lookahead *= max(1, round(float(tau0.max()) / row_tau))  # windows of the slowest channel, in rows
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for path in paths:
+        # Deadband files are rebuilt from their first row on, so they are never split
+        if str(path).endswith(".gz") or workers == 1 or holds == "deadband":
+            tasks.append((path, 0, None))
+        else:
+            parts = max(1, min(workers, os.path.getsize(path) // MIN_TASK_BYTES))
+            tasks.extend((path, a, b) for a, b in _split(path, parts))
+    args = [(path, a, b, lookahead, names, pairs, t_ref, x_ref, factors, nperseg, detrend, chunk_rows, holds, step)
+            for path, a, b in tasks]
+
+    if workers == 1 or len(tasks) == 1:
+        states = [_analyze_range(*a) for a in args]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            states = list(pool.map(_analyze_range, *zip(*args)))
+
+    channel_names = names + [f"{a} - {b}" for a, b in differences]
+    return _results(_merge(states), channel_names, x_ref, tau0, factors, nperseg)
+
+# ------------------ Main ------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drift, Allan deviation and PSD of a measurement recording.")
+    parser.add_argument("paths", nargs="+", help="measurement CSV(s), plain or .gz segments in time order")
+    parser.add_argument("--diff", action="append", default=[], metavar="A,B",
+                        help="add a difference channel A - B (gauge column names); repeatable")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--nperseg", type=int, default=DEFAULT_NPERSEG)
+    parser.add_argument("--max-m", type=int, default=DEFAULT_MAX_M)
+    parser.add_argument("--detrend", choices=("constant", "linear"), default="constant")
+    parser.add_argument("--holds", choices=HOLD_MODES, default="auto",
+                        help="empty cells: deadband holds, multi-rate gauges not due, or missing samples")
+    parser.add_argument("--step", type=float, help="grid interval in seconds for a deadband recording")
+    parser.add_argument("--psd-out", help="write frequency and PSD of every channel to this CSV")
+    args = parser.parse_args(argv)
+
+    paths = [p for pattern in args.paths for p in sorted(glob.glob(pattern))] or args.paths
+    differences = [tuple(name.strip() for name in d.split(",", 1)) for d in args.diff]
+    results = analyze(paths, differences, max_m=args.max_m, nperseg=args.nperseg, detrend=args.detrend,
+                      chunk_rows=args.chunk_rows, workers=args.workers, holds=args.holds, step=args.step)
+
+    print(f"{'channel':<32}{'samples':>10}{'errors':>8}{'drift/h':>12}{'residual':>12}")
+    for r in results:
+        print(f"{r.name:<32}{r.samples:>10}{r.errors:>8}{r.drift_per_hour:>12.3e}{r.residual_std:>12.3e}")
+
+    print("\nOverlapping Allan deviation")
+    taus = sorted({float(t) for r in results for t in r.taus})
+    print(f"{'tau s':>10}" + "".join(f"{r.name[:15]:>16}" for r in results))
+    for tau in taus:
+        cells = []
+        for r in results:
+            hit = [a for t, a in zip(r.taus, r.adev) if t == tau]
+            cells.append(f"{hit[0]:>16.3e}" if hit else f"{'':>16}")
+        print(f"{tau:>10.4g}" + "".join(cells))
+
+    if args.psd_out:
+        with open(args.psd_out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if len({r.tau0 for r in results}) == 1:
+                writer.writerow(["Frequency Hz"] + [f"{r.name} PSD" for r in results])
+                for i, freq in enumerate(results[0].freqs):
+                    writer.writerow([f"{freq:.6g}"] + [f"{r.psd[i]:.6e}" for r in results])
+            else:
+                # Multi-rate: every channel has its own frequency axis
+                writer.writerow([f"{r.name} {label}" for r in results for label in ("Frequency Hz", "PSD")])
+                for i in range(len(results[0].freqs)):
+                    writer.writerow([cell for r in results for cell in (f"{r.freqs[i]:.6g}", f"{r.psd[i]:.6e}")])
+        print(f"\nPSD ({results[0].segments} segments) -> {args.psd_out}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
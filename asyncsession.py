@@ -0,0 +1,228 @@
+"""
+asyncio front end for MeasurementSession: the blocking loop (and every IbrDll
+call, including Device_Init) runs on one dedicated executor thread, and any
+number of coroutines consume its ticks through subscriptions.
+
+    session = AsyncMeasurementSession(MeasurementSession(ibr, ...))
+    async with session:
+        async for batch in session.subscribe(maxsize=256, policy="coalesce"):
+            for t_ns, values in batch:
+                ...
+
+One bus read feeds all subscribers: the acquisition thread appends each tick
+to every subscriber's bounded queue, and a subscriber that falls behind is
+handled by its own policy without affecting the others (except "block").
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+POLICIES = ("drop_oldest", "coalesce", "block")
+DEFAULT_QUEUE_SIZE = 1024  # ticks buffered per subscriber
+BLOCK_POLL_S = 0.1  # "block" re-checks for stop/close this often while the queue is full
+
+# ------------------ Subscription ------------------
+
+class Subscription:
+    """
+    Bounded queue of (t_ns, values) ticks for one consumer; iterate it with
+    `async for batch in subscription` to get lists of everything queued since
+    the last batch (at most `maxsize` ticks).
+
+    Slow-consumer policies, applied on the acquisition thread when the queue is full:
+    - drop_oldest: discard the oldest tick (counted in `dropped`).
+    - coalesce: merge the new tick into the newest queued one; each gauge keeps
+      its latest non-None value and the newer timestamp (counted in `coalesced`).
+      Nothing is lost from the most recent state, only intermediate ticks.
+    - block: stall the acquisition thread until the consumer catches up. Every
+      other subscriber and the recording stall with it; only for consumers that
+      must see every tick and are known to keep up on average. stop() releases it.
+
+    Call close() (or leave the session's context) when done consuming; an
+    abandoned subscription keeps queueing ticks under its policy.
+    """
+
+    def __init__(self, owner, loop, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = "drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}'. Valid: {list(POLICIES)}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self._owner = owner
+        self._loop = loop
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._waiter = None  # asyncio.Future while the consumer waits on an empty queue
+        self._closed = False  # no more ticks: session finished or close() called
+
+    # ---- acquisition thread ----
+
+    def _put(self, item):
+        with self._lock:
+            if self._closed:
+                return
+            q = self._queue
+            if len(q) >= self.maxsize:
+                if self.policy == "drop_oldest":
+                    q.popleft()
+                    self.dropped += 1
+                elif self.policy == "coalesce":
+                    t_ns, values = item
+                    _, newest = q[-1]
+                    q[-1] = (t_ns, [v if v is not None else old for v, old in zip(values, newest)])
+                    self.coalesced += 1
+                    return
+                else:
+                    stopping = self._owner._stopping
+                    while len(q) >= self.maxsize and not self._closed and not stopping.is_set():
+                        self._not_full.wait(BLOCK_POLL_S)
+                    if self._closed:
+                        return
+                    if len(q) >= self.maxsize:
+                        # Stopping with a stalled consumer: do not hold up the final ticks
+                        q.popleft()
+                        self.dropped += 1
+            q.append(item)
+            self._wake()
+
+    def _finish(self):
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+            self._wake()
+
+    def _wake(self):
+        # Caller holds the lock. Only cross into the event loop when the consumer is parked.
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            self._loop.call_soon_threadsafe(_resolve, waiter)
+
+    # ---- event loop ----
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> list:
+        while True:
+            with self._lock:
+                if self._queue:
+                    batch = list(self._queue)
+                    self._queue.clear()
+                    self._not_full.notify_all()
+                    return batch
+                if self._closed:
+                    raise StopAsyncIteration
+                self._waiter = waiter = self._loop.create_future()
+            await waiter
+
+    def close(self):
+        """Stop receiving ticks; iteration ends once the queued ones are consumed."""
+        self._owner._unsubscribe(self)
+        self._finish()
+
+    async def aclose(self):
+        self.close()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+# ------------------ Session ------------------
+
+class AsyncMeasurementSession:
+    """
+    Runs `session` (a MeasurementSession) on a single-thread executor and fans
+    its ticks out to subscriptions. start() returns once the thread is running;
+    stop() asks the session to finish after the current tick and waits for
+    finish() (writer drain, deinit) to complete. Subscriptions end when the
+    session does.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._subscribers = []  # replaced, never mutated: the acquisition thread iterates it lock-free
+        self._lock = threading.Lock()
+        self._executor = None
+        self._future = None
+        self._stopping = threading.Event()
+        self._finished = False  # run() returned; later subscriptions end immediately
+        session.listeners.append(self._publish)
+
+    def _publish(self, t_ns, values):
+        for sub in self._subscribers:
+            sub._put((t_ns, values))
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not sub]
+
+    def subscribe(self, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = "drop_oldest") -> Subscription:
+        """New subscription receiving every tick from now on (see Subscription for the policies)."""
+        sub = Subscription(self, asyncio.get_running_loop(), maxsize=maxsize, policy=policy)
+        with self._lock:
+            if self._finished:
+                sub._finish()
+            else:
+                self._subscribers = self._subscribers + [sub]
+        return sub
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    async def start(self):
+        if self._future is not None:
+            raise RuntimeError("Session already started.")
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ibr-acquisition")
+        self._future = loop.run_in_executor(self._executor, self._run)
+
+    def _run(self):
+        try:
+            self.session.run()
+        finally:
+            with self._lock:
+                self._finished = True
+                subscribers, self._subscribers = self._subscribers, []
+            for sub in subscribers:
+                sub._finish()
+
+    async def wait(self):
+        """Wait for the session to end (duration reached or stopped)."""
+        if self._future is None:
+            raise RuntimeError("Session not started.")
+        try:
+            await asyncio.shield(self._future)
+        except SystemExit:
+            # MeasurementSession.run exits the process on init failure; surface it as an error here
+            raise RuntimeError("Device initialization failed.") from None
+        finally:
+            if self._future.done() and self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    async def stop(self):
+        self._stopping.set()
+        self.session.stop()
+        if self._future is not None:
+            await self.wait()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.stop()
+        except Exception as e:
+            if exc_type is None:
+                raise
+            logging.warning(f"Stopping measurement session failed: {e}")
@@ -0,0 +1,43 @@
+import os
+import importlib
+
+# ------------------ Backend Registry ------------------
+#
+# Everything that talks to a bus implements the IbrDll interface (init_device,
+# get_value, get_values with its `cancel` event, deinit_device, optionally
+# register_callback). Backends
+# are registered as "module:Class" strings and imported only when opened, so
+# picking one costs nothing for the others: tools never import ctypes bindings
+# they do not use. IBR_BACKEND in the environment picks one when none is named.
+
+BACKENDS = {
+    "dll": "ibrdll:IbrDll",  # real hardware through ibr_ddk.dll (Windows)
+    "simulated": "acquisition:SimulatedIbr",  # noisy constant values, optional latency / hangs
+    "replay": "replay:ReplayIbr",  # a recorded CSV or a synthetic profile
+}
+ENV_VAR = "IBR_BACKEND"
+
+
+def register_backend(name: str, factory):
+    """factory: a callable returning a backend, or a "module:attribute" string resolved on first use."""
+    BACKENDS[name] = factory
+
+
+def backend_factory(name: str):
+    try:
+        factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{name}'. Valid: {sorted(BACKENDS)}") from None
+    if isinstance(factory, str):
+        module, _, attr = factory.partition(":")
+        factory = getattr(importlib.import_module(module), attr)
+    return factory
+
+
+def backend_name(name=None) -> str:
+    return name or os.environ.get(ENV_VAR) or "dll"
+
+
+def open_backend(name=None, *args, **kwargs):
+    """Instantiate backend `name` (default: $IBR_BACKEND or "dll") with the given arguments."""
+    return backend_factory(backend_name(name))(*args, **kwargs)
@@ -0,0 +1,83 @@
+"""
+Startup benchmark: wall time of importing each module (and of the calls CLI
+helpers make first) in a fresh interpreter, median of several runs.
+
+Each case runs in its own `python -c` process so nothing is cached between
+them; the time covers only the measured statement, not interpreter startup.
+--detail prints the slowest imports behind one case via `python -X importtime`.
+
+    python bench_import.py [repeats]
+    python bench_import.py --detail main3
+"""
+import os
+import sys
+import statistics
+import subprocess
+
+CASES = [
+    ("backends", "import backends"),
+    ("ibrdll", "import ibrdll"),
+    ("IbrDll(path)", "from ibrdll import IbrDll; IbrDll(r'C:\\IBR_DDK\\DLL\\Win32\\ibr_ddk.dll')"),
+    ("main", "import main"),
+    ("main3", "import main3"),
+    ("parse_sensor_selection", "from main3 import parse_sensor_selection; parse_sensor_selection('1-3,6')"),
+    ("timeindex", "import timeindex"),
+    ("alignment", "import alignment"),
+    ("deadband", "import deadband"),
+    ("analysis", "import analysis"),
+    ("tracing", "import tracing"),
+    ("replay", "import replay"),
+]
+
+_TIMED = "import time; t0 = time.perf_counter(); {stmt}; print(time.perf_counter() - t0)"
+
+
+def time_case(stmt: str, repeats: int = 5):
+    """Median seconds for `stmt` in fresh interpreters, or the error text if it fails."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-c", _TIMED.format(stmt=stmt)], cwd=here,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return lines[-1] if lines else f"exit code {proc.returncode}"
+        samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def detail(module: str, top: int = 15):
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=here,
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            rows.append((int(fields[1]), int(fields[0]), fields[2].rstrip()))
+        except ValueError:
+            continue  # column header
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative, self_us, name in rows[:top]:
+        print(f"{cumulative / 1e3:>14.1f}{self_us / 1e3:>10.1f}  {name}")
+
+
+def main(argv):
+    if argv[:1] == ["--detail"]:
+        detail(argv[1] if len(argv) > 1 else "main3")
+        return
+    repeats = int(argv[0]) if argv else 5
+    print(f"Python {sys.version.split()[0]} on {sys.platform}, median of {repeats} fresh interpreters")
+    for name, stmt in CASES:
+        result = time_case(stmt, repeats)
+        if isinstance(result, float):
+            print(f"{name:<26}{result * 1e3:>9.1f} ms")
+        else:
+            print(f"{name:<26}   failed: {result}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+Microbenchmark: per-read overhead of IbrDll.get_value vs. IbrDll.get_values.
+
+Runs against a stub "DLL" whose exports are ctypes function pointers backed by
+Python functions, so no hardware is needed. The stub's own cost is the same for
+both paths; the difference is the wrapper overhead per Device_Value call.
+
+    python bench_reads.py [gauges] [oversamples] [repeats]
+
+Only the stub is called, so this runs on any platform: IbrDll binds nothing
+Windows-specific until init_device().
+"""
+import sys
+import time
+import ctypes
+import argparse
+from ctypes import c_short, c_double, POINTER
+from array import array
+
+from ibrdll import IbrDll
+
+_VALUE_PROTO = ctypes.CFUNCTYPE(c_short, c_short, c_short, POINTER(c_double))
+_VOID_PROTO = ctypes.CFUNCTYPE(c_short)
+
+
+class StubDll:
+    """Minimal stand-in exposing the exports IbrDll binds in __init__."""
+
+    def __init__(self):
+        def device_value(devicenr, address, out):
+            out[0] = address * 0.001
+            return 0
+
+        self.Device_Value = _VALUE_PROTO(device_value)
+        self.Device_Init = _VOID_PROTO(lambda: 0)
+        self.Device_GetVersion = _VOID_PROTO(lambda: 0)
+        self.Device_DeInit = _VOID_PROTO(lambda: 0)
+
+
+def bench(gauges: int = 6, oversamples: int = 50, repeats: int = 200):
+    ibr = IbrDll("stub.dll", dll=StubDll())
+    addresses = list(range(1, gauges + 1))
+    burst = addresses * oversamples
+    reads = len(burst) * repeats
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for _ in range(oversamples):
+            for addr in addresses:
+                ibr.get_value(1, addr)
+    per_call = (time.perf_counter() - t0) / reads
+
+    out = (array("d", bytes(8 * len(burst))), array("h", bytes(2 * len(burst))))
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        ibr.get_values(1, burst, out)
+    per_batched = (time.perf_counter() - t0) / reads
+
+    # Stub cost alone, to show what is left as wrapper overhead
+    fn = ibr.Device_Value
+    val = c_double()
+    ptr = ctypes.pointer(val)
+    dev = c_short(1)
+    arg = c_short(1)
+    t0 = time.perf_counter()
+    for _ in range(reads):
+        fn(dev, arg, ptr)
+    per_raw = (time.perf_counter() - t0) / reads
+
+    print(f"{reads} reads ({gauges} gauges x {oversamples} oversamples x {repeats})")
+    print(f"get_value  : {per_call * 1e6:8.3f} us/read  (overhead {(per_call - per_raw) * 1e6:.3f} us)")
+    print(f"get_values : {per_batched * 1e6:8.3f} us/read  (overhead {(per_batched - per_raw) * 1e6:.3f} us)")
+    print(f"raw stub   : {per_raw * 1e6:8.3f} us/read")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-read overhead of IbrDll.get_value vs. get_values.")
+    parser.add_argument("gauges", type=int, nargs="?", default=6)
+    parser.add_argument("oversamples", type=int, nargs="?", default=50)
+    parser.add_argument("repeats", type=int, nargs="?", default=200)
+    args = parser.parse_args(argv)
+    bench(args.gauges, args.oversamples, args.repeats)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,50 @@
+import math
+import time
+
+# ------------------ Read Latency Calibration ------------------
+
+def measure_read_latency(ibr, devicenr, gauge_addresses, rounds: int = 5) -> dict:
+    """
+    Time `rounds` Device_Value calls per gauge right after init.
+    Returns {address: mean seconds per read}; failed reads count too, they take bus time as well.
+    """
+    totals = {addr: 0.0 for addr in gauge_addresses}
+    for _ in range(rounds):
+        for addr in gauge_addresses:
+            t0 = time.perf_counter()
+            ibr.get_value(devicenr, addr)
+            totals[addr] += time.perf_counter() - t0
+    return {addr: total / rounds for addr, total in totals.items()}
+
+
+class LatencyEstimator:
+    """
+    Rolling per-read latency estimate (exponentially weighted mean and variance).
+
+    `upper` is mean + k * std: a conservative read time that a burst sized from
+    it should rarely exceed.
+    """
+
+    def __init__(self, initial: float, alpha: float = 0.1, k: float = 3.0):
+        self.alpha = alpha
+        self.k = k
+        self.mean = initial
+        self.var = 0.0
+
+    def update(self, per_read: float):
+        d = per_read - self.mean
+        self.mean += self.alpha * d
+        self.var = (1.0 - self.alpha) * (self.var + self.alpha * d * d)
+
+    @property
+    def upper(self) -> float:
+        return self.mean + self.k * math.sqrt(self.var)
+
+
+def oversample_count_for(interval: float, n_gauges: int, per_read: float,
+                         budget: float = 0.8, max_count: int = 50) -> int:
+    """Largest oversample count whose burst fits in `budget` of the interval (at least 1)."""
+    if per_read <= 0 or n_gauges <= 0:
+        return max_count
+    count = int(interval * budget / (per_read * n_gauges))
+    return max(1, min(count, max_count))
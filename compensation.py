@@ -0,0 +1,283 @@
+"""
+Per-gauge calibration and compensation of raw Device_Value readings:
+calibration polynomial, zero offset and thermal-expansion correction,
+applied with NumPy to a whole read burst (every gauge x oversample of a tick)
+or to whole chunks of a recorded run.
+
+Calibration table (JSON), keyed by gauge address; every field is optional:
+
+    {
+      "1": {"poly": [0.0012, 1.00035, -2.1e-6], "zero": 0.004,
+            "alpha": 11.5e-6, "length": 12.0, "t_ref": 20.0},
+      "4": {"poly": [0.0, 0.99987]}
+    }
+
+    compensated = poly(raw - zero) - alpha * length * (temperature - t_ref)
+
+poly holds ascending coefficients (c0 + c1 x + c2 x^2 ...; default identity),
+alpha the expansion coefficient (1/K) of the length `length` (in the reading's
+unit) between probe mount and part, t_ref the temperature it was calibrated
+at (degrees C). Gauges without an entry pass through unchanged.
+
+    python compensation.py table.json Measurements/measurement_<time>.csv out.csv --gauges 1,2,3
+"""
+import os
+import csv
+import sys
+import gzip
+import json
+import math
+import argparse
+
+DEFAULT_T_REF = 20.0
+CACHE_SIZE = 64  # gathered coefficient blocks kept per distinct burst layout
+SMALL_BLOCK = 32  # bursts shorter than this are cheaper in plain Python than through NumPy's call overhead
+
+# ------------------ Calibration Table ------------------
+
+class GaugeCompensation:
+    """Calibration of one gauge, see the module docstring for the model."""
+
+    __slots__ = ("poly", "zero", "alpha", "length", "t_ref")
+
+    def __init__(self, poly=(0.0, 1.0), zero: float = 0.0, alpha: float = 0.0, length: float = 0.0,
+                 t_ref: float = DEFAULT_T_REF):
+        if not poly:
+            raise ValueError("Calibration polynomial needs at least one coefficient.")
+        self.poly = [float(c) for c in poly]
+        self.zero = float(zero)
+        self.alpha = float(alpha)
+        self.length = float(length)
+        self.t_ref = float(t_ref)
+
+    def thermal(self, temperature) -> float:
+        """Thermal-expansion correction subtracted at `temperature` (None = at t_ref, i.e. 0)."""
+        if temperature is None:
+            return 0.0
+        return self.alpha * self.length * (temperature - self.t_ref)
+
+    def expanded(self) -> list[float]:
+        """Ascending coefficients of poly(x - zero) in x, so the hot path skips the subtraction."""
+        coeffs = [self.poly[-1]]
+        for c in reversed(self.poly[:-1]):
+            # coeffs * (x - zero) + c
+            shifted = [0.0] + coeffs
+            for i, a in enumerate(coeffs):
+                shifted[i] -= self.zero * a
+            shifted[0] += c
+            coeffs = shifted
+        return coeffs
+
+    def __call__(self, raw: float, temperature=None) -> float:
+        x = raw - self.zero
+        y = 0.0
+        for c in reversed(self.poly):
+            y = y * x + c
+        return y - self.thermal(temperature)
+
+
+def load_table(path) -> dict:
+    """{address: GaugeCompensation} from a JSON calibration table."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    table = {}
+    for key, entry in raw.items():
+        try:
+            table[int(key)] = GaugeCompensation(**entry)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: bad calibration for gauge {key}: {e}") from None
+    return table
+
+# ------------------ Vectorized Stage ------------------
+
+class Compensator:
+    """
+    Applies a calibration table to blocks of raw readings.
+
+    The table is compiled into one coefficient row per address (expanded
+    polynomial, zero folded in, thermal term folded into c0), so a block costs
+    one gather plus `degree` multiply-adds over the whole block in NumPy.
+    Blocks shorter than SMALL_BLOCK run the same Horner loop in Python.
+    `temperature` (degrees C, None = no thermal correction) may be changed at
+    any time, e.g. from a room sensor; the next block uses it.
+    """
+
+    def __init__(self, table: dict, gauge_addresses=None, temperature=None):
+        import numpy as np
+
+        self.table = dict(table)
+        addresses = sorted(set(self.table) | set(gauge_addresses or ()))
+        self._slot = {addr: i for i, addr in enumerate(addresses)}
+        identity = GaugeCompensation()
+        entries = [self.table.get(addr, identity) for addr in addresses]
+        expanded = [entry.expanded() for entry in entries]
+        self.degree = max(len(c) for c in expanded) - 1
+        # row k holds c_k for every slot; padded with zeros up to the highest degree
+        self._base = np.zeros((self.degree + 1, len(addresses)))
+        for slot, coeffs in enumerate(expanded):
+            self._base[:len(coeffs), slot] = coeffs
+        self._entries = entries
+        self._cache = {}
+        self.temperature = temperature
+
+    @property
+    def temperature(self):
+        return self._temperature
+
+    @temperature.setter
+    def temperature(self, value):
+        coeffs = self._base.copy()
+        coeffs[0] -= [entry.thermal(value) for entry in self._entries]
+        rows = {addr: tuple(coeffs[::-1, slot].tolist()) for addr, slot in self._slot.items()}  # highest first
+        # Swapped in one assignment: a burst in flight on the acquisition thread keeps a consistent table
+        self._coeffs, self._rows, self._cache, self._temperature = coeffs, rows, {}, value
+
+    def _gathered(self, addresses):
+        key = tuple(addresses)
+        cache = self._cache
+        coeffs = cache.get(key)
+        if coeffs is None:
+            if len(cache) >= CACHE_SIZE:
+                cache.clear()
+            slots = [self._slot[addr] for addr in key]
+            coeffs = cache[key] = self._coeffs[:, slots]
+        return coeffs
+
+    def _horner(self, coeffs, x):
+        y = coeffs[-1] * x
+        for k in range(self.degree - 1, 0, -1):
+            y += coeffs[k]
+            y *= x
+        y += coeffs[0]
+        return y
+
+    def apply(self, addresses, values) -> list[float]:
+        """
+        Compensate one burst: values[i] was read from addresses[i]. values may be
+        any sequence or buffer of floats at least len(addresses) long (e.g. the
+        array("d") filled by get_values).
+        """
+        n = len(addresses)
+        if n < SMALL_BLOCK:
+            rows = self._rows
+            degree = self.degree
+            out = []
+            if degree == 1:
+                for addr, x in zip(addresses, values):
+                    c1, c0 = rows[addr]
+                    out.append(c1 * x + c0)
+            elif degree == 2:
+                for addr, x in zip(addresses, values):
+                    c2, c1, c0 = rows[addr]
+                    out.append((c2 * x + c1) * x + c0)
+            else:
+                for addr, x in zip(addresses, values):
+                    y = 0.0
+                    for c in rows[addr]:
+                        y = y * x + c
+                    out.append(y)
+            return out
+
+        import numpy as np
+
+        try:
+            x = np.frombuffer(values, dtype=np.float64, count=n)  # zero-copy view of an array("d")
+        except TypeError:
+            x = np.asarray(values[:n], dtype=np.float64)
+        if self.degree == 0:
+            return self._gathered(addresses)[0].tolist()
+        return self._horner(self._gathered(addresses), x).tolist()
+
+    def apply_columns(self, addresses, block):
+        """Compensate a (rows, gauges) block whose columns hold `addresses`; NaN stays NaN."""
+        import numpy as np
+
+        block = np.asarray(block, dtype=np.float64)
+        coeffs = self._gathered(addresses)[:, None, :]
+        if self.degree == 0:
+            return np.where(np.isnan(block), np.nan, coeffs[0])
+        return self._horner(coeffs, block)
+
+# ------------------ Offline Compensation ------------------
+
+def compensate_csv(table, path, out_path, gauge_addresses=None, temperature=None, chunk_rows: int = 100_000,
+                   precision: int = 8) -> int:
+    """
+    Copy `path` (a measurement CSV, plain or .gz) to `out_path` with every
+    gauge value compensated and the raw reading next to it in "<name> raw"
+    columns, like a session recording with RAW_COLUMNS. Non-numeric cells
+    ("error", "gap", empty) are kept as they are. Gauge columns map to
+    gauge_addresses in order (default 1, 2, 3, ...). Returns rows written.
+    """
+    import numpy as np
+    from timeindex import gauge_columns
+
+    fmt = f"{{:.{precision}f}}"
+    opener = gzip.open if str(path).endswith(".gz") else open
+    rows = 0
+    with opener(path, "rt", newline="", encoding="utf-8") as f_in, \
+            open(out_path, "w", newline="", encoding="utf-8") as f_out:
+        reader = csv.reader(f_in)
+        writer = csv.writer(f_out)
+        header = next(reader)
+        names = gauge_columns(header)
+        if names and all(f"{name} raw" in header for name in names):
+            raise ValueError(f"{path} already has raw columns (recorded with a calibration table)")
+        index = [header.index(name) for name in names]
+        if gauge_addresses is None:
+            gauge_addresses = list(range(1, len(names) + 1))
+        if len(gauge_addresses) != len(names):
+            raise ValueError(f"{path}: {len(names)} gauge columns but {len(gauge_addresses)} addresses")
+        compensator = Compensator(table, gauge_addresses, temperature=temperature)
+        after = max(index) + 1
+        writer.writerow(header[:after] + [f"{name} raw" for name in names] + header[after:])
+
+        def flush(chunk):
+            cells = [[r[c] if c < len(r) else "" for c in index] for r in chunk]
+            block = np.array([[_number(cell) for cell in row] for row in cells], dtype=np.float64)
+            compensated = compensator.apply_columns(gauge_addresses, block.reshape(len(chunk), len(index)))
+            for record, raw_cells, values in zip(chunk, cells, compensated.tolist()):
+                record = record + [""] * (after - len(record))
+                for c, cell, value in zip(index, raw_cells, values):
+                    if value == value:  # not NaN
+                        record[c] = fmt.format(value)
+                writer.writerow(record[:after] + raw_cells + record[after:])
+
+        chunk = []
+        for record in reader:
+            if not record:
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                flush(chunk)
+                rows += len(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def _number(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return math.nan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a calibration table to a recorded measurement CSV.")
+    parser.add_argument("table", help="JSON calibration table keyed by gauge address")
+    parser.add_argument("path", help="measurement CSV (plain or .gz)")
+    parser.add_argument("out", help="output CSV with compensated and raw columns")
+    parser.add_argument("--gauges", help="addresses of the gauge columns in order, e.g. 1,2,3 (default 1..n)")
+    parser.add_argument("--temperature", type=float, help="part temperature in degrees C for thermal compensation")
+    args = parser.parse_args(argv)
+
+    gauges = [int(a) for a in args.gauges.split(",")] if args.gauges else None
+    rows = compensate_csv(load_table(args.table), args.path, args.out, gauges, temperature=args.temperature)
+    print(f"{rows} rows -> {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
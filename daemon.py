@@ -0,0 +1,331 @@
+"""
+Long-lived acquisition service: initializes the IBR bus once and serves
+measurement sessions to local clients, so back-to-back jobs skip Device_Init.
+
+Transport is multiprocessing.connection (named pipe on Windows, Unix socket
+elsewhere). Requests are dicts with a "cmd" key; every reply is a dict with
+"ok" and either the result fields or "error".
+
+    python daemon.py [--simulate]        # serve
+    python daemon.py status|stop|shutdown
+
+Clients authenticate with a random key generated on first use and kept in
+AUTHKEY_PATH (readable by the owner only); service and clients of the same
+user share it.
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import secrets
+import threading
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+import main3
+from main3 import MeasurementSession, DEFAULT_GAUGE_DESCRIPTIONS, OUTPUT_DIR
+
+if sys.platform == "win32":
+    DEFAULT_ADDRESS = r"\\.\pipe\ibr_acquisition"
+else:
+    DEFAULT_ADDRESS = os.path.join("/tmp", f"ibr_acquisition_{os.getuid()}.sock")
+AUTHKEY_PATH = os.path.join(os.path.expanduser("~"), ".ibr_acquisition.key")
+# Constructor options clients may pass with "start" / "configure"; everything else is rejected
+SESSION_OPTIONS = ("recording_format", "reducer", "stats_columns", "overrun_policy", "auto_oversample",
+                   "gauge_rates", "segment_max_bytes", "segment_max_seconds")
+SUBSCRIBER_QUEUE_SIZE = 1024  # samples buffered per streaming client before dropping
+
+
+def load_authkey(path=None) -> bytes:
+    """The per-install key in `path` (default AUTHKEY_PATH), created (owner read/write only) if it does not exist yet."""
+    path = AUTHKEY_PATH if path is None else path
+    try:
+        with open(path, "rb") as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    key = secrets.token_hex(32).encode("ascii")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _output_path(filename) -> str:
+    """Client-chosen output file, confined to OUTPUT_DIR."""
+    root = os.path.realpath(OUTPUT_DIR)
+    path = os.path.realpath(os.path.join(root, filename))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"Output file must be a file name inside {OUTPUT_DIR}, got '{filename}'")
+    return path
+
+# ------------------ Service ------------------
+
+class AcquisitionService:
+    """
+    Owns one initialized backend (IbrDll or a stand-in with the same interface)
+    and runs at most one MeasurementSession on it at a time.
+
+    Commands: start, stop, configure (stop + start with new settings), status,
+    subscribe (stream samples on this connection), shutdown.
+    """
+
+    def __init__(self, ibr, setup_path=main3.SETUP_PATH, address=DEFAULT_ADDRESS, authkey=None):
+        self.ibr = ibr
+        self.setup_path = setup_path
+        self.address = address
+        self.authkey = load_authkey() if authkey is None else authkey
+
+        self.session = None
+        self._session_thread = None
+        self._config = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._listener = None
+        self._shutdown = threading.Event()
+        self.init_seconds = None
+
+    # ---- session control ----
+
+    def _publish(self, t_ns, values):
+        # Runs on the acquisition thread: never block, drop for slow clients
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait((t_ns, values))
+            except queue.Full:
+                pass
+
+    def start_session(self, gauges=None, frequency_hz=1.0, duration_hours=None,
+                      gauge_descriptions=None, filename=None, **options) -> dict:
+        with self._lock:
+            if self._session_thread is not None and self._session_thread.is_alive():
+                raise RuntimeError("A session is already running; stop or configure it.")
+            unknown = sorted(set(options) - set(SESSION_OPTIONS))
+            if unknown:
+                raise ValueError(f"Unknown session option(s) {unknown}. Valid: {list(SESSION_OPTIONS)}")
+            gauges = list(gauges or DEFAULT_GAUGE_DESCRIPTIONS.keys())
+            descriptions = gauge_descriptions or {addr: DEFAULT_GAUGE_DESCRIPTIONS.get(addr, f"Gauge {addr}")
+                                                  for addr in gauges}
+            descriptions = {int(k): v for k, v in descriptions.items()}
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            if filename is None:
+                timestamp = datetime.now().strftime('%Y-%m-%dT%H-%M-%S')
+                extension = "bin" if options.get("recording_format") == "binary" else "csv"
+                filename = os.path.join(OUTPUT_DIR, f"measurement_{timestamp}.{extension}")
+            else:
+                filename = _output_path(filename)
+
+            session = MeasurementSession(
+                ibr=self.ibr,
+                gauge_addresses=gauges,
+                gauge_descriptions=descriptions,
+                frequency_hz=float(frequency_hz),
+                duration_hours=duration_hours,
+                csv_filename=filename,
+                manage_device=False,
+                **options,
+            )
+            session.listeners.append(self._publish)
+            self.session = session
+            self._config = {"gauges": gauges, "frequency_hz": frequency_hz, "duration_hours": duration_hours,
+                            "gauge_descriptions": descriptions, "filename": filename, **options}
+            self._session_thread = threading.Thread(target=session.run, name="MeasurementSession", daemon=True)
+            self._session_thread.start()
+            logging.info(f"Session started: {self._config}")
+            return {"filename": filename}
+
+    def stop_session(self, timeout: float = 60.0) -> dict:
+        with self._lock:
+            thread, session = self._session_thread, self.session
+            if thread is None or not thread.is_alive():
+                return {"running": False}
+            session.stop()
+        thread.join(timeout)
+        logging.info("Session stopped.")
+        return {"running": thread.is_alive(), "samples": session.total_samples}
+
+    def configure_session(self, **changes) -> dict:
+        config = dict(self._config or {})
+        config.pop("filename", None)  # a reconfigured session gets a new file
+        config.update(changes)
+        self.stop_session()
+        return self.start_session(**config)
+
+    def status(self) -> dict:
+        running = self._session_thread is not None and self._session_thread.is_alive()
+        return {
+            "initialized": bool(getattr(self.ibr, "initialized", False)),
+            "init_seconds": self.init_seconds,
+            "running": running,
+            "samples": self.session.total_samples if self.session is not None else 0,
+            "config": self._config,
+            "subscribers": len(self._subscribers),
+        }
+
+    # ---- serving ----
+
+    def _stream(self, conn):
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(q)
+        try:
+            conn.send({"ok": True})
+            while not self._shutdown.is_set():
+                try:
+                    t_ns, values = q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                conn.send({"ok": True, "t_ns": t_ns, "values": values})
+        except (EOFError, OSError, BrokenPipeError):
+            pass
+        finally:
+            self._subscribers.discard(q)
+
+    def _handle(self, conn):
+        try:
+            while not self._shutdown.is_set():
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    return
+                cmd = request.pop("cmd", None)
+                try:
+                    if cmd == "subscribe":
+                        self._stream(conn)
+                        return
+                    if cmd == "start":
+                        reply = self.start_session(**request)
+                    elif cmd == "stop":
+                        reply = self.stop_session()
+                    elif cmd == "configure":
+                        reply = self.configure_session(**request)
+                    elif cmd == "status":
+                        reply = self.status()
+                    elif cmd == "shutdown":
+                        reply = {}
+                        self._shutdown.set()
+                    else:
+                        raise ValueError(f"Unknown command '{cmd}'")
+                    conn.send({"ok": True, **reply})
+                except Exception as e:
+                    logging.exception(f"Command '{cmd}' failed")
+                    conn.send({"ok": False, "error": str(e)})
+                if self._shutdown.is_set():
+                    self._wake_listener()
+        finally:
+            conn.close()
+
+    def _wake_listener(self):
+        # accept() does not return when the listener is closed from another thread; connect once instead
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+    def serve_forever(self) -> int:
+        logging.info("Initializing device.")
+        t0 = time.monotonic()
+        rc = self.ibr.init_device(self.setup_path)
+        self.init_seconds = time.monotonic() - t0
+        if rc != 0:
+            logging.critical(f"Device initialization failed (rc={rc}).")
+            return rc
+        logging.info(f"Device initialized in {self.init_seconds:.1f} s, listening on {self.address}")
+
+        if sys.platform != "win32" and os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket from a previous run
+        self._listener = Listener(self.address, authkey=self.authkey)
+        try:
+            while not self._shutdown.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    # A client with the wrong key or one that hung up mid-handshake: keep serving
+                    logging.warning(f"Accepting a client failed: {e!r}")
+                    continue
+                if self._shutdown.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._shutdown.set()
+            self.stop_session()
+            self._listener.close()
+            logging.info("Deinitializing device.")
+            self.ibr.deinit_device()
+        return 0
+
+# ------------------ Client ------------------
+
+class AcquisitionClient:
+    """Thin client for AcquisitionService; one connection per client."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None):
+        self.address = address
+        self.authkey = load_authkey() if authkey is None else authkey
+        self._conn = Client(address, authkey=self.authkey)
+
+    def _call(self, cmd, **kwargs) -> dict:
+        self._conn.send({"cmd": cmd, **kwargs})
+        reply = self._conn.recv()
+        if not reply.pop("ok"):
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def start(self, **config) -> dict:
+        return self._call("start", **config)
+
+    def stop(self) -> dict:
+        return self._call("stop")
+
+    def configure(self, **changes) -> dict:
+        return self._call("configure", **changes)
+
+    def status(self) -> dict:
+        return self._call("status")
+
+    def shutdown(self) -> dict:
+        return self._call("shutdown")
+
+    def samples(self):
+        """Yield (t_ns, values) for every tick of the running session(s) until disconnected."""
+        conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send({"cmd": "subscribe"})
+            conn.recv()
+            while True:
+                msg = conn.recv()
+                yield msg["t_ns"], msg["values"]
+        except EOFError:
+            return
+        finally:
+            conn.close()
+
+    def close(self):
+        self._conn.close()
+
+# ------------------ Main ------------------
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in {"status", "stop", "shutdown"}:
+        client = AcquisitionClient()
+        print(getattr(client, argv[0])())
+        client.close()
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if "--simulate" in argv:
+        from acquisition import SimulatedIbr
+        ibr = SimulatedIbr()
+    else:
+        from ibrdll import IbrDll
+        ibr = IbrDll(main3.DLL_PATH)
+    return AcquisitionService(ibr).serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import csv
+import gzip
+import math
+
+from timeindex import parse_time, gauge_columns
+
+# ------------------ Deadband Filter ------------------
+#
+# In deadband mode a gauge's value is only written when it has moved more than
+# its threshold away from the last written value, when it changes between valid
+# and failed, or when `heartbeat` seconds have passed since it was last written.
+# Unchanged gauges get an empty cell ("hold the previous value"); a row in which
+# no gauge changed is not written at all.
+
+HOLD = ""
+
+
+class DeadbandFilter:
+    """
+    thresholds: one threshold for all gauges or {address: threshold}; gauges
+    missing from the dict use `default` (0.0 = write every change).
+    """
+
+    def __init__(self, gauge_addresses, thresholds, heartbeat: float = 60.0, default: float = 0.0):
+        if not isinstance(thresholds, dict):
+            thresholds = {addr: thresholds for addr in gauge_addresses}
+        self.thresholds = {addr: float(thresholds.get(addr, default)) for addr in gauge_addresses}
+        self.heartbeat = heartbeat
+        self._last = {addr: None for addr in gauge_addresses}  # last written value, None = failed/never
+        self._last_t = {addr: -math.inf for addr in gauge_addresses}
+        self.written = 0
+        self.held = 0
+
+    def reset(self):
+        """Force every gauge to be written on its next value (e.g. after a gap)."""
+        for addr in self._last_t:
+            self._last_t[addr] = -math.inf
+
+    def changed(self, addr: int, value, now: float) -> bool:
+        """
+        True if `value` (None = no valid sample) must be written at monotonic
+        time `now`; the caller then writes it and this becomes the reference.
+        """
+        last = self._last[addr]
+        if (now - self._last_t[addr] >= self.heartbeat
+                or (value is None) != (last is None)
+                or (value is not None and abs(value - last) > self.thresholds[addr])):
+            self._last[addr] = value
+            self._last_t[addr] = now
+            self.written += 1
+            return True
+        self.held += 1
+        return False
+
+# ------------------ Reconstruction ------------------
+
+def reconstruct(path, step: float, t0=None, t1=None, gauges=None):
+    """
+    Expand a (deadband) measurement CSV onto a regular time grid.
+
+    Every grid point gets the last value written at or before it, which is the
+    value the recording represented at that time (within the deadband). Failed
+    reads ("error", "gap") stay NaN until the next written value. step is the
+    grid spacing in seconds, normally the acquisition interval (1 / frequency):
+    the file itself cannot tell, since suppressed rows leave no trace.
+    Returns (names, grid, values): grid in epoch seconds, values (len(grid), gauges).
+    """
+    import numpy as np
+
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        names = gauge_columns(header)
+        if gauges is not None:
+            missing = [g for g in gauges if g not in names]
+            if missing:
+                raise ValueError(f"Unknown gauge column(s): {missing}")
+            names = list(gauges)
+        columns = [header.index(name) for name in names]
+
+        times = []
+        cells = []
+        for record in reader:
+            if not record:
+                continue
+            try:
+                times.append(parse_time(record[0]))
+            except ValueError:
+                continue
+            cells.append([record[c] if c < len(record) else HOLD for c in columns])
+
+    times = np.array(times, dtype=float)
+    if not len(times):
+        return names, np.zeros(0), np.full((0, len(names)), np.nan)
+    # Sessions end a deadband recording with a row of held cells, so the last row is the end of the run
+    start = times[0] if t0 is None else parse_time(t0)
+    end = times[-1] if t1 is None else parse_time(t1)
+    grid = np.arange(start, end + step / 2, step)
+
+    values = np.full((len(grid), len(names)), np.nan)
+    for j in range(len(names)):
+        written_t = []
+        written_v = []
+        for t, row in zip(times, cells):
+            cell = row[j]
+            if cell == HOLD:
+                continue
+            try:
+                v = float(cell)
+            except ValueError:
+                v = math.nan  # "error" / "gap"
+            written_t.append(t)
+            written_v.append(v)
+        if not written_t:
+            continue
+        written_v = np.array(written_v)
+        idx = np.searchsorted(np.array(written_t), grid, side="right") - 1
+        ok = idx >= 0
+        values[ok, j] = written_v[idx[ok]]
+    return names, grid, values
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+
+# ------------------ Key File Parser ------------------
+#
+# IBR_DDK.USD (driver data) and .ddk setup files are lines of  key:"value"
+# with ';' comments. In the .USD, interface type T owns keys T*100 + field:
+#   T00 name        T01 baud rate    T02 parity (N/E/O)   T03 data bits
+#   T04 stop bits   T06 terminator   T07 timing (ms, see below)  T09 channels
+#   T10 request command (comma separated byte codes)
+#   T12 channel select command       T14 response length (characters; a maximum
+#                                    for terminator-delimited types such as OPTO)
+# Multi-channel types repeat the per-channel block (T10..T19) at T20, T30, ...
+#
+# T07 is parsed but not part of the read time. It is 400 ms for the C100 and
+# B100 types, more than the whole 0.13 s round of six gauges measured on the
+# bench, so it cannot be a per-read cost; it reads as a driver timeout or
+# polling period and only matters for reads that fail.
+
+_LINE = re.compile(r'^\s*(\d+)\s*:\s*"([^"]*)"')
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ibr_cache")
+
+
+def parse_keyfile(path) -> dict[int, str]:
+    """Parse a key:"value" file into {key: value}; comments and other lines are skipped."""
+    keys = {}
+    with open(path, "r", encoding="latin-1") as f:
+        for line in f:
+            m = _LINE.match(line)
+            if m:
+                keys[int(m.group(1))] = m.group(2)
+    return keys
+
+
+def load_keyfile(path, cache_dir=CACHE_DIR) -> dict[int, str]:
+    """
+    parse_keyfile() with an on-disk cache keyed by the file's path, size and
+    mtime, so repeated startups skip parsing. cache_dir=None disables the cache.
+    """
+    if cache_dir is None:
+        return parse_keyfile(path)
+    import hashlib
+
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    cache_path = os.path.join(cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".json")
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached["path"] == path and cached["stamp"] == stamp:
+            return {int(k): v for k, v in cached["keys"].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+    keys = parse_keyfile(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"path": path, "stamp": stamp, "keys": keys}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # read-only home: still works, just uncached
+    return keys
+
+# ------------------ Interface Types ------------------
+
+def _byte_count(command: str) -> int:
+    return len([b for b in command.split(",") if b.strip()]) if command and command != "0" else 0
+
+
+class InterfaceType:
+    """Serial parameters of one interface type from the driver data."""
+
+    def __init__(self, number: int, keys: dict[int, str]):
+        base = number * 100
+        self.number = number
+        self.name = keys[base]
+        self.baud = int(keys.get(base + 1, "4800"))
+        self.parity = keys.get(base + 2, "N").upper()
+        self.data_bits = int(keys.get(base + 3, "8"))
+        self.stop_bits = int(keys.get(base + 4, "1"))
+        self.timing_ms = int(keys.get(base + 7, "0"))  # T07, not in read_time (see the key file notes)
+        self.channels = int(keys.get(base + 9, "1"))
+        self.request_chars = _byte_count(keys.get(base + 10, ""))
+        self.select_chars = _byte_count(keys.get(base + 12, ""))
+        self.response_chars = int(keys.get(base + 14, "0")) + (1 if keys.get(base + 6, "0") != "0" else 0)
+
+    @property
+    def char_time(self) -> float:
+        """Seconds on the wire per character: start bit + data + parity + stop bits."""
+        bits = 1 + self.data_bits + (0 if self.parity == "N" else 1) + self.stop_bits
+        return bits / self.baud
+
+    @property
+    def read_time(self) -> float:
+        """
+        Theoretical minimum seconds per read: request (+ channel select) and response
+        frames on the wire. Bus turnaround and DLL overhead come on top; for types
+        whose T14 is a maximum length this is an upper bound instead.
+        """
+        chars = self.request_chars + self.response_chars
+        if self.channels > 1:
+            chars += self.select_chars
+        return chars * self.char_time
+
+    def __repr__(self):
+        return (f"InterfaceType({self.number}, {self.name!r}, {self.baud} {self.data_bits}{self.parity}{self.stop_bits}, "
+                f"{self.read_time * 1e3:.1f} ms/read)")
+
+
+def interface_types(keys: dict[int, str]) -> dict[str, InterfaceType]:
+    """All interface types in parsed driver data, by name."""
+    types = {}
+    for key in sorted(keys):
+        if key % 100 == 0 and key >= 100:
+            itype = InterfaceType(key // 100, keys)
+            types[itype.name] = itype
+    return types
+
+# ------------------ Timing Model ------------------
+
+class ReadTimingModel:
+    """
+    Theoretical read timing for a set of gauges, each on a named interface type.
+
+    gauge_interfaces: one interface name for all gauges or {address: name}.
+    measured_read_time: seconds one read is known to take at most, e.g. the
+    empirical 0.13 s round of six gauges / 6. The wire model for the C100 gives
+    34.4 ms/read, 206 ms for six gauges, above the measured 0.13 s, so
+    round_time is capped at the measurement (scaled to the number of gauges)
+    instead of rejecting rates that work.
+    """
+
+    def __init__(self, types: dict[str, InterfaceType], gauge_addresses, gauge_interfaces,
+                 measured_read_time=None):
+        if isinstance(gauge_interfaces, str):
+            gauge_interfaces = {addr: gauge_interfaces for addr in gauge_addresses}
+        unknown = sorted({name for name in gauge_interfaces.values() if name not in types})
+        if unknown:
+            raise ValueError(f"Unknown interface type(s) {unknown}. Known: {sorted(types)}")
+        missing = [addr for addr in gauge_addresses if addr not in gauge_interfaces]
+        if missing:
+            raise ValueError(f"No interface type configured for gauge(s) {missing}")
+        self.gauge_addresses = list(gauge_addresses)
+        self.interfaces = {addr: types[gauge_interfaces[addr]] for addr in self.gauge_addresses}
+        self.measured_read_time = measured_read_time
+
+    @classmethod
+    def from_files(cls, usd_path, gauge_addresses, gauge_interfaces, cache_dir=CACHE_DIR, measured_read_time=None):
+        return cls(interface_types(load_keyfile(usd_path, cache_dir)), gauge_addresses, gauge_interfaces,
+                   measured_read_time=measured_read_time)
+
+    def read_time(self, addr: int) -> float:
+        return self.interfaces[addr].read_time
+
+    @property
+    def mean_read_time(self) -> float:
+        return self.round_time / len(self.gauge_addresses)
+
+    @property
+    def model_round_time(self) -> float:
+        """One read of every gauge, from the driver data alone."""
+        return sum(self.read_time(addr) for addr in self.gauge_addresses)
+
+    @property
+    def measured_round_time(self):
+        """One read of every gauge at the measured read time, None without a measurement."""
+        if self.measured_read_time is None:
+            return None
+        return self.measured_read_time * len(self.gauge_addresses)
+
+    @property
+    def overestimates(self) -> bool:
+        """The driver-data model is slower than the measured round time."""
+        measured = self.measured_round_time
+        return measured is not None and self.model_round_time > measured
+
+    @property
+    def round_time(self) -> float:
+        """One read of every gauge: the model, capped at the measured round time."""
+        if self.overestimates:
+            return self.measured_round_time
+        return self.model_round_time
+
+    def burst_time(self, oversample_count: int) -> float:
+        return self.round_time * oversample_count
+
+    def max_frequency(self, oversample_count: int = 1, budget: float = 1.0) -> float:
+        return budget / self.burst_time(oversample_count)
+
+    def validate(self, frequency_hz: float, oversample_count: int = 1, budget: float = 1.0):
+        """Raise ValueError if `oversample_count` rounds cannot fit in `budget` of one interval."""
+        needed = self.burst_time(oversample_count)
+        available = budget / frequency_hz
+        if needed > available:
+            raise ValueError(
+                f"{len(self.gauge_addresses)} gauge(s) x {oversample_count} oversample(s) need at least "
+                f"{needed * 1e3:.1f} ms per tick, but {frequency_hz:g} Hz leaves {available * 1e3:.1f} ms "
+                f"(max {self.max_frequency(oversample_count, budget):.3g} Hz)."
+            )
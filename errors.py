@@ -0,0 +1,96 @@
+import time
+import logging
+
+OUT_OF_RANGE = 136
+
+# ------------------ Error Accounting ------------------
+
+class ErrorAccounting:
+    """
+    Counts failed reads per gauge and status in memory instead of logging each one.
+
+    - record() is the hot-path call: two dict updates, no I/O.
+    - end_tick() closes a tick: returns that tick's failure count per gauge
+      (for compact CSV columns) and logs state transitions, e.g. a gauge
+      entering or leaving out-of-range, once each with a timestamp.
+    - A summary of all failures in the window is logged every `window` seconds
+      and once more by flush().
+    """
+
+    def __init__(self, gauge_addresses, gauge_descriptions=None, window: float = 60.0, logger=logging):
+        self.gauge_addresses = list(gauge_addresses)
+        self.gauge_descriptions = gauge_descriptions or {}
+        self.window = window
+        self.log = logger
+
+        self._tick = {addr: 0 for addr in self.gauge_addresses}
+        self._tick_status = {}  # addr -> last failing status this tick
+        self._window_counts = {}  # (addr, status) -> count since last summary
+        self.totals = {}  # (addr, status) -> count for the whole session
+        self.state = {addr: None for addr in self.gauge_addresses}  # None = OK, else failing status
+        self.transitions = []  # (wall time, addr, old state, new state)
+        self._window_start = time.monotonic()
+
+    def record(self, addr: int, status: int):
+        self._tick[addr] += 1
+        self._tick_status[addr] = status
+        key = (addr, status)
+        self._window_counts[key] = self._window_counts.get(key, 0) + 1
+
+    def _name(self, addr):
+        desc = self.gauge_descriptions.get(addr)
+        return f"Gauge #{addr} ({desc})" if desc else f"Gauge #{addr}"
+
+    @staticmethod
+    def _state_text(status):
+        if status is None:
+            return "OK"
+        if status == OUT_OF_RANGE:
+            return "out of range"
+        return f"error {status}"
+
+    def end_tick(self, valid_counts) -> list[int]:
+        """
+        valid_counts: {addr: valid samples this tick}. A gauge is failing for the
+        tick when it produced no valid sample. Returns per-gauge failure counts
+        in gauge order and resets the tick counters. Gauges missing from
+        valid_counts (not due in a multi-rate tick) keep their state and keep
+        counting into their next tick.
+        """
+        counts = []
+        for addr in self.gauge_addresses:
+            failed = self._tick[addr]
+            counts.append(failed)
+            if addr not in valid_counts:
+                continue
+            new = self._tick_status.get(addr) if failed and not valid_counts.get(addr) else None
+            old = self.state[addr]
+            if new != old:
+                self.state[addr] = new
+                self.transitions.append((time.time(), addr, old, new))
+                if new is None:
+                    self.log.info(f"{self._name(addr)} left {self._state_text(old)}")
+                elif new == OUT_OF_RANGE:
+                    self.log.warning(f"{self._name(addr)} entered out of range")
+                else:
+                    self.log.error(f"{self._name(addr)} entered {self._state_text(new)}")
+            self._tick[addr] = 0
+            self._tick_status.pop(addr, None)
+
+        if time.monotonic() - self._window_start >= self.window:
+            self.flush()
+        return counts
+
+    def flush(self):
+        """Log and reset the current window's summary (no-op if nothing failed)."""
+        elapsed = time.monotonic() - self._window_start
+        self._window_start = time.monotonic()
+        if not self._window_counts:
+            return
+        parts = []
+        for (addr, status), n in sorted(self._window_counts.items()):
+            parts.append(f"#{addr} {self._state_text(status)} x{n}")
+            key = (addr, status)
+            self.totals[key] = self.totals.get(key, 0) + n
+        self._window_counts.clear()
+        self.log.warning(f"Read failures in last {elapsed:.0f} s: " + ", ".join(parts))
@@ -1,124 +1,103 @@
+"""
+ctypes wrapper for the IBR DDK (ibr_ddk.dll).
+
+Importing this module loads nothing: the DLL is loaded and its prototypes
+declared on the first call that needs it (init_device, get_value, ...), and the
+Win32 message-window bindings (win32msg) only inside init_device. Constructing
+an IbrDll is therefore cheap and works on any platform, e.g. for tools that
+only read configuration; see backends.py for choosing a backend at runtime.
+"""
 import os
+import sys
 import time
 import ctypes
 import threading
-import traceback
-from ctypes import c_short, c_double, c_char_p, POINTER, byref
-from ctypes import wintypes
-
-# CALLBACK == __stdcall
-DDK_FctPtr = ctypes.WINFUNCTYPE(
-    None,              # void
-    c_short,           # devicenr
-    c_short,           # address
-    c_short,           # type
-    wintypes.DWORD,    # unsigned long intval
-    c_double,          # double floatval
-)
-
-# ---- define missing Win32 types (some Python builds omit these in wintypes) ----
-# LRESULT is a LONG_PTR (signed pointer-sized integer)
-if ctypes.sizeof(ctypes.c_void_p) == 8:
-    LRESULT = ctypes.c_longlong
-else:
-    LRESULT = ctypes.c_long
-
-# Win32 DLLs (needed for the hidden message window + pump)
-user32 = ctypes.WinDLL("user32", use_last_error=True)
-kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
-
-PM_REMOVE = 0x0001
-ERROR_CLASS_ALREADY_EXISTS = 1410
-
-
-WNDPROCTYPE = ctypes.WINFUNCTYPE(
-    LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM
-)
-
-class WNDCLASSEXW(ctypes.Structure):
-    _fields_ = [
-        ("cbSize", wintypes.UINT),
-        ("style", wintypes.UINT),
-        ("lpfnWndProc", WNDPROCTYPE),
-        ("cbClsExtra", ctypes.c_int),
-        ("cbWndExtra", ctypes.c_int),
-        ("hInstance", wintypes.HINSTANCE),
-        ("hIcon", wintypes.HICON),
-        ("hCursor", wintypes.HCURSOR),
-        ("hbrBackground", wintypes.HBRUSH),
-        ("lpszMenuName", wintypes.LPCWSTR),
-        ("lpszClassName", wintypes.LPCWSTR),
-        ("hIconSm", wintypes.HICON),
-    ]
-
-class POINT(ctypes.Structure):
-    _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
-
-class MSG(ctypes.Structure):
-    _fields_ = [
-        ("hwnd", wintypes.HWND),
-        ("message", wintypes.UINT),
-        ("wParam", wintypes.WPARAM),
-        ("lParam", wintypes.LPARAM),
-        ("time", wintypes.DWORD),
-        ("pt", POINT),
-    ]
-
-# Prototypes used by the pump
-user32.RegisterClassExW.argtypes = [ctypes.POINTER(WNDCLASSEXW)]
-user32.RegisterClassExW.restype  = wintypes.ATOM
-
-user32.CreateWindowExW.argtypes = [
-    wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
-    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
-    wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID
-]
-user32.CreateWindowExW.restype = wintypes.HWND
-
-user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
-user32.DefWindowProcW.restype  = LRESULT
-
-user32.PeekMessageW.argtypes   = [ctypes.POINTER(MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT, wintypes.UINT]
-user32.PeekMessageW.restype    = wintypes.BOOL
-
-user32.TranslateMessage.argtypes = [ctypes.POINTER(MSG)]
-user32.TranslateMessage.restype  = wintypes.BOOL
-
-user32.DispatchMessageW.argtypes  = [ctypes.POINTER(MSG)]
-user32.DispatchMessageW.restype   = LRESULT
-
-kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
-kernel32.GetModuleHandleW.restype  = wintypes.HINSTANCE
+from array import array
+from ctypes import c_short, c_double, c_char_p, c_void_p, c_uint32, POINTER, byref
+
+from tracing import span
+
+# Export names tried for registering a DDK_FctPtr (first match wins). Only the
+# callback type is known; these names are unverified guesses, not checked
+# against the DDK header or the DLL's export table. Pass the real name as
+# IbrDll(callback_exports=...), e.g. through BACKEND_OPTIONS in main3.
+CALLBACK_EXPORTS = ("Device_SetCallback", "Device_SetCallBack")
+
+_ddk_fctptr = None
+
+
+def ddk_callback_type():
+    """DDK_FctPtr: void CALLBACK (*)(short devicenr, short address, short type, DWORD intval, double floatval)."""
+    global _ddk_fctptr
+    if _ddk_fctptr is None:
+        # CALLBACK == __stdcall on Windows; cdecl elsewhere (stub DLLs in tests and benchmarks)
+        functype = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)
+        _ddk_fctptr = functype(None, c_short, c_short, c_short, c_uint32, c_double)
+    return _ddk_fctptr
 
 
 class IbrDll:
-    def __init__(self, dll_path: str):
+    def __init__(self, dll_path: str, dll=None, callback_exports=CALLBACK_EXPORTS):
+        """
+        dll: an already loaded library (or a stub exposing the same exports);
+             when given, dll_path is not loaded.
+        callback_exports: export names tried for registering the push callback.
+        The library itself is loaded on first use, not here.
+        """
         self.initialized = False
+        self.callback_exports = tuple(callback_exports)
 
         dll_path = os.path.abspath(dll_path)
         self._dll_path = dll_path
         self._dll_dir = os.path.dirname(dll_path)
+        self.dll = dll
+        self._bound = False
 
-        # Ensure the DLL + its dependencies are discoverable
-        if hasattr(os, "add_dll_directory"):
-            os.add_dll_directory(self._dll_dir)
-        os.environ["PATH"] = self._dll_dir + os.pathsep + os.environ.get("PATH", "")
-
-        # IMPORTANT: __stdcall DLL => WinDLL
-        self.dll = ctypes.WinDLL(dll_path, use_last_error=True)
+        # Bound by _load(); Device_PreInit / Device_SetCallback stay None if not exported
+        self.Device_Init = self.Device_PreInit = self.Device_GetVersion = None
+        self.Device_Value = self.Device_DeInit = self.Device_SetCallback = None
 
-        # Prototypes per the .h
+        # Keep wndproc callable alive (avoid GC)
+        self._wndproc_ref = None
+        # Keep DDK_FctPtr callable alive while the DLL may call it
+        self._callback_ref = None
+
+        # Reused by get_values(), per calling thread (an abandoned watchdog I/O thread
+        # may still be inside a burst): one output double and one c_short per address/device
+        self._scratch = threading.local()
+
+        # metrics.Metrics to record per-gauge Device_Value latency, None = off
+        self.metrics = None
+        # tracing.Tracer for init phases and Device_Value spans, None = off
+        self.tracer = None
+
+    def _load(self):
+        """Load the DLL (unless one was passed in) and declare the export prototypes."""
+        if self._bound:
+            return
+        if self.dll is None:
+            # Ensure the DLL + its dependencies are discoverable
+            if hasattr(os, "add_dll_directory"):
+                os.add_dll_directory(self._dll_dir)
+            os.environ["PATH"] = self._dll_dir + os.pathsep + os.environ.get("PATH", "")
+
+            # IMPORTANT: __stdcall DLL => WinDLL
+            loader = getattr(ctypes, "WinDLL", None)
+            if loader is None:
+                raise OSError(f"Cannot load {self._dll_path}: the IBR DDK is a Windows DLL "
+                              f"(use the simulated or replay backend on {sys.platform})")
+            self.dll = loader(self._dll_path, use_last_error=True)
+
+        # Prototypes per the .h (HWND is pointer-sized)
         self.Device_Init = self.dll.Device_Init
         self.Device_Init.restype = c_short
-        self.Device_Init.argtypes = [c_short, c_char_p, wintypes.HWND, wintypes.HWND]
+        self.Device_Init.argtypes = [c_short, c_char_p, c_void_p, c_void_p]
 
         # Optional export (but your minimal.py checks it, so we do too)
         if hasattr(self.dll, "Device_PreInit"):
             self.Device_PreInit = self.dll.Device_PreInit
             self.Device_PreInit.restype = None
             self.Device_PreInit.argtypes = [c_short, c_short, c_short, c_short, c_short, c_short, c_short]
-        else:
-            self.Device_PreInit = None
 
         self.Device_GetVersion = self.dll.Device_GetVersion
         self.Device_GetVersion.restype = None
@@ -132,62 +111,22 @@ class IbrDll:
         self.Device_DeInit.restype = c_short
         self.Device_DeInit.argtypes = []
 
-        # Keep wndproc callable alive (avoid GC)
-        self._wndproc_ref = None
+        # Optional push interface: the registration export is not in every DLL build
+        for name in self.callback_exports:
+            if hasattr(self.dll, name):
+                self.Device_SetCallback = getattr(self.dll, name)
+                self.Device_SetCallback.restype = None
+                self.Device_SetCallback.argtypes = [ddk_callback_type()]
+                break
+        self._bound = True
 
     def get_version(self) -> tuple[int, int]:
+        self._load()
         major = c_short()
         minor = c_short()
         self.Device_GetVersion(byref(major), byref(minor))
         return major.value, minor.value
 
-    def _create_hidden_message_window(self) -> wintypes.HWND:
-        """
-        Create a hidden Win32 window on the *calling thread* so we can pump messages
-        while Device_Init runs on a worker thread (prevents DLL init deadlock).
-        """
-        class_name = f"IBR_DDK_PY_MSGWND_{os.getpid()}"
-
-        @WNDPROCTYPE
-        def wndproc(hwnd, msg, wparam, lparam):
-            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
-
-        self._wndproc_ref = wndproc  # keep alive
-
-        hinst = kernel32.GetModuleHandleW(None)
-
-        wc = WNDCLASSEXW()
-        wc.cbSize = ctypes.sizeof(WNDCLASSEXW)
-        wc.style = 0
-        wc.lpfnWndProc = wndproc
-        wc.cbClsExtra = 0
-        wc.cbWndExtra = 0
-        wc.hInstance = hinst
-        wc.hIcon = 0
-        wc.hCursor = 0
-        wc.hbrBackground = 0
-        wc.lpszMenuName = None
-        wc.lpszClassName = class_name
-        wc.hIconSm = 0
-
-        atom = user32.RegisterClassExW(ctypes.byref(wc))
-        if not atom:
-            err = ctypes.get_last_error()
-            # OK if class already exists in this process (unlikely with PID suffix, but safe)
-            if err != ERROR_CLASS_ALREADY_EXISTS:
-                raise OSError(f"RegisterClassExW failed: {err} / {ctypes.FormatError(err).strip()}")
-
-        hwnd = user32.CreateWindowExW(
-            0, class_name, "IBRHidden", 0,
-            0, 0, 0, 0,
-            0, 0, hinst, None
-        )
-        if not hwnd:
-            err = ctypes.get_last_error()
-            raise OSError(f"CreateWindowExW failed: {err} / {ctypes.FormatError(err).strip()}")
-
-        return hwnd
-
     def init_device(self, setup_filename: str, *, timeout_s: float = 30.0, imb_control: int = 1) -> int:
         """
         Initialize device without hanging:
@@ -200,6 +139,12 @@ class IbrDll:
           nonzero error code on failure,
           124 on timeout.
         """
+        self._load()
+        try:
+            import win32msg  # user32/kernel32 bindings
+        except (ImportError, AttributeError) as e:
+            raise OSError(f"init_device needs the Win32 message loop, not available on {sys.platform}") from e
+
         # Match IMB_Test.exe-ish environment: run from DLL folder during init
         prev_cwd = os.getcwd()
         try:
@@ -213,9 +158,10 @@ class IbrDll:
             if self.Device_PreInit is not None:
                 # signature: (InitTimes, ?, ?, IMB_Control, ?, ?, ?)
                 # minimal.py uses: (1,0,0, IMB_CONTROL,0,0,0)
-                self.Device_PreInit(c_short(1), c_short(0), c_short(0),
-                                    c_short(int(imb_control)),
-                                    c_short(0), c_short(0), c_short(0))
+                with span(self.tracer, "Device_PreInit"):
+                    self.Device_PreInit(c_short(1), c_short(0), c_short(0),
+                                        c_short(int(imb_control)),
+                                        c_short(0), c_short(0), c_short(0))
 
             language = c_short(1)
 
@@ -224,18 +170,21 @@ class IbrDll:
             setup_c = c_char_p(setup_bytes)
 
             # Hidden message window on this thread
-            hwnd = self._create_hidden_message_window()
-            parent = wintypes.HWND(hwnd)
-            wh = wintypes.HWND(hwnd)
+            with span(self.tracer, "create message window"):
+                hwnd = win32msg.create_hidden_message_window(self)
+            parent = win32msg.wintypes.HWND(hwnd)
+            wh = win32msg.wintypes.HWND(hwnd)
 
             done = threading.Event()
             result = {"rc": None, "exc": None}
 
             def init_thread():
                 try:
-                    rc = self.Device_Init(language, setup_c, parent, wh)
+                    with span(self.tracer, "Device_Init"):
+                        rc = self.Device_Init(language, setup_c, parent, wh)
                     result["rc"] = int(rc)
                 except Exception:
+                    import traceback
                     result["exc"] = traceback.format_exc()
                 finally:
                     done.set()
@@ -243,20 +192,19 @@ class IbrDll:
             t = threading.Thread(target=init_thread, daemon=True)
             t.start()
 
-            msg = MSG()
+            msg = win32msg.MSG()
             start = time.time()
 
             # Pump until init completes or times out
-            while not done.is_set():
-                while user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, PM_REMOVE):
-                    user32.TranslateMessage(ctypes.byref(msg))
-                    user32.DispatchMessageW(ctypes.byref(msg))
+            with span(self.tracer, "init message pump"):
+                while not done.is_set():
+                    win32msg.pump_messages(msg)
 
-                if timeout_s is not None and (time.time() - start) > float(timeout_s):
-                    # Timeout - avoid infinite hang
-                    return 124
+                    if timeout_s is not None and (time.time() - start) > float(timeout_s):
+                        # Timeout - avoid infinite hang
+                        return 124
 
-                time.sleep(0.01)
+                    time.sleep(0.01)
 
             if result["exc"]:
                 # Surface details via error code; caller can log/print if desired
@@ -278,10 +226,99 @@ class IbrDll:
                 pass
 
     def get_value(self, devicenr: int, address: int) -> tuple[int, float]:
+        if not self._bound:
+            self._load()
         val = c_double()
-        rc = int(self.Device_Value(c_short(devicenr), c_short(address), byref(val)))
+        if self.metrics is None and self.tracer is None:
+            rc = int(self.Device_Value(c_short(devicenr), c_short(address), byref(val)))
+        else:
+            t0 = time.perf_counter_ns()
+            rc = int(self.Device_Value(c_short(devicenr), c_short(address), byref(val)))
+            t1 = time.perf_counter_ns()
+            if self.metrics is not None:
+                self.metrics.observe_read(address, t1 - t0)
+            if self.tracer is not None:
+                self.tracer.add(self.tracer.name_id("Device_Value"), t0, t1)
         return rc, float(val.value)
 
+    def register_callback(self, fn) -> None:
+        """
+        Register a Python callable fn(devicenr, address, type, intval, floatval)
+        to receive pushed values; None unregisters.
+        Raises OSError if the DLL has no callback registration export.
+        """
+        self._load()
+        if self.Device_SetCallback is None:
+            raise OSError(f"DLL exports none of {self.callback_exports}; push mode unavailable")
+        if fn is None:
+            self.Device_SetCallback(ddk_callback_type()())
+            self._callback_ref = None
+            return
+        cfn = ddk_callback_type()(fn)
+        self._callback_ref = cfn  # keep alive
+        self.Device_SetCallback(cfn)
+
+    def get_values(self, devicenr: int, addresses, out=None, cancel=None):
+        """
+        Read every address in `addresses` (repeat addresses to oversample) in one call.
+
+        out: optional (values, statuses) or (values, statuses, times) tuple of writable
+             sequences with room for len(addresses) items, e.g. array('d')/array('h')/
+             array('q') or NumPy arrays. Allocated when None; pass the same tuple every
+             tick to avoid allocation. With `times`, each read is stamped with the
+             perf_counter_ns midpoint of its Device_Value call.
+        cancel: optional threading.Event checked before every read; once set, the burst
+                stops and the rest of out is left as it was.
+        Returns out; values[i] is only meaningful where statuses[i] == 0.
+        """
+        if not self._bound:
+            self._load()
+        n = len(addresses)
+        if out is None:
+            out = (array("d", bytes(8 * n)), array("h", bytes(2 * n)))
+        values, statuses = out[0], out[1]
+        times = out[2] if len(out) > 2 else None
+
+        fn = self.Device_Value
+        scratch = self._scratch
+        shorts = getattr(scratch, "shorts", None)
+        if shorts is None:
+            scratch.val = c_double()
+            scratch.ptr = ctypes.pointer(scratch.val)
+            shorts = scratch.shorts = {}
+        val = scratch.val
+        ptr = scratch.ptr
+        dev = shorts.get(devicenr)
+        if dev is None:
+            dev = shorts[devicenr] = c_short(devicenr)
+        metrics = self.metrics
+        tracer = self.tracer
+        span_id = tracer.name_id("Device_Value") if tracer is not None else 0
+        untimed = metrics is None and times is None and tracer is None
+        clock = time.perf_counter_ns
+        i = 0
+        for addr in addresses:
+            if cancel is not None and cancel.is_set():
+                break
+            arg = shorts.get(addr)
+            if arg is None:
+                arg = shorts[addr] = c_short(addr)
+            if untimed:
+                statuses[i] = fn(dev, arg, ptr)
+            else:
+                t0 = clock()
+                statuses[i] = fn(dev, arg, ptr)
+                t1 = clock()
+                if times is not None:
+                    times[i] = (t0 + t1) >> 1
+                if metrics is not None:
+                    metrics.observe_read(addr, t1 - t0)
+                if tracer is not None:
+                    tracer.add(span_id, t0, t1)
+            values[i] = val.value
+            i += 1
+        return out
+
     def deinit_device(self) -> int:
         if not self.initialized:
             return -1
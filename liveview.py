@@ -0,0 +1,341 @@
+"""
+Live view of a running MeasurementSession in the terminal or a local browser.
+
+The session listener only appends (t_ns, values) to a bounded deque, so the
+acquisition thread never waits for drawing. A render thread drains it into a
+per-gauge min/max envelope pyramid: LEVELS levels of fixed-size rings whose
+bucket width grows by FACTOR per level, so memory is fixed however long the
+run, and any window from seconds to days is drawn from the finest level that
+still covers it. Frames are throttled to `fps`; buckets are read from the
+rings with NumPy slices, the terminal chart merges them to its width, and the
+web chart thins each series with LTTB (largest triangle three buckets) to the
+canvas width.
+
+    view = LiveView(names, session.measurement_interval, renderer="terminal")
+    session.listeners.append(view.on_sample)
+    view.start()
+"""
+import sys
+import json
+import time
+import shutil
+import threading
+from array import array
+from collections import deque
+
+LEVELS = 6
+FACTOR = 4  # bucket width ratio between neighbouring levels
+CAPACITY = 2048  # buckets kept per level
+INBOX_SIZE = 1 << 16  # samples buffered between frames; the oldest are dropped if rendering stalls
+
+# ------------------ Envelope Pyramid ------------------
+
+class _Level:
+    __slots__ = ("width_ns", "starts", "lo", "hi", "sum", "n", "head", "size",
+                 "cur_start", "cur_lo", "cur_hi", "cur_sum", "cur_n")
+
+    def __init__(self, width_ns: int, capacity: int):
+        self.width_ns = width_ns
+        self.starts = array("q", bytes(8 * capacity))
+        self.lo = array("d", bytes(8 * capacity))
+        self.hi = array("d", bytes(8 * capacity))
+        self.sum = array("d", bytes(8 * capacity))
+        self.n = array("q", bytes(8 * capacity))
+        self.head = 0  # next slot
+        self.size = 0
+        self.cur_start = None
+
+    def add(self, t_ns: int, value: float):
+        start = t_ns - t_ns % self.width_ns
+        if start != self.cur_start:
+            if self.cur_start is not None:
+                self._close()
+            self.cur_start = start
+            self.cur_lo = self.cur_hi = self.cur_sum = value
+            self.cur_n = 1
+            return
+        if value < self.cur_lo:
+            self.cur_lo = value
+        elif value > self.cur_hi:
+            self.cur_hi = value
+        self.cur_sum += value
+        self.cur_n += 1
+
+    def _close(self):
+        i = self.head
+        self.starts[i] = self.cur_start
+        self.lo[i] = self.cur_lo
+        self.hi[i] = self.cur_hi
+        self.sum[i] = self.cur_sum
+        self.n[i] = self.cur_n
+        capacity = len(self.starts)
+        self.head = (i + 1) % capacity
+        self.size = min(self.size + 1, capacity)
+
+    @property
+    def span_ns(self) -> int:
+        return self.width_ns * len(self.starts)
+
+    def buckets(self, since_ns: int):
+        """(starts ns, min, max, mean) NumPy arrays of every bucket starting at or after since_ns, oldest first."""
+        import numpy as np
+
+        capacity = len(self.starts)
+        ring = (np.arange(self.size) + (self.head - self.size)) % capacity
+        starts = np.frombuffer(self.starts, dtype=np.int64)[ring]
+        lo = np.frombuffer(self.lo)[ring]
+        hi = np.frombuffer(self.hi)[ring]
+        mean = np.frombuffer(self.sum)[ring] / np.frombuffer(self.n, dtype=np.int64)[ring]
+        if self.cur_start is not None:
+            # The open bucket is in the cur_* fields, not in the ring yet
+            starts = np.append(starts, self.cur_start)
+            lo = np.append(lo, self.cur_lo)
+            hi = np.append(hi, self.cur_hi)
+            mean = np.append(mean, self.cur_sum / self.cur_n)
+        keep = np.searchsorted(starts, since_ns)  # starts ascend
+        return starts[keep:], lo[keep:], hi[keep:], mean[keep:]
+
+
+class Envelope:
+    """Min/max/mean buckets of one gauge at LEVELS resolutions; fixed memory."""
+
+    def __init__(self, base_interval: float, levels: int = LEVELS, factor: int = FACTOR, capacity: int = CAPACITY):
+        base_ns = max(int(base_interval * 1e9), 1)
+        self.levels = [_Level(base_ns * factor ** k, capacity) for k in range(levels)]
+
+    def add(self, t_ns: int, value: float):
+        for level in self.levels:
+            level.add(t_ns, value)
+
+    def window(self, now_ns: int, seconds: float):
+        """Buckets (see _Level.buckets) of the finest level whose ring still covers the last `seconds`."""
+        span_ns = int(seconds * 1e9)
+        for level in self.levels:
+            if level.span_ns >= span_ns:
+                break
+        return level.buckets(now_ns - span_ns)
+
+
+def lttb(points, n: int):
+    """Largest-triangle-three-buckets: n of the (x, y) points that keep the visual shape."""
+    if n >= len(points) or n < 3:
+        return list(points)
+    out = [points[0]]
+    every = (len(points) - 2) / (n - 2)
+    a = 0
+    for i in range(n - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt = points[hi:min(int((i + 2) * every) + 1, len(points))] or [points[-1]]
+        cx = sum(p[0] for p in nxt) / len(nxt)
+        cy = sum(p[1] for p in nxt) / len(nxt)
+        ax, ay = points[a]
+        best = lo
+        best_area = -1.0
+        for j in range(lo, hi):
+            x, y = points[j]
+            area = abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        out.append(points[best])
+        a = best
+    out.append(points[-1])
+    return out
+
+# ------------------ Live View ------------------
+
+class LiveView:
+    """
+    Subscribes to session samples (on_sample as a listener) and renders them.
+
+    renderer: "terminal" (redrawn text chart) or "web" (http://127.0.0.1:port).
+    window: seconds shown; the web page can change it per request.
+    """
+
+    def __init__(self, names, base_interval: float, renderer: str = "terminal", fps: float = 2.0,
+                 window: float = 600.0, port: int = 8765, stream=None):
+        if renderer not in ("terminal", "web"):
+            raise ValueError(f"Unknown live view renderer '{renderer}'. Valid: terminal, web")
+        self.names = list(names)
+        self.renderer = renderer
+        self.period = 1.0 / fps
+        self.window = window
+        self.stream = stream or sys.stdout
+        self.envelopes = [Envelope(base_interval) for _ in self.names]
+        self.latest = [None] * len(self.names)
+        self.samples = 0
+        self._inbox = deque(maxlen=INBOX_SIZE)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="LiveView", daemon=True)
+        self._server = None
+        if renderer == "web":
+            from http.server import ThreadingHTTPServer  # web renderer only
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+            self.port = self._server.server_address[1]
+
+    def on_sample(self, t_ns, values):
+        # Session listener, runs on the acquisition thread: one deque append, no lock
+        self._inbox.append((t_ns, values))
+
+    def start(self):
+        self._thread.start()
+        if self._server is not None:
+            threading.Thread(target=self._server.serve_forever, name="LiveViewHttp", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _drain(self):
+        inbox = self._inbox
+        envelopes = self.envelopes
+        latest = self.latest
+        with self._lock:
+            while inbox:
+                t_ns, values = inbox.popleft()
+                for i, value in enumerate(values):
+                    if value is not None:
+                        envelopes[i].add(t_ns, value)
+                        latest[i] = value
+                self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            self._drain()
+            if self.renderer == "terminal":
+                self.stream.write(self.render_text())
+                self.stream.flush()
+
+    def bands(self, window: float, width: int, now_ns=None):
+        """
+        Per gauge: (name, latest, t, lo, hi, buckets) with at most `width` min/max
+        points, t in seconds before now; neighbouring buckets are merged keeping
+        their extremes. buckets is the unmerged window for callers that need it.
+        """
+        import numpy as np
+
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        out = []
+        with self._lock:
+            for name, env, latest in zip(self.names, self.envelopes, self.latest):
+                buckets = env.window(now_ns, window)
+                starts, lo, hi, _ = buckets
+                if len(starts) > width:
+                    bounds = (np.arange(width) * (len(starts) / width)).astype(np.int64)
+                    starts = starts[bounds]
+                    lo = np.minimum.reduceat(lo, bounds)
+                    hi = np.maximum.reduceat(hi, bounds)
+                out.append((name, latest, (starts - now_ns) / 1e9, lo, hi, buckets))
+        return out
+
+    def series(self, window: float, width: int, now_ns=None):
+        """Per gauge: {"name", "latest", "band_t", "lo", "hi", "t" (s before now), "mean"}, at most `width` points."""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        out = []
+        for name, latest, band_t, lo, hi, (starts, _, _, mean) in self.bands(window, width, now_ns):
+            line = lttb(list(zip(((starts - now_ns) / 1e9).tolist(), mean.tolist())), width)
+            out.append({"name": name, "latest": latest, "band_t": band_t.tolist(), "lo": lo.tolist(),
+                        "hi": hi.tolist(), "t": [p[0] for p in line], "mean": [p[1] for p in line]})
+        return out
+
+    def render_text(self, height: int = 5, now_ns=None) -> str:
+        """One frame for the terminal: a min/max band chart per gauge over the window."""
+        import numpy as np
+
+        size = shutil.get_terminal_size((100, 30))
+        width = max(size.columns - 28, 10)
+        height = max(1, min(height, (size.lines - 2) // max(len(self.names), 1) - 2))
+        lines = ["\x1b[H\x1b[2J" + f"Live view: last {self.window:g} s, {self.samples} samples"]
+        for name, latest, _, lo, hi, _ in self.bands(self.window, width, now_ns):
+            lines.append(f"{name}: " + ("no data" if latest is None else f"{latest:.6f}"))
+            if not len(lo):
+                continue
+            bottom, top = float(lo.min()), float(hi.max())
+            scale = (top - bottom) or 1.0
+            # Row k covers [r_lo[k], r_hi[k]] of the value range, top row first
+            r_hi = top - scale * np.arange(height)[:, None] / height
+            r_lo = top - scale * np.arange(1, height + 1)[:, None] / height
+            cells = np.where((lo <= r_hi) & (hi >= r_lo), ord("#"), ord(" ")).astype(np.uint8)
+            for row in range(height):
+                label = f"{top - scale * row / height:>14.6f} |" if row == 0 else (
+                    f"{bottom:>14.6f} |" if row == height - 1 else f"{'':>14} |")
+                lines.append(label + cells[row].tobytes().decode("ascii"))
+        return "\n".join(lines) + "\n"
+
+
+def _handler(view):
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/":
+                body = _PAGE.replace("{period_ms}", str(int(view.period * 1e3))).replace(
+                    "{window}", f"{view.window:g}").encode("utf-8")
+                ctype = "text/html; charset=utf-8"
+            elif url.path == "/data.json":
+                query = parse_qs(url.query)
+                window = float(query.get("window", [view.window])[0])
+                width = max(3, min(int(query.get("width", ["800"])[0]), 4000))
+                body = json.dumps({"samples": view.samples, "gauges": view.series(window, width)}).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep page refreshes out of the measurement log
+
+    return Handler
+
+
+_PAGE = """<!doctype html>
+<html><head><title>IBR live view</title>
+<style>body{font:14px sans-serif;margin:1em}canvas{display:block;margin-bottom:.5em;border:1px solid #ccc}</style>
+</head><body>
+<label>Window (s) <input id="window" type="number" value="{window}" min="1"></label> <span id="info"></span>
+<div id="charts"></div>
+<script>
+const charts = document.getElementById("charts");
+async function frame() {
+  const width = Math.max(300, window.innerWidth - 40);
+  const win = document.getElementById("window").value;
+  try {
+    const r = await fetch(`/data.json?window=${win}&width=${width}`);
+    const data = await r.json();
+    document.getElementById("info").textContent = `${data.samples} samples`;
+    data.gauges.forEach((g, i) => draw(g, i, width, +win));
+  } catch (e) {}
+  setTimeout(frame, {period_ms});
+}
+function draw(g, i, width, win) {
+  let c = charts.children[i];
+  if (!c) { c = document.createElement("canvas"); charts.appendChild(c); }
+  c.width = width; c.height = 160;
+  const ctx = c.getContext("2d");
+  const lo = Math.min(...g.lo), hi = Math.max(...g.hi), span = (hi - lo) || 1;
+  const x = t => (t + win) / win * width, y = v => 150 - (v - lo) / span * 130;
+  ctx.fillStyle = "#cde";
+  g.band_t.forEach((t, k) => ctx.fillRect(x(t), y(g.hi[k]), 1.5, Math.max(1, y(g.lo[k]) - y(g.hi[k]))));
+  ctx.beginPath();
+  g.t.forEach((t, k) => k ? ctx.lineTo(x(t), y(g.mean[k])) : ctx.moveTo(x(t), y(g.mean[k])));
+  ctx.strokeStyle = "#036"; ctx.stroke();
+  ctx.fillStyle = "#000";
+  ctx.fillText(`${g.name}: ${g.latest === null ? "no data" : g.latest.toFixed(6)}  [${lo.toFixed(6)} .. ${hi.toFixed(6)}]`, 4, 12);
+}
+frame();
+</script></body></html>
+"""
@@ -1,6 +1,9 @@
 import sys
 import time
 from ibrdll import IbrDll
+from writer import RowWriter
+from errors import ErrorAccounting
+import logging
 #import notify
 import csv
 import os
@@ -32,6 +35,8 @@ MESSTASTER_BESCHREIBUNG = {
 #MESSTASTER_BESCHREIBUNG.get(7, "Unknown probe")
 
 ibr = IbrDll(DLL_FILE)
+# Counts failed reads; logs state changes and one summary per minute instead of every failure
+errors = ErrorAccounting(MESSTASTER_ADDRESSE, MESSTASTER_BESCHREIBUNG, window=60.0)
 
 #FUNCTION DEFINITIONS
 def value_reading(module_number, gauge_number):
@@ -44,13 +49,7 @@ def value_reading(module_number, gauge_number):
     """
     status, value = ibr.get_value(module_number, gauge_number)
     if status != 0:
-        MeasurementError = f"Gauge #{gauge_number}: {status}"
-        if status == 136:
-            #notify.me(f"Gauge #{gauge_number} out of range")
-            print(f"Gauge #{gauge_number} ({MESSTASTER_BESCHREIBUNG.get(gauge_number, 'Unknown')}) out of range")
-        else:
-            print(f"Error {status} on {gauge_number} ({MESSTASTER_BESCHREIBUNG.get(gauge_number, 'Unknown')})")
-            #notify.me(MeasurementError)
+        errors.record(gauge_number, status)
         return None
     else:
         return value
@@ -58,6 +57,7 @@ def value_reading(module_number, gauge_number):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
     header = ["Time"] + [MESSTASTER_BESCHREIBUNG.get(addr, f"Gauge {addr}: {MESSTASTER_BESCHREIBUNG.get(addr)}") for addr in MESSTASTER_ADDRESSE]
     
@@ -76,21 +76,28 @@ if __name__ == "__main__":
         with open(CSV_FILENAME, mode='w', newline='') as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(header)
-
-            while end_time is None or time.time() < end_time:
-                now = time.strftime('%Y-%m-%d %H:%M:%S')
-                row = [now]
-
-                for addr in MESSTASTER_ADDRESSE:
-                    value = value_reading(MODULE_NUMMER, addr)
-                    if value is not None:
-                        row.append(f"{value:.4f}")
-                    else:
-                        row.append("error")
-
-                writer.writerow(row)
-                print(" | ".join(row))
-                time.sleep(MEASUREMENT_INTERVAL)
+            row_writer = RowWriter(csvfile, console_hz=FREQUENCY_HZ)
+
+            try:
+                while end_time is None or time.time() < end_time:
+                    now = time.strftime('%Y-%m-%d %H:%M:%S')
+                    row = [now]
+
+                    valid = {}
+                    for addr in MESSTASTER_ADDRESSE:
+                        value = value_reading(MODULE_NUMMER, addr)
+                        if value is not None:
+                            row.append(f"{value:.4f}")
+                        else:
+                            row.append("error")
+                        valid[addr] = value is not None
+                    errors.end_tick(valid)
+
+                    row_writer.write(row)
+                    time.sleep(MEASUREMENT_INTERVAL)
+            finally:
+                row_writer.close()
+                errors.flush()
 
     except KeyboardInterrupt:
         print("\n❗ Measurement cancelled by user.")
@@ -1,21 +1,86 @@
 import sys
 import time
-import csv
 import os
 import logging
 import re
+import threading
+from array import array
 from datetime import datetime
-from statistics import mean
-from ibrdll import IbrDll
+from acquisition import CallbackAcquisition
+from scheduler import DeadlineScheduler
+from writer import RowWriter, CsvOutput
+from segments import SegmentedOutput
+from recording import BinaryRecorder, STATUS_NO_DATA, STATUS_GAP, STATUS_NOT_DUE
+from aggregation import TickAggregator, precision_format
+from metrics import Metrics, MetricsServer, SnapshotWriter
+from errors import ErrorAccounting
+from calibration import LatencyEstimator, measure_read_latency, oversample_count_for
+from watchdog import DeviceWatchdog, READ_TIMEOUT
+from deadband import DeadbandFilter, HOLD
+from driverdata import ReadTimingModel
+from multirate import MultiRatePlanner
+from compensation import Compensator, load_table
+from liveview import LiveView
+from tracing import Tracer, span, measure_overhead, TICK_SPAN
+from backends import open_backend, backend_name
 
 # ------------------ Configuration ------------------
 
 DLL_PATH = r"C:\IBR_DDK\DLL\Win32\ibr_ddk.dll"
+BACKEND = None  # "dll", "simulated" or "replay" (see backends.py); None = $IBR_BACKEND, else "dll"
+BACKEND_OPTIONS = {}  # keyword arguments for the backend, e.g. {"source": "run.csv", "speed": 60} for replay
 SETUP_PATH = r"C:\IMB_Test\IMB_Test.ddk"
 MODULE_NUMBER = 1
 OUTPUT_DIR = "Measurements"
-MIN_MEASUREMENT_INTERVAL = 0.13  # seconds, from empirical read time
+MIN_MEASUREMENT_INTERVAL = 0.13  # seconds per round of all six gauges, measured; also caps the driver-data model
+# IBR_DDK.USD driver data for the theoretical read-time model, first existing path wins
+DRIVER_DATA_PATHS = (r"C:\IBR_DDK\IBR_DDK.USD", os.path.join(os.path.dirname(os.path.abspath(__file__)), "IBR_DDK.USD"))
+GAUGE_INTERFACE = "IBR C100"  # interface type of every gauge in the driver data, or {address: type name}
 MAX_OVERSAMPLE_COUNT = 50
+AUTO_OVERSAMPLE = True  # calibrate read latency after init and adapt the oversample count every tick
+OVERSAMPLE_BUDGET = 0.8  # fraction of the interval the read burst may use
+CALIBRATION_ROUNDS = 5  # timed reads per gauge in the calibration phase
+WATCHDOG_ENABLED = True  # poll on an I/O thread with deadlines and re-init the device when it stalls
+READ_TIMEOUT_S = 0.5  # seconds allowed per Device_Value before a read counts as hung
+WATCHDOG_MAX_FAILURES = 3  # failed read bursts in a row before the device is re-initialized
+ERROR_SUMMARY_WINDOW = 60.0  # seconds between aggregated read-failure log lines
+ERROR_COLUMNS = True  # add per-gauge failed-read count columns to the CSV
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024  # unbounded runs: start a new output segment at this size...
+SEGMENT_MAX_HOURS = 24  # ...or after this many hours, whichever comes first
+COMPRESS_SEGMENTS = True  # gzip closed segments in a worker process
+TIME_INDEX_EVERY = 1000  # rows between entries of the .idx time index next to each CSV, 0 = no index
+LOG_MAX_BYTES = 50 * 1024 * 1024  # unbounded runs: rotate the .log file at this size
+LOG_BACKUPS = 20
+METRICS_ENABLED = False  # read-latency histograms, error/overrun counters (see metrics.py)
+METRICS_PORT = 9109  # local Prometheus endpoint when metrics are enabled, None = no HTTP server
+METRICS_SNAPSHOT_INTERVAL = 10.0  # seconds between JSON snapshots next to the CSV
+TRACE_ENABLED = False  # record spans (init phases, reads, aggregation, writes) for `python tracing.py summary`
+TRACE_FORMAT = "json"  # "json" (Chrome trace events) or "binary"
+TRACE_CAPACITY = 1 << 20  # spans kept per run; later spans are counted as dropped
+ACQUISITION_MODE = "poll"  # "poll" = Device_Value per read, "push" = DLL callback into a ring buffer
+OVERRUN_POLICY = "skip"  # "skip" missed ticks or "burst" to catch up, see scheduler.DeadlineScheduler
+FLUSH_INTERVAL = 1.0  # seconds between CSV flushes (at the latest)
+FLUSH_ROWS = 100  # flush early once this many rows are pending
+CONSOLE_REFRESH_HZ = 2.0  # max printed rows per second, 0 = quiet
+LIVE_VIEW = None  # "terminal" (replaces the printed rows) or "web" chart, see liveview.py; None = off
+LIVE_VIEW_FPS = 2.0  # max redraws per second
+LIVE_VIEW_WINDOW = 600.0  # seconds shown
+LIVE_VIEW_PORT = 8765  # web live view at http://127.0.0.1:<port>/
+RECORDING_FORMAT = "csv"  # "csv" or "binary" (fixed-width records, see recording.py)
+REDUCER = "mean"  # per-tick value: "mean", "median" or "trimmed" (trimmed mean)
+TRIM_PROPORTION = 0.1  # fraction cut from each end for the trimmed mean
+STATS_COLUMNS = True  # add per-gauge std and valid-sample count columns to the CSV
+DEADBAND = None  # CSV only: change threshold for all gauges, or {address: threshold}; None = write every tick
+DEADBAND_HEARTBEAT = 60.0  # seconds after which an unchanged gauge is written anyway
+# Multi-rate sampling: {address: (rate_hz, oversamples[, priority])}; unlisted gauges use the session frequency
+# and oversampling. Rows are sparse: a gauge's cell is only filled in the tick that ends its period.
+GAUGE_RATES = None  # e.g. {1: (5, 4), 2: (5, 4), 3: (5, 4), 4: (0.1, 20), 5: (0.1, 20), 6: (0.1, 20)}
+# Calibration table applied to every raw reading before aggregation (see compensation.py); None = record raw values
+COMPENSATION_TABLE = None  # e.g. r"C:\IMB_Test\calibration.json"
+COMPENSATION_TEMPERATURE = None  # part temperature in degrees C for thermal compensation, None = none
+RAW_COLUMNS = True  # with a calibration table: add "<name> raw" columns next to the compensated values (CSV)
+TIME_COLUMNS = True  # add per-gauge "<name> t" columns: mean read time in ms after the row timestamp
+PUSH_SAMPLE_CAPACITY = 1024  # samples kept per gauge and tick for median/trimmed in push mode
 
 DEFAULT_GAUGE_DESCRIPTIONS = {
     1: "Z direction 1",
@@ -28,97 +93,517 @@ DEFAULT_GAUGE_DESCRIPTIONS = {
 
 # ------------------ Measurement Class ------------------
 
+def _local_now():
+    return datetime.now().astimezone()
+
+
+def default_oversample_count(frequency_hz, gauge_count, timing_model=None) -> int:
+    """Oversampling per tick at `frequency_hz`: from the read-time model if there is one, else the measured round."""
+    interval = 1 / frequency_hz
+    if timing_model is None:
+        return max(1, min(int(interval / MIN_MEASUREMENT_INTERVAL), MAX_OVERSAMPLE_COUNT))
+    return oversample_count_for(interval, gauge_count, timing_model.mean_read_time,
+                                budget=OVERSAMPLE_BUDGET, max_count=MAX_OVERSAMPLE_COUNT)
+
+
+def gauge_rate_map(gauge_addresses, gauge_rates, frequency_hz, oversample_count) -> dict:
+    """{address: (rate_hz, oversamples[, priority])}; unlisted gauges run at the session frequency and oversampling."""
+    return {addr: gauge_rates.get(addr, (frequency_hz, oversample_count)) for addr in gauge_addresses}
+
+
 class MeasurementSession:
-    def __init__(self, ibr, gauge_addresses, gauge_descriptions, frequency_hz, duration_hours, csv_filename):
+    def __init__(self, ibr, gauge_addresses, gauge_descriptions, frequency_hz, duration_hours, csv_filename,
+                 acquisition=None, overrun_policy=OVERRUN_POLICY, recording_format=RECORDING_FORMAT,
+                 reducer=REDUCER, stats_columns=STATS_COLUMNS, manage_device=True,
+                 auto_oversample=AUTO_OVERSAMPLE, metrics=None, segment_max_bytes=None, segment_max_seconds=None,
+                 timing_model=None, tracer=None, gauge_rates=GAUGE_RATES, compensator=None):
         self.ibr = ibr
+        self.acquisition = acquisition  # CallbackAcquisition for push mode, None to poll
         self.gauge_addresses = gauge_addresses
         self.gauge_descriptions = gauge_descriptions
         self.frequency_hz = frequency_hz
         self.measurement_interval = 1 / frequency_hz
         self.duration_seconds = None if duration_hours is None else duration_hours * 3600
-        self.oversample_count = min(int(self.measurement_interval / MIN_MEASUREMENT_INTERVAL), MAX_OVERSAMPLE_COUNT)
+        self.timing_model = timing_model  # driverdata.ReadTimingModel or None
+        self.oversample_count = default_oversample_count(frequency_hz, len(gauge_addresses), timing_model)
+        self.planner = None  # MultiRatePlanner when gauges run at their own rates
+        if gauge_rates:
+            rates = gauge_rate_map(gauge_addresses, gauge_rates, frequency_hz, self.oversample_count)
+            self.planner = MultiRatePlanner(gauge_addresses, rates)
+            # Tick at the fastest gauge's rate; slower gauges complete a period every few ticks
+            self.frequency_hz = self.planner.frequency_hz
+            self.measurement_interval = self.planner.tick_interval
+            if timing_model is not None:
+                self.planner.validate(timing_model.mean_read_time, OVERSAMPLE_BUDGET)
+        elif timing_model is not None:
+            timing_model.validate(frequency_hz, self.oversample_count)
+        self._emit = None  # multi-rate: addresses whose period ends in the current tick
+        self.auto_oversample = auto_oversample and acquisition is None
+        self._latency = None  # LatencyEstimator once calibrated
         self.csv_filename = csv_filename
         self.total_samples = 0
+        self.scheduler = DeadlineScheduler(self.measurement_interval, policy=overrun_policy)
+        # False when the device is owned elsewhere (e.g. the acquisition daemon): skip init/deinit
+        self.manage_device = manage_device
+        self.listeners = []  # fn(t_ns, values) called every tick, values[i] None if gauge i had no sample
+        # Row timestamps from the backend's clock if it has one (e.g. replay time), else local wall time
+        self._now = getattr(ibr, "now", None) or _local_now
+        self._stop_event = threading.Event()
+        self.metrics = metrics  # metrics.Metrics or None
+        self.tracer = tracer  # tracing.Tracer or None
+
+        self._tick_status = {}  # addr -> last failing status in the current tick
+        max_oversamples = MAX_OVERSAMPLE_COUNT if self.auto_oversample else self.oversample_count
+        capacity = max_oversamples if acquisition is None else PUSH_SAMPLE_CAPACITY
+        if self.planner is not None:
+            # Accumulators span a gauge's whole period, not one tick
+            gauges = self.planner.gauges
+            capacity = (max(g.oversamples for g in gauges) if acquisition is None
+                        else PUSH_SAMPLE_CAPACITY * max(g.ticks for g in gauges))
+        self.aggregator = TickAggregator(gauge_addresses, max(capacity, 1), reducer=reducer, trim=TRIM_PROPORTION)
+        self.compensator = compensator  # compensation.Compensator or None
+        # Raw readings aggregated alongside the compensated ones for the "<name> raw" columns
+        self.raw_aggregator = None
+        if compensator is not None and RAW_COLUMNS and recording_format == "csv":
+            self.raw_aggregator = TickAggregator(gauge_addresses, max(capacity, 1), reducer=reducer,
+                                                 trim=TRIM_PROPORTION)
+        self.stats_columns = stats_columns and recording_format == "csv"
+        self.time_columns = TIME_COLUMNS and recording_format == "csv"
+        self._tick_perf_ns = 0  # perf_counter_ns taken with the row timestamp
+        self.deadband = None
+        if DEADBAND is not None and recording_format == "csv":
+            self.deadband = DeadbandFilter(gauge_addresses, DEADBAND, heartbeat=DEADBAND_HEARTBEAT)
+        self.suppressed_rows = 0
+        # Deadband: failures of ticks whose row was suppressed, reported with the next written row
+        self._pending_errors = [0] * len(gauge_addresses)
+        self.oversample_column = self.auto_oversample and recording_format == "csv"
+        self.errors = ErrorAccounting(gauge_addresses, gauge_descriptions, window=ERROR_SUMMARY_WINDOW)
+        self.error_columns = ERROR_COLUMNS and recording_format == "csv"
+        self._tick_errors = [0] * len(gauge_addresses)
+        self.watchdog = None
+        if WATCHDOG_ENABLED and acquisition is None:
+            # A burst may not outlast the tick; the expected read time tightens that once known
+            self.watchdog = DeviceWatchdog(ibr, SETUP_PATH, MODULE_NUMBER, read_timeout=READ_TIMEOUT_S,
+                                           max_failures=WATCHDOG_MAX_FAILURES, max_burst=self.measurement_interval,
+                                           expected_read=None if timing_model is None else timing_model.mean_read_time)
+        self._read_timed_out = False
+
+        # Read buffers sized for the largest burst; address lists cached per oversample count
+        burst = len(gauge_addresses) * max_oversamples if self.planner is None else self.planner.max_reads
+        self._burst_out = (array("d", bytes(8 * burst)), array("h", bytes(2 * burst)), array("q", bytes(8 * burst)))
+        self._burst_cache = {}
+        self._set_oversample_count(self.oversample_count)
+        self._tick_oversamples = self.oversample_count
+
+        # csv_filename is the output path for either format (segments derive their names from it)
+        self.binary = recording_format == "binary"
+        if recording_format == "binary":
+            def open_output(path):
+                return BinaryRecorder(path, gauge_addresses, gauge_descriptions, self.frequency_hz)
+            console_format = self._format_record
+        elif recording_format == "csv":
+            names = [gauge_descriptions.get(addr, f"Gauge {addr}") for addr in gauge_addresses]
+            header = ["Timestamp"] + names
+            self._gap_row = ["gap"] * len(names)
+            if self.raw_aggregator is not None:
+                header += [f"{name} raw" for name in names]
+                self._gap_row += ["gap"] * len(names)
+            if self.stats_columns:
+                header += [f"{name} std" for name in names] + [f"{name} n" for name in names]
+            if self.error_columns:
+                self._err_column = len(header)
+                header += [f"{name} err" for name in names]
+            if self.time_columns:
+                header += [f"{name} t" for name in names]
+            if self.oversample_column:
+                header.append("Oversamples")
+            self._gap_row += [""] * (len(header) - 1 - len(names))
+            self._row_width = len(header)
+
+            def open_output(path):
+                return CsvOutput(path, header, index_every=TIME_INDEX_EVERY)
+            console_format = " | ".join
+        else:
+            raise ValueError(f"Unknown recording format '{recording_format}'.")
 
-        self.csv_file = open(csv_filename, mode='w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow(["Timestamp"] +
-                                 [gauge_descriptions.get(addr, f"Gauge {addr}") for addr in gauge_addresses])
+        if segment_max_bytes is None and segment_max_seconds is None:
+            self.output = open_output(csv_filename)
+        else:
+            base, extension = os.path.splitext(csv_filename)
+            self.output = SegmentedOutput(base, extension.lstrip("."), open_output, max_bytes=segment_max_bytes,
+                                          max_seconds=segment_max_seconds, compress=COMPRESS_SEGMENTS)
+        self.writer = RowWriter(self.output, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL,
+                                console_hz=CONSOLE_REFRESH_HZ, console_format=console_format)
+        self.writer.tracer = tracer
+
+    def _set_oversample_count(self, count):
+        self.oversample_count = count
+        burst = self._burst_cache.get(count)
+        if burst is None:
+            burst = self._burst_cache[count] = list(self.gauge_addresses) * count
+        self._burst_addresses = burst
+
+    def _calibrate(self):
+        latencies = measure_read_latency(self.ibr, MODULE_NUMBER, self.gauge_addresses, CALIBRATION_ROUNDS)
+        for addr, latency in latencies.items():
+            logging.info(f"Gauge #{addr} read latency: {latency * 1e3:.2f} ms")
+        per_read = sum(latencies.values()) / len(latencies)
+        self._latency = LatencyEstimator(per_read)
+        if self.watchdog is not None:
+            self.watchdog.expected_read = per_read
+        if self.planner is not None:
+            try:
+                self.planner.validate(per_read, OVERSAMPLE_BUDGET)
+            except ValueError as e:
+                logging.warning(f"Measured read latency: {e} Slow gauges will get fewer reads.")
+            return
+        self._set_oversample_count(oversample_count_for(
+            self.measurement_interval, len(self.gauge_addresses), per_read,
+            budget=OVERSAMPLE_BUDGET, max_count=MAX_OVERSAMPLE_COUNT))
+
+    def _adapt_oversampling(self, read_duration):
+        if not self._burst_addresses:
+            return
+        self._latency.update(read_duration / len(self._burst_addresses))
+        if self.watchdog is not None:
+            self.watchdog.expected_read = self._latency.upper
+        if self.planner is not None:
+            return  # per-gauge oversampling is fixed; the estimate only sizes the read budget
+        count = oversample_count_for(self.measurement_interval, len(self.gauge_addresses), self._latency.upper,
+                                     budget=OVERSAMPLE_BUDGET, max_count=MAX_OVERSAMPLE_COUNT)
+        if count != self.oversample_count:
+            logging.debug(f"Oversample count {self.oversample_count} -> {count} "
+                          f"(read latency ~{self._latency.mean * 1e3:.2f} ms)")
+            self._set_oversample_count(count)
+
+    def _read_budget(self):
+        """Multi-rate: reads that fit in OVERSAMPLE_BUDGET of one tick at the current read-time estimate."""
+        if self._latency is not None:
+            per_read = self._latency.upper
+        elif self.timing_model is not None:
+            per_read = self.timing_model.mean_read_time
+        else:
+            per_read = 0
+        if per_read <= 0:
+            return self.planner.max_reads
+        return max(1, min(int(self.measurement_interval * OVERSAMPLE_BUDGET / per_read), self.planner.max_reads))
+
+    @staticmethod
+    def _format_record(record):
+        _, values, _ = record
+        return " | ".join("error" if v is None else f"{v:.6f}" for v in values)
+
+    def _report_failure(self, gauge_number, status):
+        # Counted, not logged: ErrorAccounting logs transitions and periodic summaries
+        self._tick_status[gauge_number] = status
+        self.errors.record(gauge_number, status)
+        if self.metrics is not None:
+            self.metrics.inc("read_errors_total", gauge=gauge_number,
+                             status="out_of_range" if status == 136 else status)
 
     def read_gauge_value(self, module_number, gauge_number):
         status, value = self.ibr.get_value(module_number, gauge_number)
         if status != 0:
-            if status == 136:
-                logging.warning(f"Gauge #{gauge_number} ({self.gauge_descriptions.get(gauge_number)}) out of range")
-            else:
-                logging.error(f"Error {status} on gauge #{gauge_number} ({self.gauge_descriptions.get(gauge_number)})")
+            self._report_failure(gauge_number, status)
             return None
         return value
 
-    def run(self):
-        logging.info("Initializing device.")
-        rc = self.ibr.init_device(SETUP_PATH)
-        if rc != 0:
-            logging.critical(f"Device initialization failed (rc={rc}).")
-            sys.exit(1)
-
+    def _poll_oversamples(self):
+        # One get_values() call per tick covers all gauges x oversamples, each read time-stamped
+        if not self._burst_addresses:
+            self._read_timed_out = False
+            return  # multi-rate tick with nothing left to read
+        if self.watchdog is None:
+            out = self.ibr.get_values(MODULE_NUMBER, self._burst_addresses, self._burst_out)
+        else:
+            out = self.watchdog.get_values(MODULE_NUMBER, self._burst_addresses, self._burst_out)
+            self._read_timed_out = out is None
+            if out is None:
+                for addr in dict.fromkeys(self._burst_addresses):
+                    self._report_failure(addr, READ_TIMEOUT)
+                return
+        values, statuses, times = out
+        aggregator = self.aggregator
+        if self.compensator is not None:
+            # One vectorized pass over the whole burst; failed reads are computed too and dropped below
+            raw = values
+            values = self.compensator.apply(self._burst_addresses, raw)
+            raw_aggregator = self.raw_aggregator
+            if raw_aggregator is not None:
+                for addr, status, x in zip(self._burst_addresses, statuses, raw):
+                    if status == 0:
+                        raw_aggregator.add(addr, x)
+        for addr, status, value, t in zip(self._burst_addresses, statuses, values, times):
+            if status != 0:
+                self._report_failure(addr, status)
+            else:
+                aggregator.add(addr, value, t)
+
+    def _drain_pushed(self):
+        # Everything the device pushed since the last tick; nonzero intval marks a failed read
+        aggregator = self.aggregator
+        accumulators = aggregator.accumulators
+        compensator = self.compensator
+        valid = []
+        for t, devicenr, addr, _, intval, value in self.acquisition.drain():
+            if devicenr != MODULE_NUMBER or addr not in accumulators:
+                continue
+            if intval != 0:
+                self._report_failure(addr, intval)
+                continue
+            if compensator is None:
+                aggregator.add(addr, value, t)
+            else:
+                valid.append((addr, value, t))
+        if valid:
+            addresses, raw, times = zip(*valid)
+            raw_aggregator = self.raw_aggregator
+            for addr, value, x, t in zip(addresses, compensator.apply(addresses, raw), raw, times):
+                aggregator.add(addr, value, t)
+                if raw_aggregator is not None:
+                    raw_aggregator.add(addr, x)
+
+    def _csv_row(self, timestamp):
+        row = [timestamp]
+        accumulators = self.aggregator.accumulators
+        deadband = self.deadband
+        emit = self._emit
+        now = time.monotonic()
+        raw_aggregator = self.raw_aggregator
+        raw_cells = []
+        for addr in self.gauge_addresses:
+            if emit is not None and addr not in emit:
+                row.append(HOLD)  # multi-rate: period not over yet
+                raw_cells.append(HOLD)
+                continue
+            value = self.aggregator.value(addr)
+            if deadband is not None and not deadband.changed(addr, value, now):
+                row.append(HOLD)
+                raw_cells.append(HOLD)
+            elif value is None:
+                row.append("error")
+                raw_cells.append("error")
+            else:
+                # Adaptive precision based on range of values
+                row.append(precision_format(accumulators[addr].spread).format(value))
+                if raw_aggregator is not None:
+                    raw_acc = raw_aggregator.accumulators[addr]
+                    raw_cells.append(precision_format(raw_acc.spread).format(raw_aggregator.value(addr)))
+        if (deadband is not None or emit is not None) and all(cell == HOLD for cell in row[1:]):
+            if deadband is not None:
+                # ErrorAccounting has closed these gauges' ticks; keep their counts for the next row
+                pending = self._pending_errors
+                for j, (addr, n) in enumerate(zip(self.gauge_addresses, self._tick_errors)):
+                    if emit is None or addr in emit:
+                        pending[j] += n
+            return None  # nothing moved beyond its deadband / no gauge completed a period
+        if raw_aggregator is not None:
+            row.extend(raw_cells)
+        if self.stats_columns:
+            for addr in self.gauge_addresses:
+                acc = accumulators[addr]
+                row.append(f"{acc.std:.3e}" if acc.count and (emit is None or addr in emit) else "")
+            for addr in self.gauge_addresses:
+                row.append(str(accumulators[addr].count) if emit is None or addr in emit else "")
+        if self.error_columns:
+            pending = self._pending_errors
+            for j, (addr, n) in enumerate(zip(self.gauge_addresses, self._tick_errors)):
+                if emit is None or addr in emit:
+                    row.append(str(n + pending[j]))
+                    pending[j] = 0
+                else:
+                    row.append("")
+        if self.time_columns:
+            # Skew between the row timestamp and when each gauge was actually sampled
+            # (negative for multi-rate gauges whose reads were spread over earlier ticks)
+            tick_ns = self._tick_perf_ns
+            for addr in self.gauge_addresses:
+                acc = accumulators[addr]
+                row.append(f"{(acc.t_center - tick_ns) / 1e6:.3f}" if acc.count and (emit is None or addr in emit)
+                           else "")
+        if self.oversample_column:
+            row.append(str(self._tick_oversamples))
+        return row
+
+    def _binary_record(self, t_ns):
+        values = []
+        statuses = []
+        emit = self._emit
+        for addr in self.gauge_addresses:
+            if emit is not None and addr not in emit:
+                values.append(None)
+                statuses.append(STATUS_NOT_DUE)
+                continue
+            value = self.aggregator.value(addr)
+            values.append(value)
+            statuses.append(0 if value is not None else self._tick_status.get(addr, STATUS_NO_DATA))
+        return t_ns, values, statuses
+
+    def _write_closing_row(self):
+        # Deadband: a row of held cells at the end of the run, so readers see where the
+        # recording stops (a quiet gauge keeps its value until then) and no failure count is lost
+        row = [self._now().isoformat()] + [HOLD] * (self._row_width - 1)
+        if self.error_columns:
+            for j, n in enumerate(self._pending_errors):
+                row[self._err_column + j] = str(n)
+        self.writer.write(row)
+
+    def _write_gap(self):
+        if self.binary:
+            n = len(self.gauge_addresses)
+            self.writer.write((time.monotonic_ns(), [None] * n, [STATUS_GAP] * n))
+        else:
+            self.writer.write([self._now().isoformat()] + self._gap_row)
+            if self.deadband is not None:
+                self.deadband.reset()
+
+    def _recover_device(self):
+        # Mark the hole in the recording, then block this thread until the bus answers again
+        logging.error(f"Device stopped responding ({self.watchdog.failures} failed read bursts in a row, "
+                      f"{self.watchdog.timeouts} timeouts so far); re-initializing.")
+        self._write_gap()
+        seconds = self.watchdog.recover(self.gauge_addresses[0], self._stop_event)
+        if seconds is None:
+            return
+        attempts = self.watchdog.recoveries[-1]["attempts"]
+        logging.warning(f"Device recovered after {seconds:.1f} s ({attempts} re-initialization attempt(s)).")
+        if self.metrics is not None:
+            self.metrics.inc("device_recoveries_total")
+            self.metrics.set("last_recovery_seconds", seconds)
+
+    def _record_tick_metrics(self, skipped, read_duration):
+        m = self.metrics
+        m.inc("samples_total")
+        if skipped:
+            m.inc("ticks_skipped_total", skipped)
+            m.inc("tick_overruns_total")
+        if read_duration > self.measurement_interval:
+            m.inc("read_overruns_total")
+        for addr in self.gauge_addresses if self._emit is None else self._emit:
+            if not self.aggregator.accumulators[addr].count:
+                m.inc("empty_samples_total", gauge=addr)
+        m.set("oversample_count", self._tick_oversamples)
+        m.set("read_duration_seconds", read_duration)
+        m.set("writer_queue_depth", self.writer.depth)
+        m.set("writer_dropped_rows", self.writer.dropped)
+        m.set("writer_failed_rows", self.writer.failed)
+        m.set("writer_blocked_seconds", self.writer.blocked_s)
+
+    def stop(self):
+        """Ask a running session to finish after the current tick (thread-safe)."""
+        self._stop_event.set()
 
-        start = time.time()
-        deadline = None if self.duration_seconds is None else start + self.duration_seconds
-        next_sample_time = time.monotonic()
+    def run(self):
+        if self.manage_device:
+            logging.info("Initializing device.")
+            with span(self.tracer, "init_device"):
+                rc = self.ibr.init_device(SETUP_PATH)
+            if rc != 0:
+                logging.critical(f"Device initialization failed (rc={rc}).")
+                sys.exit(1)
 
-        logging.info(f"Measurement started with {self.oversample_count}x oversampling.")
         try:
-            while deadline is None or time.time() < deadline:
-                now_local = datetime.now().astimezone().isoformat()
-                row = [now_local]
-
-                oversample_results = {addr: [] for addr in self.gauge_addresses}
+            if self.acquisition is not None:
+                self.acquisition.start()
+                logging.info("Measurement started in push mode.")
+                # Let the first interval fill before the first drain
+                self.scheduler.start(delay=self.measurement_interval)
+            else:
+                if self.auto_oversample:
+                    with span(self.tracer, "calibrate"):
+                        self._calibrate()
+                if self.planner is None:
+                    logging.info(f"Measurement started with {self.oversample_count}x oversampling.")
+                else:
+                    logging.info(f"Measurement started at {self.frequency_hz:g} Hz ticks with gauge rates: "
+                                 f"{self.planner.describe()}.")
+                self.scheduler.start()
+            if self.planner is not None:
+                self.planner.start(time.monotonic())
+
+            start = time.monotonic()
+            deadline = None if self.duration_seconds is None else start + self.duration_seconds
+
+            while deadline is None or time.monotonic() < deadline:
+                skipped = self.scheduler.wait(self._stop_event)
+                if self._stop_event.is_set():
+                    break
+                if skipped:
+                    logging.warning(f"Tick overran the interval, skipped {skipped} sample(s).")
+
+                tracer = self.tracer
+                tick_start = time.perf_counter_ns()
+                t_ns = time.monotonic_ns()
+                timestamp = None if self.binary else self._now().isoformat()
+                self._tick_perf_ns = time.perf_counter_ns()
+                planner = self.planner
+                if planner is None:
+                    self._tick_status.clear()
+                    self.aggregator.reset()
+                    if self.raw_aggregator is not None:
+                        self.raw_aggregator.reset()
+                    self._tick_oversamples = self.oversample_count
+                else:
+                    # Accumulators run until each gauge's period ends; only read what is due
+                    tick = planner.tick_index(time.monotonic())
+                    if self.acquisition is None:
+                        self._burst_addresses = planner.plan(tick, self._read_budget())
+                    self._tick_oversamples = len(self._burst_addresses)
                 read_start = time.perf_counter()
 
-                for _ in range(self.oversample_count):
-                    for addr in self.gauge_addresses:
-                        value = self.read_gauge_value(MODULE_NUMBER, addr)
-                        if value is not None:
-                            oversample_results[addr].append(value)
-                        else:
-                            oversample_results[addr].append(None)
+                with span(tracer, "read"):
+                    if self.acquisition is None:
+                        self._poll_oversamples()
+                    else:
+                        self._drain_pushed()
 
                 read_end = time.perf_counter()
                 read_duration = read_end - read_start
-
-                for addr in self.gauge_addresses:
-                    samples = [v for v in oversample_results[addr] if v is not None]
-                    avg_value = mean(samples) if samples else None
-
-                    # Adaptive precision based on range of values
-                    if samples and max(samples) - min(samples) < 1e-6:
-                        fmt = "{:.8f}"
-                    elif samples and max(samples) - min(samples) < 1e-5:
-                        fmt = "{:.7f}"
-                    elif samples and max(samples) - min(samples) < 1e-4:
-                        fmt = "{:.6f}"
-                    elif samples and max(samples) - min(samples) < 1e-3:
-                        fmt = "{:.5f}"
-                    elif samples and max(samples) - min(samples) < 1e-2:
-                        fmt = "{:.4f}"
+                if self.auto_oversample and not self._read_timed_out:
+                    self._adapt_oversampling(read_duration)
+                with span(tracer, "aggregate"):
+                    accumulators = self.aggregator.accumulators
+                    if planner is not None:
+                        self._emit = set(planner.complete(tick))
+                    done = self.gauge_addresses if self._emit is None else self._emit
+                    self._tick_errors = self.errors.end_tick({addr: accumulators[addr].count for addr in done})
+                    record = self._binary_record(t_ns) if self.binary else self._csv_row(timestamp)
+
+                with span(tracer, "enqueue"):
+                    if record is not None:
+                        self.writer.write(record)
                     else:
-                        fmt = "{:.3f}"
-
-                    row.append(fmt.format(avg_value) if avg_value is not None else "error")
-
-                self.csv_writer.writerow(row)
-                self.csv_file.flush()
+                        self.suppressed_rows += 1
                 self.total_samples += 1
-                print(" | ".join(row))
 
-                remaining = self.measurement_interval - read_duration
-                if remaining > 0:
-                    time.sleep(remaining)
-                else:
+                if self.metrics is not None:
+                    with span(tracer, "metrics"):
+                        self._record_tick_metrics(skipped, read_duration)
+
+                if self.listeners:
+                    with span(tracer, "listeners"):
+                        emit = self._emit
+                        values = [self.aggregator.value(addr) if emit is None or addr in emit else None
+                                  for addr in self.gauge_addresses]
+                        for listener in self.listeners:
+                            listener(t_ns, values)
+
+                if planner is not None:
+                    for addr in self._emit:
+                        accumulators[addr].reset()
+                        if self.raw_aggregator is not None:
+                            self.raw_aggregator.accumulators[addr].reset()
+                        self._tick_status.pop(addr, None)
+
+                if read_duration > self.measurement_interval:
                     logging.warning(f"Oversampling took longer than allowed interval ({read_duration:.3f}s > {self.measurement_interval:.3f}s)")
 
-                next_sample_time += self.measurement_interval
+                if tracer is not None:
+                    tracer.add(tracer.name_id(TICK_SPAN), tick_start, time.perf_counter_ns())
+
+                if self.watchdog is not None and self.watchdog.needs_recovery:
+                    with span(tracer, "recover device"):
+                        self._recover_device()
 
         except KeyboardInterrupt:
             logging.warning("Measurement manually interrupted by user.")
@@ -130,19 +615,56 @@ class MeasurementSession:
             self.finish()
 
     def finish(self):
-        logging.info("Deinitializing device.")
-        try:
-            self.ibr.deinit_device()
-        except Exception as e:
-            logging.warning(f"Deinitialization failed: {e}")
+        if self.acquisition is not None:
+            try:
+                self.acquisition.stop()
+            except Exception as e:
+                logging.warning(f"Stopping push-mode acquisition failed: {e}")
+            if self.acquisition.dropped:
+                logging.warning(f"Push-mode ring buffer dropped {self.acquisition.dropped} values.")
+        self.errors.flush()
+        if self.errors.totals:
+            totals = ", ".join(f"#{addr} status {status}: {n}" for (addr, status), n in sorted(self.errors.totals.items()))
+            logging.info(f"Read failures over the session: {totals}")
+        if self.watchdog is not None:
+            self.watchdog.close()
+            for r in self.watchdog.recoveries:
+                logging.info(f"Device outage from {r['started']}: recovered after {r['seconds']:.1f} s "
+                             f"({r['attempts']} attempt(s))")
+        if self.manage_device:
+            logging.info("Deinitializing device.")
+            try:
+                self.ibr.deinit_device()
+            except Exception as e:
+                logging.warning(f"Deinitialization failed: {e}")
+        if self.deadband is not None:
+            self._write_closing_row()
+        logging.info("Draining writer queue.")
+        if not self.writer.close(timeout=30.0):
+            logging.warning("Writer did not drain within 30 s; trailing rows may be missing.")
+        w = self.writer.metrics()
+        logging.info(
+            f"Writer: {w['written']}/{w['enqueued']} rows written, {w['failed']} failed, {w['dropped']} dropped, "
+            f"{w['flushes']} flushes, max queue depth {w['max_depth']}, blocked {w['blocked_s']:.3f} s"
+        )
         try:
-            self.csv_file.close()
+            self.output.close()
         except Exception as e:
-            logging.warning(f"Failed to close CSV file: {e}")
+            logging.warning(f"Failed to close output file: {e}")
 
         logging.info(f"Total samples collected: {self.total_samples}")
+        if self.deadband is not None:
+            logging.info(f"Deadband: {self.suppressed_rows} unchanged rows not written, "
+                         f"{self.deadband.held} values held, {self.deadband.written} written")
         print(f"Total samples: {self.total_samples}")
 
+        stats = self.scheduler.summary()
+        logging.info(
+            f"Timing: {stats['ticks']} ticks, {stats['overruns']} overruns, {stats['skipped']} skipped, "
+            f"lateness mean {stats['mean_lateness_s'] * 1e3:.2f} ms / max {stats['max_lateness_s'] * 1e3:.2f} ms, "
+            f"jitter {stats['jitter_s'] * 1e3:.2f} ms"
+        )
+
 # ------------------ Sensor Selection Helpers ------------------
 
 def parse_sensor_selection(selection: str, valid_sensors=None):
@@ -202,13 +724,24 @@ def parse_sensor_selection(selection: str, valid_sensors=None):
         raise ValueError("No valid sensors selected.")
     return result
 
+def load_timing_model(gauge_addresses):
+    """ReadTimingModel from the first existing DRIVER_DATA_PATHS entry, or None if there is none."""
+    for path in DRIVER_DATA_PATHS:
+        if os.path.isfile(path):
+            return ReadTimingModel.from_files(path, gauge_addresses, GAUGE_INTERFACE,
+                                              measured_read_time=MIN_MEASUREMENT_INTERVAL / len(DEFAULT_GAUGE_DESCRIPTIONS))
+    return None
+
 # ------------------ Main Logic ------------------
 
 def main():
-    if not os.path.isfile(DLL_PATH):
+    import logging.handlers
+
+    backend = backend_name(BACKEND)
+    if backend == "dll" and not os.path.isfile(DLL_PATH):
         print(f"Missing DLL file: {DLL_PATH}")
         sys.exit(1)
-    if not os.path.isfile(SETUP_PATH):
+    if backend == "dll" and not os.path.isfile(SETUP_PATH):
         print(f"Missing setup file: {SETUP_PATH}")
         sys.exit(1)
 
@@ -233,9 +766,19 @@ def main():
             raise ValueError("Frequency must be between 0.001 and 100 Hz.")
 
         measurement_interval = 1 / frequency_hz
-        min_interval_needed = MIN_MEASUREMENT_INTERVAL
-        if measurement_interval < min_interval_needed:
-            raise ValueError(f"Frequency too high. Minimum interval must be ≥ {min_interval_needed:.3f} s")
+        timing_model = load_timing_model(gauge_addresses)
+        if GAUGE_RATES:
+            # Unlisted gauges run at the entered frequency; the whole schedule must fit on the bus
+            oversample_count = default_oversample_count(frequency_hz, len(gauge_addresses), timing_model)
+            planner = MultiRatePlanner(gauge_addresses,
+                                       gauge_rate_map(gauge_addresses, GAUGE_RATES, frequency_hz, oversample_count))
+            if timing_model is not None:
+                planner.validate(timing_model.mean_read_time, OVERSAMPLE_BUDGET)
+        elif timing_model is not None:
+            # At least one read of every gauge must fit in the interval
+            timing_model.validate(frequency_hz)
+        elif measurement_interval < MIN_MEASUREMENT_INTERVAL:
+            raise ValueError(f"Frequency too high. Minimum interval must be ≥ {MIN_MEASUREMENT_INTERVAL:.3f} s")
 
         duration_input = input("Enter duration in hours (leave blank for no time limit): ").strip()
         duration_hours = float(duration_input) if duration_input else None
@@ -255,32 +798,114 @@ def main():
 
     timestamp = datetime.now().strftime('%Y-%m-%dT%H-%M-%S')
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    csv_filename = os.path.join(OUTPUT_DIR, f"measurement_{timestamp}.csv")
+    extension = "bin" if RECORDING_FORMAT == "binary" else "csv"
+    csv_filename = os.path.join(OUTPUT_DIR, f"measurement_{timestamp}.{extension}")
     log_filename = os.path.join(OUTPUT_DIR, f"measurement_{timestamp}.log")
 
+    if duration_hours is None:
+        # Unbounded run: keep the log in size-limited pieces next to the segments
+        log_handler = logging.handlers.RotatingFileHandler(log_filename, maxBytes=LOG_MAX_BYTES,
+                                                           backupCount=LOG_BACKUPS)
+    else:
+        log_handler = logging.FileHandler(log_filename, mode='a')
     logging.basicConfig(
-        filename=log_filename,
-        filemode='a',
+        handlers=[log_handler],
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
-    logging.getLogger().addHandler(logging.StreamHandler(sys.stdout))
+    console_log = logging.StreamHandler(sys.stdout)
+    logging.getLogger().addHandler(console_log)
 
     logging.info("----- Measurement Configuration -----")
     logging.info(f"Gauge addresses: {gauge_addresses}")
     logging.info(f"Gauge descriptions: {gauge_descriptions}")
     logging.info(f"Frequency: {frequency_hz} Hz")
     logging.info(f"Duration (hours): {'infinite' if duration_hours is None else duration_hours}")
+    if timing_model is not None:
+        logging.info(f"Theoretical read time: {timing_model.mean_read_time * 1e3:.1f} ms/read, "
+                     f"{timing_model.round_time * 1e3:.1f} ms per round, max {timing_model.max_frequency():.3g} Hz")
+        if timing_model.overestimates:
+            logging.info(f"Driver-data model gives {timing_model.model_round_time * 1e3:.1f} ms per round, "
+                         f"above the measured {timing_model.measured_round_time * 1e3:.1f} ms; using the measured time.")
     logging.info("-------------------------------------")
-    session = MeasurementSession(
-        ibr=IbrDll(DLL_PATH),
-        gauge_addresses=gauge_addresses,
-        gauge_descriptions=gauge_descriptions,
-        frequency_hz=frequency_hz,
-        duration_hours=duration_hours,
-        csv_filename=csv_filename
-    )
-    session.run()
+    if backend == "dll":
+        ibr = open_backend(backend, DLL_PATH, **BACKEND_OPTIONS)
+    else:
+        logging.info(f"Backend: {backend} {BACKEND_OPTIONS or ''}")
+        ibr = open_backend(backend, **BACKEND_OPTIONS)
+
+    metrics = server = snapshots = None
+    if METRICS_ENABLED:
+        metrics = Metrics()
+        ibr.metrics = metrics
+        snapshots = SnapshotWriter(metrics, os.path.join(OUTPUT_DIR, f"measurement_{timestamp}.metrics.json"),
+                                   interval=METRICS_SNAPSHOT_INTERVAL).start()
+        if METRICS_PORT is not None:
+            server = MetricsServer(metrics, port=METRICS_PORT).start()
+            logging.info(f"Metrics at http://127.0.0.1:{server.port}/metrics")
+
+    tracer = None
+    if TRACE_ENABLED:
+        tracer = Tracer(TRACE_CAPACITY)
+        ibr.tracer = tracer
+
+    compensator = None
+    if COMPENSATION_TABLE is not None:
+        table = load_table(COMPENSATION_TABLE)
+        compensator = Compensator(table, gauge_addresses, temperature=COMPENSATION_TEMPERATURE)
+        logging.info(f"Compensating gauges {sorted(set(table) & set(gauge_addresses))} with {COMPENSATION_TABLE}"
+                     + ("" if COMPENSATION_TEMPERATURE is None else f" at {COMPENSATION_TEMPERATURE:g} °C"))
+
+    live = None
+    try:
+        try:
+            session = MeasurementSession(
+                ibr=ibr,
+                gauge_addresses=gauge_addresses,
+                gauge_descriptions=gauge_descriptions,
+                frequency_hz=frequency_hz,
+                duration_hours=duration_hours,
+                csv_filename=csv_filename,
+                segment_max_bytes=SEGMENT_MAX_BYTES if duration_hours is None else None,
+                segment_max_seconds=SEGMENT_MAX_HOURS * 3600 if duration_hours is None else None,
+                acquisition=CallbackAcquisition(ibr) if ACQUISITION_MODE == "push" else None,
+                metrics=metrics,
+                timing_model=timing_model,
+                tracer=tracer,
+                compensator=compensator,
+            )
+        except ValueError as e:
+            # e.g. a rate schedule that does not fit the bus; the finally block still stops the servers
+            logging.error(f"Invalid configuration: {e}")
+            sys.exit(1)
+        if LIVE_VIEW is not None:
+            live = LiveView([gauge_descriptions[addr] for addr in gauge_addresses], session.measurement_interval,
+                            renderer=LIVE_VIEW, fps=LIVE_VIEW_FPS, window=LIVE_VIEW_WINDOW, port=LIVE_VIEW_PORT)
+            session.listeners.append(live.on_sample)
+            if LIVE_VIEW == "terminal":
+                # The live view owns the terminal: rows and log lines go to the files only while it runs
+                session.writer.console_period = None
+                logging.getLogger().removeHandler(console_log)
+            else:
+                logging.info(f"Live view at http://127.0.0.1:{live.port}/")
+            live.start()
+        session.run()
+    finally:
+        if live is not None:
+            live.stop()
+            if LIVE_VIEW == "terminal":
+                logging.getLogger().addHandler(console_log)  # run summary on the console again
+        if server is not None:
+            server.stop()
+        if snapshots is not None:
+            snapshots.stop()
+        if tracer is not None:
+            trace_filename = os.path.join(
+                OUTPUT_DIR, f"measurement_{timestamp}.trace.{'json' if TRACE_FORMAT == 'json' else 'bin'}")
+            tracer.write(trace_filename)
+            per_span = measure_overhead()
+            logging.info(f"Trace: {tracer.count} spans ({tracer.dropped} dropped) -> {trace_filename}, "
+                         f"tracer overhead ~{per_span * 1e9:.0f} ns/span ({tracer.count * per_span:.3f} s in total)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# ------------------ Latency Histogram ------------------
+
+_SUB_BITS = 3
+_SUB = 1 << _SUB_BITS  # sub-buckets per power of two -> <= 12.5 % relative bucket width
+_N_BUCKETS = (64 - _SUB_BITS) * _SUB
+
+# Bucket bounds (seconds) used for the Prometheus export
+EXPORT_BOUNDS = (50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3,
+                 50e-3, 100e-3, 250e-3, 500e-3, 1.0, 2.5, 5.0, 10.0)
+
+
+def _bucket_index(v: int) -> int:
+    if v < _SUB:
+        return v
+    shift = v.bit_length() - _SUB_BITS - 1
+    return (shift + 1) * _SUB + ((v >> shift) - _SUB)
+
+
+def _bucket_upper(i: int) -> int:
+    """Exclusive upper bound (ns) of bucket i."""
+    if i < _SUB:
+        return i + 1
+    shift = i // _SUB - 1
+    return ((i % _SUB) + _SUB + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of nanosecond durations: constant-time
+    record, fixed memory, bounded relative error.
+    """
+
+    __slots__ = ("counts", "count", "sum_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * _N_BUCKETS
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        if ns < 0:
+            ns = 0
+        self.counts[_bucket_index(ns)] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound (seconds) below which a fraction q of values fall."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(_bucket_upper(i), self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def cumulative(self, bounds=EXPORT_BOUNDS) -> list[int]:
+        """Cumulative counts for each bound in seconds (values in buckets ending at or below it)."""
+        out = []
+        seen = 0
+        i = 0
+        for bound in bounds:
+            limit = int(bound * 1e9)
+            while i < _N_BUCKETS and _bucket_upper(i) <= limit:
+                seen += self.counts[i]
+                i += 1
+            out.append(seen)
+        return out
+
+# ------------------ Metrics Registry ------------------
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and per-gauge read-latency histograms.
+
+    Instrumented code holds `metrics = None` when disabled and checks it before
+    recording, so a disabled registry costs one attribute test per site.
+    """
+
+    def __init__(self, prefix: str = "ibr"):
+        self.prefix = prefix
+        self.read_latency = {}  # gauge address -> LatencyHistogram
+        self.counters = {}      # (name, labels) -> number
+        self.gauges = {}        # (name, labels) -> number
+        self.started = time.time()
+
+    def observe_read(self, address: int, ns: int):
+        hist = self.read_latency.get(address)
+        if hist is None:
+            hist = self.read_latency[address] = LatencyHistogram()
+        hist.record(ns)
+
+    def inc(self, name: str, value=1, **labels):
+        key = (name, _labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value, **labels):
+        self.gauges[(name, _labels(labels))] = value
+
+    def snapshot(self) -> dict:
+        def flat(items):
+            return [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(items.items())]
+
+        return {
+            "time": time.time(),
+            "uptime_s": time.time() - self.started,
+            "counters": flat(dict(self.counters)),
+            "gauges": flat(dict(self.gauges)),
+            "read_latency_s": {
+                str(addr): {
+                    "count": h.count,
+                    "mean": h.sum_ns / h.count / 1e9 if h.count else 0.0,
+                    "p50": h.quantile(0.5),
+                    "p90": h.quantile(0.9),
+                    "p99": h.quantile(0.99),
+                    "max": h.max_ns / 1e9,
+                }
+                for addr, h in sorted(dict(self.read_latency).items())
+            },
+        }
+
+    def prometheus_text(self) -> str:
+        p = self.prefix
+        lines = []
+
+        def fmt_labels(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+        for kind, items in (("counter", self.counters), ("gauge", self.gauges)):
+            seen = set()
+            for (name, labels), value in sorted(dict(items).items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {p}_{name} {kind}")
+                    seen.add(name)
+                lines.append(f"{p}_{name}{fmt_labels(labels)} {value}")
+
+        name = f"{p}_read_latency_seconds"
+        lines.append(f"# TYPE {name} histogram")
+        for addr, h in sorted(dict(self.read_latency).items()):
+            for bound, cum in zip(EXPORT_BOUNDS, h.cumulative()):
+                lines.append(f'{name}_bucket{{gauge="{addr}",le="{bound:g}"}} {cum}')
+            lines.append(f'{name}_bucket{{gauge="{addr}",le="+Inf"}} {h.count}')
+            lines.append(f'{name}_sum{{gauge="{addr}"}} {h.sum_ns / 1e9}')
+            lines.append(f'{name}_count{{gauge="{addr}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+# ------------------ Exporters ------------------
+
+class MetricsServer:
+    """Serves Metrics.prometheus_text() at http://host:port/metrics (JSON snapshot at /metrics.json)."""
+
+    def __init__(self, metrics: Metrics, port: int = 9109, host: str = "127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only when serving
+
+        registry = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.prometheus_text().encode("utf-8")
+                    ctype = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.snapshot()).encode("utf-8")
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the measurement log
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SnapshotWriter:
+    """Writes Metrics.snapshot() as JSON to `path` every `interval` seconds (atomic replace)."""
+
+    def __init__(self, metrics: Metrics, path, interval: float = 10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsSnapshot", daemon=True)
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.metrics.snapshot(), f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning(f"Writing metrics snapshot failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.write()
@@ -0,0 +1,360 @@
+"""
+Multi-bus acquisition: one worker process per IBR module / DLL instance.
+
+Each worker owns its own backend (IbrDll or SimulatedIbr), polls its gauges on
+its own DeadlineScheduler and publishes every read, stamped with
+perf_counter_ns, into a shared-memory ring. The supervisor merges the rings
+into one time-ordered stream, so throughput scales with the number of buses
+instead of being limited by one serial bus and one Python thread.
+
+    python multibus.py --simulate --buses 3 --gauges 6 --frequency 10 --seconds 10
+"""
+import os
+import sys
+import time
+import heapq
+import queue
+import struct
+import logging
+import argparse
+import multiprocessing as mp
+from array import array
+from datetime import datetime
+from multiprocessing import shared_memory
+
+from acquisition import SimulatedIbr
+from scheduler import DeadlineScheduler
+from writer import RowWriter
+
+DEFAULT_RING_CAPACITY = 1 << 16
+DEFAULT_MAX_DELAY = 0.5  # seconds a sample may wait for a silent bus before it is emitted anyway
+START_TIMEOUT = 60.0  # seconds to wait for all workers to initialize their device
+_POLL_S = 0.2  # start(): how often to check for workers that died without reporting
+
+# ------------------ Shared-memory Ring ------------------
+#
+# Layout: head (q) | tail (q) | dropped (q) | capacity (q) | records
+#   record: t_ns (q) | devicenr (h) | address (h) | status (h) | pad (2) | value (d)
+# Single producer (the worker) advances head, single consumer (the supervisor)
+# advances tail; a slot is complete before head moves past it.
+
+_CONTROL = struct.Struct("<qqqq")
+_INDEX = struct.Struct("<q")
+_RECORD = struct.Struct("<qhhh2xd")
+
+
+class SharedSampleRing:
+    """
+    Cross-process counterpart of acquisition.SampleRing in a SharedMemory block.
+
+    Create with name=None in the supervisor, attach with the block's name in the
+    worker. When the ring is full new samples are dropped and counted.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY, name: str | None = None):
+        if name is None:
+            size = 1
+            while size < capacity:
+                size <<= 1
+            self._shm = shared_memory.SharedMemory(create=True, size=_CONTROL.size + size * _RECORD.size)
+            _CONTROL.pack_into(self._shm.buf, 0, 0, 0, 0, size)
+            self.owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            size = _CONTROL.unpack_from(self._shm.buf, 0)[3]
+            self.owner = False
+        self.name = self._shm.name
+        self.capacity = size
+        self._mask = size - 1
+        self._buf = self._shm.buf
+
+    def _get(self, offset: int) -> int:
+        return _INDEX.unpack_from(self._buf, offset)[0]
+
+    def __len__(self) -> int:
+        return self._get(0) - self._get(8)
+
+    @property
+    def dropped(self) -> int:
+        return self._get(16)
+
+    def push_many(self, devicenr: int, addresses, values, statuses, times, n: int | None = None) -> int:
+        """Publish the first n reads of a get_values() burst. Returns how many fit."""
+        buf = self._buf
+        n = len(addresses) if n is None else n
+        head = self._get(0)
+        free = self.capacity - (head - self._get(8))
+        fit = min(n, free)
+        mask = self._mask
+        for k in range(fit):
+            _RECORD.pack_into(buf, _CONTROL.size + ((head + k) & mask) * _RECORD.size,
+                              times[k], devicenr, addresses[k], statuses[k], values[k])
+        _INDEX.pack_into(buf, 0, head + fit)  # publish after the slots are complete
+        if fit < n:
+            _INDEX.pack_into(buf, 16, self.dropped + n - fit)
+        return fit
+
+    def drain(self, max_items: int | None = None) -> list[tuple[int, int, int, int, float]]:
+        """Remove and return pending (t_ns, devicenr, address, status, value) tuples, oldest first."""
+        buf = self._buf
+        tail = self._get(8)
+        n = self._get(0) - tail
+        if max_items is not None:
+            n = min(n, max_items)
+        mask = self._mask
+        out = [_RECORD.unpack_from(buf, _CONTROL.size + ((tail + k) & mask) * _RECORD.size) for k in range(n)]
+        _INDEX.pack_into(buf, 8, tail + n)
+        return out
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+# ------------------ Bus Worker ------------------
+
+class Bus:
+    """
+    One acquisition bus: an IBR module (device number) on its own DLL instance.
+
+    dll_path=None runs the bus on SimulatedIbr (read_latency seconds per read),
+    so the whole supervisor can be exercised without Windows or hardware.
+    """
+
+    def __init__(self, module: int, gauge_addresses, dll_path: str | None = None,
+                 setup_path: str | None = None, read_latency: float = 0.0):
+        self.module = module
+        self.gauge_addresses = list(gauge_addresses)
+        self.dll_path = dll_path
+        self.setup_path = setup_path
+        self.read_latency = read_latency
+
+    def open_backend(self):
+        if self.dll_path is None:
+            return SimulatedIbr(read_latency=self.read_latency)
+        from ibrdll import IbrDll  # Windows-only, and only inside the worker process
+        return IbrDll(self.dll_path)
+
+    def __repr__(self):
+        backend = "simulated" if self.dll_path is None else self.dll_path
+        return f"Bus(module={self.module}, gauges={self.gauge_addresses}, {backend})"
+
+
+def bus_worker(bus: Bus, ring_name: str, interval: float, oversample_count: int, stop, status):
+    """
+    Worker process body: init the bus, then poll all its gauges x oversamples
+    every `interval` seconds and publish each read into the shared ring.
+    Reports ("ready", module, rc) and ("done", module, summary) on `status`;
+    rc is the exception text when opening or initializing the backend raised.
+    """
+    ring = None
+    try:
+        ring = SharedSampleRing(name=ring_name)
+        ibr = bus.open_backend()
+        rc = ibr.init_device(bus.setup_path)
+    except Exception as e:
+        rc = f"{type(e).__name__}: {e}"
+    status.put(("ready", bus.module, rc))
+    if rc != 0:
+        if ring is not None:
+            ring.close()
+        return
+
+    burst = bus.gauge_addresses * oversample_count
+    n = len(burst)
+    out = (array("d", bytes(8 * n)), array("h", bytes(2 * n)), array("q", bytes(8 * n)))
+    scheduler = DeadlineScheduler(interval)
+    reads = 0
+    try:
+        scheduler.start()
+        while True:
+            scheduler.wait(stop)
+            if stop.is_set():
+                break
+            values, statuses, times = ibr.get_values(bus.module, burst, out)
+            ring.push_many(bus.module, burst, values, statuses, times, n)
+            reads += n
+    finally:
+        ibr.deinit_device()
+        summary = scheduler.summary()
+        summary["reads"] = reads
+        summary["dropped"] = ring.dropped
+        status.put(("done", bus.module, summary))
+        ring.close()
+
+# ------------------ Supervisor ------------------
+
+class MultiBusSupervisor:
+    """
+    Starts one bus_worker process per Bus and merges their rings.
+
+    drain() returns all samples that can be emitted in time order: a sample is
+    released once every bus has published something at least as new, or once it
+    is older than `max_delay` seconds (so one silent bus cannot stall the rest).
+    """
+
+    def __init__(self, buses, frequency_hz: float, oversample_count: int = 1,
+                 ring_capacity: int = DEFAULT_RING_CAPACITY, max_delay: float = DEFAULT_MAX_DELAY):
+        modules = [bus.module for bus in buses]
+        if len(set(modules)) != len(modules):
+            raise ValueError(f"Bus module numbers must be unique: {modules}")
+        self.buses = list(buses)
+        self.interval = 1 / frequency_hz
+        self.oversample_count = oversample_count
+        self.ring_capacity = ring_capacity
+        self.max_delay_ns = int(max_delay * 1e9)
+
+        self.rings = {}
+        self._processes = {}
+        self._stop = None
+        self._status = None
+        self._pending = []  # heap of samples not yet released
+        self._latest = {}  # module -> newest t_ns seen
+        self.summaries = {}
+        self.emitted = 0
+
+    def start(self, timeout: float = START_TIMEOUT):
+        ctx = mp.get_context("spawn")  # same start method as on Windows
+        self._stop = ctx.Event()
+        self._status = ctx.Queue()
+        for bus in self.buses:
+            ring = self.rings[bus.module] = SharedSampleRing(self.ring_capacity)
+            process = ctx.Process(target=bus_worker, name=f"IbrBus{bus.module}", daemon=True,
+                                  args=(bus, ring.name, self.interval, self.oversample_count,
+                                        self._stop, self._status))
+            process.start()
+            self._processes[bus.module] = process
+
+        try:
+            failed = self._wait_ready(timeout)
+        except BaseException:
+            self.stop()
+            raise
+        if failed:
+            self.stop()
+            raise RuntimeError(f"Device initialization failed on bus(es): {failed}")
+        return self
+
+    def _wait_ready(self, timeout):
+        """Collect every worker's "ready" report; returns [(module, rc)] of the failed ones."""
+        failed = []
+        waiting = {bus.module for bus in self.buses}
+        deadline = time.monotonic() + timeout
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Bus(es) {sorted(waiting)} did not initialize within {timeout:g} s")
+            try:
+                kind, module, rc = self._status.get(timeout=min(remaining, _POLL_S))
+            except queue.Empty:
+                dead = [m for m in waiting if not self._processes[m].is_alive()]
+                if dead and self._status.empty():
+                    codes = {m: self._processes[m].exitcode for m in dead}
+                    raise RuntimeError(f"Bus worker(s) exited before initializing (exit codes {codes})") from None
+                continue
+            waiting.discard(module)
+            if rc != 0:
+                failed.append((module, rc))
+            else:
+                logging.info(f"Bus {module} initialized.")
+        return failed
+
+    def drain(self) -> list[tuple[int, int, int, int, float]]:
+        """Time-ordered (t_ns, module, address, status, value) samples ready to be emitted."""
+        pending = self._pending
+        for module, ring in self.rings.items():
+            samples = ring.drain()
+            if samples:
+                self._latest[module] = samples[-1][0]
+                for sample in samples:
+                    heapq.heappush(pending, sample)
+        if not pending:
+            return []
+        watermark = min(self._latest.get(bus.module, 0) for bus in self.buses)
+        watermark = max(watermark, time.perf_counter_ns() - self.max_delay_ns)
+        out = []
+        while pending and pending[0][0] <= watermark:
+            out.append(heapq.heappop(pending))
+        self.emitted += len(out)
+        return out
+
+    def stop(self, timeout: float = 10.0) -> list[tuple[int, int, int, int, float]]:
+        """Stop all workers and return the remaining samples in time order."""
+        if self._stop is not None:
+            self._stop.set()
+        for module, process in self._processes.items():
+            process.join(timeout)
+            if process.is_alive():
+                logging.warning(f"Bus {module} worker did not stop; terminating.")
+                process.terminate()
+        while self._status is not None and not self._status.empty():
+            kind, module, summary = self._status.get()
+            if kind == "done":
+                self.summaries[module] = summary
+
+        rest = []
+        for ring in self.rings.values():
+            rest.extend(ring.drain())
+        for sample in rest:
+            heapq.heappush(self._pending, sample)
+        rest = [heapq.heappop(self._pending) for _ in range(len(self._pending))]
+        self.emitted += len(rest)
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+        self._processes = {}
+        return rest
+
+# ------------------ Main ------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll several IBR buses in parallel worker processes.")
+    parser.add_argument("--simulate", action="store_true", help="use SimulatedIbr instead of the DLL")
+    parser.add_argument("--buses", type=int, default=2, help="number of modules (device numbers 1..N)")
+    parser.add_argument("--gauges", type=int, default=6, help="gauges per bus")
+    parser.add_argument("--frequency", type=float, default=1.0, help="ticks per second on every bus")
+    parser.add_argument("--oversamples", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--read-latency", type=float, default=0.01, help="simulated seconds per read")
+    parser.add_argument("--output", help="CSV of merged samples (default: Measurements/multibus_<time>.csv)")
+    args = parser.parse_args(argv)
+
+    import main3  # configuration only
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    dll_path = None if args.simulate else main3.DLL_PATH
+    buses = [Bus(module, range(1, args.gauges + 1), dll_path=dll_path, setup_path=main3.SETUP_PATH,
+                 read_latency=args.read_latency) for module in range(1, args.buses + 1)]
+    output = args.output
+    if output is None:
+        os.makedirs(main3.OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(main3.OUTPUT_DIR, f"multibus_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.csv")
+
+    supervisor = MultiBusSupervisor(buses, args.frequency, oversample_count=args.oversamples)
+    with open(output, mode="w", newline="", encoding="utf-8") as f:
+        writer = RowWriter(f, console_hz=0)
+        writer.write(["t_ns", "Module", "Address", "Status", "Value"])
+        supervisor.start()
+        t0 = time.monotonic()
+        try:
+            while time.monotonic() - t0 < args.seconds:
+                for sample in supervisor.drain():
+                    writer.write(sample)
+                time.sleep(min(supervisor.interval / 4, 0.05))
+        except KeyboardInterrupt:
+            print("\nStopping.")
+        finally:
+            for sample in supervisor.stop():
+                writer.write(sample)
+            writer.close()
+    elapsed = time.monotonic() - t0
+
+    for module, summary in sorted(supervisor.summaries.items()):
+        logging.info(f"Bus {module}: {summary['reads']} reads, {summary['overruns']} overruns, "
+                     f"{summary['dropped']} dropped, jitter {summary['jitter_s'] * 1e3:.2f} ms")
+    logging.info(f"{supervisor.emitted} samples in {elapsed:.1f} s ({supervisor.emitted / elapsed:.0f}/s) -> {output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+import math
+
+# ------------------ Multi-Rate Schedule ------------------
+#
+# Gauges share one serial bus, so every read of a slow reference gauge costs a
+# fast probe bus time. In multi-rate mode the session ticks at the fastest
+# gauge's rate and each gauge has its own period (a whole number of ticks) and
+# oversample count. A gauge's reads are spread over its whole period, using the
+# bus time the fast gauges leave over, and its value is written once, in the
+# tick that ends the period. Reads are handed out by priority, then deadline
+# (earliest first), within the per-tick read budget; rows are sparse, with an
+# empty cell for every gauge that did not complete a period in that tick.
+
+
+class GaugeRate:
+    __slots__ = ("addr", "rate_hz", "ticks", "oversamples", "priority", "due_tick", "pending")
+
+    def __init__(self, addr: int, rate_hz: float, ticks: int, oversamples: int, priority: int):
+        self.addr = addr
+        self.rate_hz = rate_hz
+        self.ticks = ticks  # period in ticks
+        self.oversamples = oversamples
+        self.priority = priority
+        self.due_tick = ticks - 1  # tick index that ends the current period
+        self.pending = oversamples  # reads still to hand out in the current period
+
+    def __repr__(self):
+        return (f"GaugeRate(#{self.addr}, {self.rate_hz:g} Hz = every {self.ticks} tick(s), "
+                f"{self.oversamples}x, priority {self.priority})")
+
+
+class MultiRatePlanner:
+    """
+    Per-tick read plans for gauges sampled at different rates on one bus.
+
+    gauge_rates: {address: (rate_hz, oversamples)} or (rate_hz, oversamples,
+    priority); a smaller priority is served first (default 0, then earliest
+    deadline). Periods are rounded to whole ticks of the fastest rate.
+    """
+
+    def __init__(self, gauge_addresses, gauge_rates):
+        missing = [addr for addr in gauge_addresses if addr not in gauge_rates]
+        if missing:
+            raise ValueError(f"No rate configured for gauge(s) {missing}")
+        specs = {}
+        for addr in gauge_addresses:
+            rate_hz, oversamples, *rest = gauge_rates[addr]
+            if rate_hz <= 0 or oversamples < 1:
+                raise ValueError(f"Gauge #{addr}: rate must be positive and oversamples at least 1.")
+            specs[addr] = (float(rate_hz), int(oversamples), int(rest[0]) if rest else 0)
+        self.frequency_hz = max(rate for rate, _, _ in specs.values())
+        self.tick_interval = 1 / self.frequency_hz
+        self.gauges = [GaugeRate(addr, rate, max(1, round(self.frequency_hz / rate)), oversamples, priority)
+                       for addr, (rate, oversamples, priority) in specs.items()]
+        self._start = None
+
+    @property
+    def max_reads(self) -> int:
+        """Most reads one tick can be planned with: every gauge's full period at once."""
+        return sum(g.oversamples for g in self.gauges)
+
+    def reads_per_second(self) -> float:
+        return sum(g.oversamples * self.frequency_hz / g.ticks for g in self.gauges)
+
+    def validate(self, per_read: float, budget: float = 1.0):
+        """Raise ValueError if the schedule needs more than `budget` of the bus at `per_read` seconds per read."""
+        load = self.reads_per_second() * per_read
+        if load > budget:
+            raise ValueError(
+                f"Gauge rates need {self.reads_per_second():.1f} reads/s x {per_read * 1e3:.1f} ms = "
+                f"{load:.0%} of the bus, but only {budget:.0%} is available; lower rates or oversampling.")
+        # The fast gauges' full bursts have to fit into one tick, spreading cannot help them
+        tick_reads = sum(g.oversamples for g in self.gauges if g.ticks == 1)
+        if tick_reads * per_read > budget * self.tick_interval:
+            raise ValueError(
+                f"{tick_reads} read(s) per tick for the {self.frequency_hz:g} Hz gauges need "
+                f"{tick_reads * per_read * 1e3:.1f} ms, but one tick leaves {budget * self.tick_interval * 1e3:.1f} ms.")
+
+    def start(self, now: float):
+        self._start = now
+        for g in self.gauges:
+            g.due_tick = g.ticks - 1
+            g.pending = g.oversamples
+
+    def tick_index(self, now: float) -> int:
+        return round((now - self._start) / self.tick_interval)
+
+    def plan(self, tick: int, max_reads: int) -> list[int]:
+        """
+        Addresses to read in `tick`, at most `max_reads`, interleaved round-robin.
+        Gauges at the end of their period get all their remaining reads, the
+        others an even share of what is left over the ticks until their deadline.
+        """
+        order = sorted(self.gauges, key=lambda g: (g.priority, g.due_tick, g.ticks))
+        takes = []
+        budget = max_reads
+        for g in order:
+            if budget <= 0:
+                break
+            if not g.pending:
+                continue
+            # Past its deadline (skipped ticks) counts as due now
+            want = math.ceil(g.pending / max(g.due_tick - tick + 1, 1))
+            take = min(want, budget)
+            g.pending -= take
+            budget -= take
+            takes.append((g.addr, take))
+
+        burst = []
+        for r in range(max((take for _, take in takes), default=0)):
+            burst.extend(addr for addr, take in takes if take > r)
+        return burst
+
+    def complete(self, tick: int) -> list[int]:
+        """Addresses whose period ends with `tick` (their value is written now); starts their next period."""
+        done = []
+        for g in self.gauges:
+            if g.due_tick <= tick:
+                done.append(g.addr)
+                g.due_tick = (tick + 1) // g.ticks * g.ticks + g.ticks - 1
+                g.pending = g.oversamples
+        return done
+
+    def describe(self) -> str:
+        return ", ".join(f"#{g.addr} {g.rate_hz:g} Hz x{g.oversamples}" + (f" p{g.priority}" if g.priority else "")
+                         for g in self.gauges)
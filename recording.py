@@ -0,0 +1,174 @@
+import os
+import csv
+import json
+import math
+import time
+import struct
+from datetime import datetime
+
+# ------------------ Binary Recording Format ------------------
+#
+# Layout (little endian, append-only):
+#   header:  magic (8s) | header_len (u32) | version (u16) | n_gauges (u16) | JSON metadata, space padded
+#            so that header_len is a multiple of 8
+#   records: t_ns (i8, time.monotonic_ns) | value[n] (f8, NaN = no valid sample) | status[n] (i4) | pad
+#            each record padded to a multiple of 8 bytes
+# Version 1 files stored status as i2; they are still readable. Statuses outside the i4 range
+# (push-mode DWORD intval) are clamped.
+#
+# The JSON metadata holds the gauge addresses/descriptions plus one (wall_ns, mono_ns)
+# anchor pair so monotonic timestamps can be turned back into wall-clock time.
+
+MAGIC = b"IBRREC\x00\x01"
+VERSION = 2
+_STATUS_CODES = {1: "h", 2: "i"}  # status struct code per format version
+_STATUS_MIN, _STATUS_MAX = -(1 << 31), (1 << 31) - 1
+_PREFIX = struct.Struct("<8sIHH")
+
+# Status code stored when a gauge has no valid sample in a tick and no DLL status is known
+STATUS_NO_DATA = -1
+# Status code of the marker record written where the device was being re-initialized
+STATUS_GAP = -2
+# Status code of a gauge that was not due in a multi-rate tick (see multirate.py)
+STATUS_NOT_DUE = -3
+
+
+def _record_layout(n_gauges: int, version: int = VERSION) -> tuple[str, int]:
+    code = _STATUS_CODES[version]
+    raw = 8 + 8 * n_gauges + struct.calcsize(code) * n_gauges
+    pad = (-raw) % 8
+    return f"<q{n_gauges}d{n_gauges}{code}{pad}x", raw + pad
+
+
+class BinaryRecorder:
+    """
+    Append-only fixed-width recorder. One record per tick; no text formatting.
+
+    Exposes writerows()/flush() so it can be handed to writer.RowWriter in place
+    of a CSV file; each row is (t_ns, values, statuses).
+    """
+
+    def __init__(self, path, gauge_addresses, gauge_descriptions, frequency_hz=None):
+        self.path = path
+        self.n_gauges = len(gauge_addresses)
+        fmt, self.record_size = _record_layout(self.n_gauges)
+        self._struct = struct.Struct(fmt)
+        self._nan = float("nan")
+
+        meta = {
+            "gauge_addresses": list(gauge_addresses),
+            "gauge_descriptions": [gauge_descriptions.get(addr, f"Gauge {addr}") for addr in gauge_addresses],
+            "frequency_hz": frequency_hz,
+            "anchor_wall_ns": time.time_ns(),
+            "anchor_mono_ns": time.monotonic_ns(),
+        }
+        body = json.dumps(meta).encode("utf-8")
+        header_len = _PREFIX.size + len(body)
+        pad = (-header_len) % 8
+        header_len += pad
+
+        self.meta = meta
+        self._file = open(path, "wb")
+        self._file.write(_PREFIX.pack(MAGIC, header_len, VERSION, self.n_gauges))
+        self._file.write(body + b" " * pad)
+        self._file.flush()
+        self.records = 0
+
+    def write(self, t_ns: int, values, statuses):
+        nan = self._nan
+        values = [nan if v is None else v for v in values]
+        try:
+            record = self._struct.pack(t_ns, *values, *statuses)
+        except struct.error:
+            statuses = [min(max(int(s), _STATUS_MIN), _STATUS_MAX) for s in statuses]
+            record = self._struct.pack(t_ns, *values, *statuses)
+        self._file.write(record)
+        self.records += 1
+
+    def writerows(self, rows):
+        for t_ns, values, statuses in rows:
+            self.write(t_ns, values, statuses)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def size(self) -> int:
+        return self._file.tell()
+
+    def row_time(self, row):
+        return wall_time(self.meta, row[0]).isoformat()
+
+# ------------------ Reader ------------------
+
+def read_header(path) -> tuple[dict, int]:
+    """Return (metadata, header_len) of a binary recording."""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path}: file too short for a recording header")
+        magic, header_len, version, n_gauges = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an IBR binary recording")
+        if version not in _STATUS_CODES:
+            raise ValueError(f"{path}: unsupported recording version {version}")
+        meta = json.loads(f.read(header_len - _PREFIX.size).decode("utf-8"))
+    meta["n_gauges"] = n_gauges
+    meta["version"] = version
+    return meta, header_len
+
+
+def record_dtype(n_gauges: int, version: int = VERSION):
+    import numpy as np  # only needed for reading
+    _, size = _record_layout(n_gauges, version)
+    status = "<i2" if version == 1 else "<i4"
+    return np.dtype({
+        "names": ["t_ns", "value", "status"],
+        "formats": ["<i8", ("<f8", (n_gauges,)), (status, (n_gauges,))],
+        "offsets": [0, 8, 8 + 8 * n_gauges],
+        "itemsize": size,
+    })
+
+
+def open_recording(path):
+    """
+    Memory-map a binary recording without parsing it.
+
+    Returns (metadata, records) where records is a read-only structured array with
+    fields t_ns (n,), value (n, gauges) and status (n, gauges). A partial trailing
+    record (e.g. after a crash) is ignored.
+    """
+    import numpy as np  # only needed for reading
+    meta, header_len = read_header(path)
+    dtype = record_dtype(meta["n_gauges"], meta["version"])
+    count = (os.path.getsize(path) - header_len) // dtype.itemsize
+    if count == 0:
+        return meta, np.zeros(0, dtype=dtype)
+    return meta, np.memmap(path, dtype=dtype, mode="r", offset=header_len, shape=(count,))
+
+
+def wall_time(meta, t_ns) -> datetime:
+    """Convert a recorded monotonic timestamp to local wall-clock time."""
+    wall_ns = meta["anchor_wall_ns"] + (int(t_ns) - meta["anchor_mono_ns"])
+    return datetime.fromtimestamp(wall_ns / 1e9).astimezone()
+
+
+_NAN_CELLS = {STATUS_GAP: "gap", STATUS_NOT_DUE: ""}
+
+
+def to_csv(path, csv_path, precision: int = 8):
+    """Convert a binary recording to the CSV layout written by MeasurementSession."""
+    meta, records = open_recording(path)
+    fmt = f"{{:.{precision}f}}"
+    with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp"] + meta["gauge_descriptions"])
+        for rec in records:
+            row = [wall_time(meta, rec["t_ns"]).isoformat()]
+            row.extend(_NAN_CELLS.get(s, "error") if math.isnan(v) else fmt.format(v)
+                       for v, s in zip(rec["value"].tolist(), rec["status"].tolist()))
+            writer.writerow(row)
+    return len(records)
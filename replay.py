@@ -0,0 +1,237 @@
+"""
+Replay backend: the IbrDll interface on top of a recorded measurement CSV or a
+synthetic profile, so the whole pipeline can run on Linux without hardware.
+
+    python replay.py Measurements/measurement_2025-01-01T08-00-00.csv --speed 600
+    python replay.py synthetic --frequency 1 --hours 8 --speed 3600 --oor-rate 0.01
+"""
+import os
+import csv
+import sys
+import math
+import gzip
+import time
+import random
+import logging
+import argparse
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from acquisition import SimulatedIbr
+from timeindex import parse_time, gauge_columns
+
+OUT_OF_RANGE = 136
+
+# ------------------ Profiles ------------------
+
+def load_profile(path, gauge_addresses=None):
+    """
+    Load a measurement CSV (plain, deadband or .gz) for replay.
+
+    Returns (times, series, names, start): seconds since the first row,
+    {address: values} with None for failed reads, {address: recorded column
+    name} and the first row's timestamp as an aware datetime. Empty deadband
+    cells hold the previous value. Gauge columns map to gauge_addresses in
+    order (default 1, 2, 3, ...).
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        names = gauge_columns(header)
+        columns = [header.index(name) for name in names]
+        if gauge_addresses is None:
+            gauge_addresses = list(range(1, len(names) + 1))
+        if len(gauge_addresses) != len(names):
+            raise ValueError(f"{path}: {len(names)} gauge columns but {len(gauge_addresses)} addresses")
+
+        times = []
+        series = {addr: [] for addr in gauge_addresses}
+        last = {addr: None for addr in gauge_addresses}
+        t0 = start = None
+        for record in reader:
+            if not record:
+                continue
+            try:
+                t = parse_time(record[0])
+            except ValueError:
+                continue
+            if t0 is None:
+                t0 = t
+                start = datetime.fromisoformat(record[0])
+                if start.tzinfo is None:
+                    start = start.astimezone()  # naive = local time, like parse_time
+            times.append(t - t0)
+            for addr, c in zip(gauge_addresses, columns):
+                cell = record[c] if c < len(record) else ""
+                if cell != "":
+                    try:
+                        last[addr] = float(cell)
+                    except ValueError:
+                        last[addr] = None  # "error" / "gap"
+                series[addr].append(last[addr])
+    if not times:
+        raise ValueError(f"{path}: no data rows to replay")
+    return times, series, dict(zip(gauge_addresses, names)), start
+
+
+def drift_profile(rate: float = 1e-6, amplitude: float = 0.0, period: float = 3600.0,
+                  noise: float = 0.0, seed=None):
+    """
+    Synthetic profile(address, t): address + rate * t + a sine of `amplitude` and
+    `period` seconds (thermal cycle) + Gaussian noise.
+    """
+    rng = random.Random(seed)
+
+    def profile(address, t):
+        value = address + rate * t
+        if amplitude:
+            value += amplitude * math.sin(2 * math.pi * t / period)
+        if noise:
+            value += rng.gauss(0.0, noise)
+        return value
+    return profile
+
+# ------------------ Replay Backend ------------------
+
+class ReplayIbr(SimulatedIbr):
+    """
+    Stand-in for IbrDll that plays back a recording or a profile function.
+
+    source: path of a measurement CSV, or a callable profile(address, t) -> value
+            (None = failed read), t in seconds since init_device.
+    speed: time acceleration; replay time advances `speed` seconds per real second
+           and read_latency / init_time shrink by the same factor.
+    error_rate / error_status: injected failed reads; out_of_range_rate: status 136.
+    Recorded failures replay as `recorded_error_status`. When a recording ends it
+    loops if `loop`, else the last row is held and `finished` is set.
+
+    now() is the wall clock in replay time (from the recording's first row, or
+    from init_device for a profile); MeasurementSession stamps its rows with it.
+    names holds the recorded gauge column names ({} for a profile).
+    """
+
+    def __init__(self, source, *, speed: float = 1.0, gauge_addresses=None, read_latency: float = 0.0,
+                 init_time: float = 0.0, error_rate: float = 0.0, error_status: int = 1,
+                 out_of_range_rate: float = 0.0, recorded_error_status: int = OUT_OF_RANGE,
+                 loop: bool = False, seed=None):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive.")
+        super().__init__(read_latency=read_latency / speed, noise=0.0, out_of_range_rate=out_of_range_rate,
+                         init_time=init_time / speed, seed=seed)
+        self.speed = speed
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.recorded_error_status = recorded_error_status
+        self.loop = loop
+        self.finished = False
+        if callable(source):
+            self.profile = source
+            self.times = self.series = self.start = None
+            self.names = {}
+        else:
+            self.profile = None
+            self.times, self.series, self.names, self.start = load_profile(source, gauge_addresses)
+        self._start = None
+
+    def init_device(self, setup_filename=None, *, timeout_s: float = 30.0, imb_control: int = 1) -> int:
+        rc = super().init_device(setup_filename, timeout_s=timeout_s, imb_control=imb_control)
+        if self._start is None:
+            self._start = time.perf_counter()  # replay time keeps running across re-inits
+            if self.start is None:
+                self.start = datetime.now().astimezone()
+        return rc
+
+    def now(self) -> datetime:
+        """Wall-clock time in the replay."""
+        if self.start is None:
+            return datetime.now().astimezone()
+        return self.start + timedelta(seconds=self.replay_time)
+
+    @property
+    def replay_time(self) -> float:
+        """Seconds of recorded/profile time played so far."""
+        if self._start is None:
+            return 0.0
+        return (time.perf_counter() - self._start) * self.speed
+
+    def _recorded(self, address, t):
+        values = self.series.get(address)
+        if values is None:
+            return None
+        times = self.times
+        duration = times[-1]
+        if t > duration:
+            if self.loop and duration > 0:
+                t %= duration
+            else:
+                self.finished = True
+        i = max(bisect_right(times, t) - 1, 0)
+        return values[i]
+
+    def get_value(self, devicenr: int, address: int) -> tuple[int, float]:
+        if self.read_latency:
+            time.sleep(self.read_latency)
+        if not self.initialized:
+            return -1, 0.0
+        rng = self._rng
+        if self.error_rate and rng.random() < self.error_rate:
+            return self.error_status, 0.0
+        if self.out_of_range_rate and rng.random() < self.out_of_range_rate:
+            return OUT_OF_RANGE, 0.0
+        t = self.replay_time
+        value = self.profile(address, t) if self.profile is not None else self._recorded(address, t)
+        if value is None:
+            return self.recorded_error_status, 0.0
+        return 0, value
+
+# ------------------ Main ------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a MeasurementSession against a replayed recording.")
+    parser.add_argument("source", help="measurement CSV to replay, or 'synthetic'")
+    parser.add_argument("--speed", type=float, default=60.0, help="replay seconds per real second")
+    parser.add_argument("--frequency", type=float, default=1.0, help="sampling rate in replay time (Hz)")
+    parser.add_argument("--hours", type=float, help="replay-time duration (default: whole recording)")
+    parser.add_argument("--gauges", help="gauge addresses, e.g. 1-3,6 (default: one per recorded column)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per read in replay time")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--oor-rate", type=float, default=0.0, help="fraction of reads returning 136")
+    parser.add_argument("--output", help="output CSV (default: Measurements/replay_<time>.csv)")
+    args = parser.parse_args(argv)
+
+    import main3
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    gauges = main3.parse_sensor_selection(args.gauges) if args.gauges else None
+    if args.source == "synthetic":
+        source = drift_profile(rate=1e-7, amplitude=2e-5, noise=1e-6)
+        gauges = gauges or list(main3.DEFAULT_GAUGE_DESCRIPTIONS)
+        hours = args.hours if args.hours is not None else 1.0
+    else:
+        source = args.source
+    ibr = ReplayIbr(source, speed=args.speed, gauge_addresses=gauges, read_latency=args.latency,
+                    error_rate=args.error_rate, out_of_range_rate=args.oor_rate)
+    if ibr.series is not None:
+        gauges = list(ibr.series)
+        hours = args.hours if args.hours is not None else ibr.times[-1] / 3600
+
+    output = args.output
+    if output is None:
+        os.makedirs(main3.OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(main3.OUTPUT_DIR, f"replay_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.csv")
+
+    # The session runs in real time: compress its rate and duration by the same factor
+    main3.CONSOLE_REFRESH_HZ = 0
+    descriptions = ibr.names or {addr: main3.DEFAULT_GAUGE_DESCRIPTIONS.get(addr, f"Gauge {addr}") for addr in gauges}
+    session = main3.MeasurementSession(ibr, gauges, descriptions, args.frequency * args.speed,
+                                       hours / args.speed, output)
+    t0 = time.perf_counter()
+    session.run()
+    elapsed = time.perf_counter() - t0
+    logging.info(f"Replayed {ibr.replay_time / 3600:.2f} h in {elapsed:.1f} s "
+                 f"({session.total_samples} samples) -> {output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,105 @@
+import math
+import time
+
+OVERRUN_POLICIES = ("skip", "burst")
+
+# ------------------ Deadline Scheduler ------------------
+
+class DeadlineScheduler:
+    """
+    Fixed-rate tick scheduler on absolute time.monotonic() deadlines.
+
+    Tick k is due at start + k * interval no matter how long the previous tick's
+    work took, so formatting, writing and printing time never accumulates as drift.
+    When a tick is late by more than a whole interval, the overrun policy decides
+    what happens to the deadlines that were missed:
+      - "skip":  drop them and resume on the grid (rate stays aligned, samples lost)
+      - "burst": run them back to back until caught up, at most `max_burst` in a
+                 row; anything beyond that is skipped
+    """
+
+    def __init__(self, interval: float, policy: str = "skip", max_burst: int = 10):
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{policy}'. Valid: {OVERRUN_POLICIES}")
+        self.interval = interval
+        self.policy = policy
+        self.max_burst = max_burst
+
+        self._next = None
+        self._burst = 0
+
+        self.ticks = 0
+        self.overruns = 0       # ticks that started after the following deadline had already passed
+        self.skipped = 0        # deadlines dropped by the policy
+        self.max_lateness = 0.0
+        self._mean_lateness = 0.0
+        self._m2_lateness = 0.0  # Welford running sum of squares
+
+    def start(self, delay: float = 0.0):
+        """Set the first deadline `delay` seconds from now."""
+        self._next = time.monotonic() + delay
+        self._burst = 0
+
+    def wait(self, stop=None) -> int:
+        """
+        Sleep until the next deadline and account for its lateness.
+        Returns the number of deadlines skipped before this tick (0 if on time).
+
+        stop: optional threading.Event; when it is set the wait ends early and
+              returns 0 without consuming the deadline.
+        """
+        if self._next is None:
+            self.start()
+
+        now = time.monotonic()
+        delay = self._next - now
+        if delay > 0:
+            if stop is None:
+                time.sleep(delay)
+            elif stop.wait(delay):
+                return 0
+            now = time.monotonic()
+
+        skipped = 0
+        behind = math.floor((now - self._next) / self.interval)
+        if behind >= 1:
+            self.overruns += 1
+            if self.policy == "skip":
+                skipped = behind
+            elif self._burst >= self.max_burst:
+                # Burst budget used up: drop what is still outstanding
+                skipped = behind
+                self._burst = 0
+            else:
+                self._burst += 1
+        else:
+            self._burst = 0
+
+        if skipped:
+            self._next += skipped * self.interval
+            self.skipped += skipped
+
+        self._record(now - self._next)
+        self._next += self.interval
+        return skipped
+
+    def _record(self, lateness: float):
+        self.ticks += 1
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+        d = lateness - self._mean_lateness
+        self._mean_lateness += d / self.ticks
+        self._m2_lateness += d * (lateness - self._mean_lateness)
+
+    def summary(self) -> dict:
+        jitter = math.sqrt(self._m2_lateness / (self.ticks - 1)) if self.ticks > 1 else 0.0
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "mean_lateness_s": self._mean_lateness,
+            "max_lateness_s": self.max_lateness,
+            "jitter_s": jitter,
+        }
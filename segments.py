@@ -0,0 +1,138 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import logging
+import threading
+
+# ------------------ Compression Worker ------------------
+
+def compress_segment(path: str) -> tuple[str, int]:
+    """gzip `path` to `path.gz` and remove the original. Runs in a worker process."""
+    gz_path = path + ".gz"
+    tmp = gz_path + ".tmp"
+    with open(path, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp, gz_path)
+    os.remove(path)
+    return gz_path, os.path.getsize(gz_path)
+
+# ------------------ Segmented Output ------------------
+
+class SegmentedOutput:
+    """
+    RowWriter sink that splits one recording into numbered segment files.
+
+    A new segment starts once the current one reaches `max_bytes` or has been
+    open for `max_seconds`. Each closed segment gets a manifest line (file, first
+    and last row time, row count, size) in `<base>.manifest.jsonl`, and is then
+    gzip-compressed by a separate worker process, so neither the writer thread
+    nor the acquisition loop waits for compression.
+
+    open_segment(path) must return a sink with writerows(), flush(), close(),
+    a `size` property and row_time(row) (writer.CsvOutput, recording.BinaryRecorder).
+    """
+
+    def __init__(self, base_path: str, extension: str, open_segment, *, max_bytes: int | None = None,
+                 max_seconds: float | None = None, compress: bool = True):
+        if max_bytes is None and max_seconds is None:
+            raise ValueError("Segmented output needs max_bytes and/or max_seconds.")
+        self.base_path = base_path
+        self.extension = extension
+        self.open_segment = open_segment
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compress = compress
+        self.manifest_path = f"{base_path}.manifest.jsonl"
+
+        self._executor = None
+        self._manifest_lock = threading.Lock()
+
+        self.index = 0
+        self._sink = None
+        self._open_next()
+
+    def _segment_path(self, index: int) -> str:
+        return f"{self.base_path}_{index:04d}.{self.extension}"
+
+    def _open_next(self):
+        self.index += 1
+        path = self._segment_path(self.index)
+        self._sink = self.open_segment(path)
+        self._path = path
+        self._opened = time.monotonic()
+        self._rows = 0
+        self._first = None
+        self._last = None
+
+    def _append_manifest(self, entry: dict):
+        with self._manifest_lock:
+            with open(self.manifest_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _on_compressed(self, path, future):
+        try:
+            gz_path, size = future.result()
+        except Exception as e:
+            logging.error(f"Compressing segment {path} failed: {e}")
+            return
+        self._append_manifest({"event": "compressed", "file": os.path.basename(path),
+                               "compressed_file": os.path.basename(gz_path), "bytes": size})
+
+    def _close_current(self):
+        sink, path = self._sink, self._path
+        sink.flush()
+        size = sink.size
+        sink.close()
+        self._sink = None
+        if not self._rows and self.index > 1:
+            os.remove(path)  # rotated but nothing arrived before close
+            return
+        self._append_manifest({
+            "event": "segment",
+            "index": self.index,
+            "file": os.path.basename(path),
+            "start": self._first,
+            "end": self._last,
+            "rows": self._rows,
+            "bytes": size,
+        })
+        if self.compress and self._rows:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor  # first compression only
+                self._executor = ProcessPoolExecutor(max_workers=1)
+            future = self._executor.submit(compress_segment, path)
+            future.add_done_callback(lambda f, p=path: self._on_compressed(p, f))
+
+    def _due(self) -> bool:
+        if self.max_bytes is not None and self._sink.size >= self.max_bytes:
+            return True
+        return self.max_seconds is not None and time.monotonic() - self._opened >= self.max_seconds
+
+    def writerows(self, rows):
+        if not rows:
+            return
+        sink = self._sink
+        sink.writerows(rows)
+        if self._first is None:
+            self._first = sink.row_time(rows[0])
+        self._last = sink.row_time(rows[-1])
+        self._rows += len(rows)
+        if self._due():
+            self._close_current()
+            self._open_next()
+
+    def flush(self):
+        self._sink.flush()
+
+    def close(self, wait: bool = True):
+        """Close the last segment; with wait=True also wait for outstanding compression."""
+        if self._sink is not None:
+            self._close_current()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    @property
+    def size(self) -> int:
+        return self._sink.size if self._sink is not None else 0
@@ -0,0 +1,18 @@
+import csv
+
+from acquisition import CallbackAcquisition, SimulatedIbr
+from main3 import MeasurementSession
+
+
+def test_push_mode_session_with_simulated_source(tmp_path):
+    ibr = SimulatedIbr(seed=1)
+    path = str(tmp_path / "push.csv")
+    session = MeasurementSession(ibr, [1, 2], {1: "a", 2: "b"}, 20, 0.5 / 3600, path,
+                                 acquisition=CallbackAcquisition(ibr))
+    session.run()
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:3] == ["Timestamp", "a", "b"]
+    values = [float(row[1]) for row in rows[1:] if row[1] not in ("", "error", "gap")]
+    assert values and all(abs(v) < 1.0 for v in values)
@@ -0,0 +1,50 @@
+import random
+import statistics
+
+import pytest
+
+from aggregation import GaugeAccumulator, TickAggregator
+
+
+def test_welford_matches_statistics():
+    rng = random.Random(4)
+    samples = [1e3 + rng.gauss(0, 1e-4) for _ in range(200)]  # large offset, tiny spread
+    acc = GaugeAccumulator()
+    for x in samples:
+        acc.add(x)
+    assert acc.mean == pytest.approx(statistics.mean(samples), rel=1e-15)
+    assert acc.variance == pytest.approx(statistics.variance(samples), rel=1e-6)
+    assert acc.std == pytest.approx(statistics.stdev(samples), rel=1e-6)
+    assert (acc.min, acc.max) == (min(samples), max(samples))
+
+
+def test_reset_between_ticks():
+    acc = GaugeAccumulator()
+    for x in (5.0, 7.0):
+        acc.add(x)
+    acc.reset()
+    for x in (1.0, 2.0, 4.0):
+        acc.add(x)
+    assert acc.mean == pytest.approx(statistics.mean([1.0, 2.0, 4.0]))
+    assert acc.variance == pytest.approx(statistics.variance([1.0, 2.0, 4.0]))
+
+
+@pytest.mark.parametrize("reducer", ["mean", "median", "trimmed"])
+def test_single_sample_and_all_failed_ticks(reducer):
+    agg = TickAggregator([1, 2], capacity=8, reducer=reducer)
+    agg.add(1, 3.25, t_ns=1000)  # gauge 2: every read of the tick failed
+    assert agg.value(1) == 3.25
+    assert agg.value(2) is None
+    one, failed = agg.accumulators[1], agg.accumulators[2]
+    assert (one.variance, one.std, one.spread, one.t_center) == (0.0, 0.0, 0.0, 1000)
+    assert (failed.count, failed.variance, failed.spread, failed.t_center) == (0, 0.0, 0.0, 0.0)
+
+
+def test_median_and_trimmed_mean():
+    samples = [3.0, 1.0, 100.0, 2.0, 4.0, -50.0, 5.0, 6.0, 7.0, 8.0]
+    median, trimmed = TickAggregator([1], 16, "median"), TickAggregator([1], 16, "trimmed", trim=0.1)
+    for x in samples:
+        median.add(1, x)
+        trimmed.add(1, x)
+    assert median.value(1) == statistics.median(samples)
+    assert trimmed.value(1) == pytest.approx(statistics.mean(sorted(samples)[1:-1]))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from alignment import align_csv, common_grid, resample, sample_times
+from writer import CsvOutput
+
+HEADER = ["Timestamp", "a", "b", "a t", "b t"]
+
+
+def test_sample_times_apply_the_read_skew():
+    rows = [[100.0, 1.0, 2.0, 10.0, 60.0], [101.0, None, 3.0, None, 60.0]]
+    names, times, values = sample_times(HEADER, rows)
+    assert names == ["a", "b"]
+    assert times[0] == pytest.approx([100.01, 100.06])
+    assert np.isnan(times[1, 0]) and times[1, 1] == pytest.approx(101.06)  # a failed read has no time
+
+
+def test_resample_interpolates_across_gaps_and_leaves_edges_empty():
+    t = np.array([0.0, 1.0, 2.0, 5.0, 6.0])
+    times = np.column_stack([t, t + 0.5])
+    values = np.column_stack([t * 2, -t])
+    grid = np.array([0.25, 0.5, 3.5, 6.0, 6.25])
+
+    out = resample(times, values, grid)
+    assert np.isnan(out[0, 1])  # before b's first sample
+    assert out[:4, 0] == pytest.approx([0.5, 1.0, 7.0, 12.0])  # linear across the 2..5 s gap
+    assert np.isnan(out[4, 0])  # after a's last sample
+    assert out[1:, 1] == pytest.approx([-0.0, -3.0, -5.5, -5.75])
+
+    gapped = resample(times, values, grid, max_gap=2.0)
+    assert np.isnan(gapped[2]).all()  # inside the 3 s gap on both gauges
+    assert gapped[1, 0] == pytest.approx(1.0) and gapped[3, 1] == pytest.approx(-5.5)
+
+
+def test_common_grid_covers_the_shared_span():
+    t = np.arange(10.0)
+    times = np.column_stack([t, t + 0.3, np.full(10, np.nan)])  # the third gauge never read
+    grid = common_grid(times)
+    assert grid[0] == pytest.approx(0.3) and grid[-1] <= 9.0
+    assert np.diff(grid) == pytest.approx(np.ones(len(grid) - 1))
+
+
+def test_align_csv(tmp_path):
+    path = str(tmp_path / "run.csv")
+    out = CsvOutput(path, HEADER, index_every=1)
+    out.writerows([[f"2025-01-01T00:00:{i:02d}+00:00", f"{i:.1f}", f"{10 + i:.1f}", "0", "500"] for i in range(6)])
+    out.close()
+
+    names, grid, values = align_csv(path)
+    assert names == ["a", "b"] and len(grid) == 5
+    # On b's sample times, a is interpolated half-way between its rows
+    assert values[:, 0] == pytest.approx(np.arange(5) + 0.5)
+    assert values[:, 1] == pytest.approx(10 + np.arange(5))
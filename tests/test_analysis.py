@@ -0,0 +1,58 @@
+import csv
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from analysis import analyze
+
+HEADER = ["Timestamp", "a", "b"]
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i, cells in rows:
+            writer.writerow([(START + timedelta(seconds=0.1 * i)).isoformat()] + cells)
+
+
+def _walk(n, seed):
+    return np.round(np.cumsum(np.random.default_rng(seed).normal(0, 0.004, n)), 2)
+
+
+def test_deadband_recording_matches_full_recording(tmp_path):
+    n = 5000
+    a, b = _walk(n, 1), _walk(n, 2)
+    full = [(i, [f"{a[i]:.2f}", f"{b[i]:.2f}"]) for i in range(n)]
+    held = []
+    last = [None, None]
+    for i, cells in full:
+        row = []
+        for j, cell in enumerate(cells):
+            row.append("" if cell == last[j] else cell)
+            last[j] = cell
+        if any(row) or i == n - 1:  # unchanged rows are suppressed, the end of the run is written
+            held.append((i, row))
+    _write(tmp_path / "full.csv", full)
+    _write(tmp_path / "deadband.csv", held)
+    assert len(held) < n
+
+    kwargs = dict(differences=[("a", "b")], max_m=256, nperseg=128, workers=1)
+    expected = analyze(str(tmp_path / "full.csv"), **kwargs)
+    results = analyze(str(tmp_path / "deadband.csv"), **kwargs)
+    for r, e in zip(results, expected):
+        assert r.samples == e.samples
+        assert np.isclose(r.slope, e.slope)
+        assert np.allclose(r.adev, e.adev)
+
+
+def test_multirate_gauge_has_its_own_sample_interval(tmp_path):
+    n = 5000
+    a, b = _walk(n, 1), _walk(n, 2)
+    _write(tmp_path / "multirate.csv", [(i, [f"{a[i]:.2f}", f"{b[i]:.2f}" if i % 10 == 0 else ""]) for i in range(n)])
+
+    fast, slow = analyze(str(tmp_path / "multirate.csv"), max_m=16, nperseg=64, workers=1)
+    assert fast.tau0 == 0.1 and slow.tau0 == 1.0
+    assert slow.samples == n // 10
+    assert list(slow.taus) == [1.0, 2.0, 4.0, 8.0, 16.0]  # m=1 windows fill on the slow gauge's own samples
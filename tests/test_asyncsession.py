@@ -0,0 +1,35 @@
+import asyncio
+
+from acquisition import SimulatedIbr
+from asyncsession import AsyncMeasurementSession
+from main3 import MeasurementSession
+
+
+async def _collect(tmp_path):
+    ibr = SimulatedIbr(out_of_range_rate=0.3, seed=5)
+    # One read per gauge and tick, so failed ticks (None values) are common
+    session = AsyncMeasurementSession(MeasurementSession(ibr, [1, 2], {1: "a", 2: "b"}, 20.0, 0.5 / 3600,
+                                                         str(tmp_path / "run.csv"), auto_oversample=False))
+    every = session.subscribe(maxsize=1000)
+    oldest = session.subscribe(maxsize=3, policy="drop_oldest")
+    latest = session.subscribe(maxsize=1, policy="coalesce")
+    async with session:
+        await session.wait()  # nobody consumes while the session runs
+    return [[tick async for batch in sub for tick in batch] for sub in (every, oldest, latest)] + [oldest, latest]
+
+
+def test_slow_subscriber_policies(tmp_path):
+    ticks, kept, merged, oldest, latest = asyncio.run(_collect(tmp_path))
+    assert len(ticks) >= 5 and any(None in values for _, values in ticks)
+
+    # drop_oldest: the newest maxsize ticks survive, the rest are counted
+    assert kept == ticks[-3:]
+    assert oldest.dropped == len(ticks) - 3
+
+    # coalesce: one tick with the newest timestamp and each gauge's latest valid value
+    assert len(merged) == 1 and latest.coalesced == len(ticks) - 1
+    t_ns, values = merged[0]
+    assert t_ns == ticks[-1][0]
+    for j in range(2):
+        valid = [v[j] for _, v in ticks if v[j] is not None]
+        assert values[j] == (valid[-1] if valid else None)
@@ -0,0 +1,75 @@
+import csv
+import random
+from array import array
+
+import numpy as np
+import pytest
+
+from compensation import SMALL_BLOCK, Compensator, GaugeCompensation, compensate_csv
+
+TABLES = {
+    "linear": {1: GaugeCompensation([0.01, 1.0003], zero=0.004, alpha=11.5e-6, length=12.0)},
+    "quadratic": {1: GaugeCompensation([0.0012, 1.00035, -2.1e-6], zero=0.004, alpha=11.5e-6, length=12.0),
+                  2: GaugeCompensation([0.0, 0.99987])},
+    "cubic": {1: GaugeCompensation([0.001, 1.0, 1e-4, -3e-6], zero=-0.01, alpha=23e-6, length=5.0, t_ref=21.0),
+              3: GaugeCompensation([0.002, 1.0001], alpha=11.5e-6, length=8.0)},
+}
+
+
+def _burst(n, seed=1):
+    rng = random.Random(seed)
+    addresses = [rng.choice([1, 2, 3]) for _ in range(n)]
+    return addresses, array("d", [rng.uniform(-2.0, 2.0) for _ in range(n)])
+
+
+@pytest.mark.parametrize("kind", sorted(TABLES))
+@pytest.mark.parametrize("n", [SMALL_BLOCK - 1, SMALL_BLOCK, 3 * SMALL_BLOCK])  # Python and NumPy paths
+def test_apply_matches_the_scalar_model(kind, n):
+    table = TABLES[kind]
+    compensator = Compensator(table, [1, 2, 3], temperature=24.5)
+    addresses, values = _burst(n)
+    expected = [table[addr](x, 24.5) if addr in table else x for addr, x in zip(addresses, values)]
+    assert compensator.apply(addresses, values) == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    assert compensator.apply(addresses, list(values)) == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+def test_temperature_setter_recompiles_the_thermal_term():
+    table = TABLES["quadratic"]
+    compensator = Compensator(table, [1, 2])
+    addresses, values = _burst(2 * SMALL_BLOCK, seed=2)
+    addresses = [1 if a == 3 else a for a in addresses]
+    for temperature in (None, 30.0, 15.0):
+        compensator.temperature = temperature
+        expected = [table[addr](x, temperature) for addr, x in zip(addresses, values)]
+        assert compensator.apply(addresses[:4], values) == pytest.approx(expected[:4], rel=1e-12)
+        assert compensator.apply(addresses, values) == pytest.approx(expected, rel=1e-12)
+    assert compensator.temperature == 15.0
+
+
+def test_apply_columns_passes_nan_through():
+    table = TABLES["cubic"]
+    compensator = Compensator(table, [1, 2, 3], temperature=25.0)
+    block = np.array([[0.5, 1.0, np.nan], [np.nan, -0.25, 0.75]])
+    out = compensator.apply_columns([1, 2, 3], block)
+    assert np.isnan(out[0, 2]) and np.isnan(out[1, 0])
+    assert out[0, 0] == pytest.approx(table[1](0.5, 25.0)) and out[1, 2] == pytest.approx(table[3](0.75, 25.0))
+    assert out[0, 1] == 1.0 and out[1, 1] == -0.25  # no table entry: unchanged
+
+    constant = Compensator({1: GaugeCompensation([0.5])}, [1])
+    assert np.isnan(constant.apply_columns([1], [[np.nan], [2.0]])).tolist() == [[True], [False]]
+
+
+def test_compensate_csv_refuses_raw_columns(tmp_path):
+    with open(tmp_path / "run.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "a", "b", "a err", "b err"])
+        writer.writerow(["2025-01-01T00:00:00+00:00", "1.0", "error", "0", "3"])
+    table = {1: GaugeCompensation([0.5, 2.0])}
+    assert compensate_csv(table, tmp_path / "run.csv", tmp_path / "comp.csv") == 1
+    with open(tmp_path / "comp.csv", newline="", encoding="utf-8") as f:
+        header, row = list(csv.reader(f))
+    assert header == ["Timestamp", "a", "b", "a raw", "b raw", "a err", "b err"]
+    assert row[1:] == ["2.50000000", "error", "1.0", "error", "0", "3"]
+
+    with pytest.raises(ValueError, match="already has raw columns"):
+        compensate_csv(table, tmp_path / "comp.csv", tmp_path / "twice.csv")
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+import daemon
+from acquisition import SimulatedIbr
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Default key path and output directory of this test only; short socket path (AF_UNIX limit)
+    monkeypatch.setattr(daemon, "AUTHKEY_PATH", str(tmp_path / "key"))
+    monkeypatch.setattr(daemon, "OUTPUT_DIR", str(tmp_path / "out"))
+    sock_dir = tempfile.mkdtemp(dir="/tmp")
+    address = os.path.join(sock_dir, "ibr.sock")
+    service = daemon.AcquisitionService(SimulatedIbr(seed=1), setup_path=None, address=address)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(address) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield service
+    service._shutdown.set()
+    service._wake_listener()
+    thread.join(5)
+    shutil.rmtree(sock_dir, ignore_errors=True)
+
+
+def test_round_trip_with_the_default_key(service, tmp_path):
+    client = daemon.AcquisitionClient(service.address)  # key loaded from AUTHKEY_PATH, like the CLI
+    try:
+        assert client.status()["initialized"]
+        reply = client.start(gauges=[1, 2], frequency_hz=20.0, filename="run.csv")
+        assert reply["filename"] == os.path.realpath(tmp_path / "out" / "run.csv")
+
+        samples = client.samples()
+        ticks = [next(samples) for _ in range(3)]
+        samples.close()
+        assert all(len(values) == 2 for _, values in ticks)
+        assert [t for t, _ in ticks] == sorted(t for t, _ in ticks)
+
+        assert client.status()["running"]
+        stopped = client.stop()
+        assert not stopped["running"] and stopped["samples"] >= 3
+        assert not client.status()["running"]
+        assert client.shutdown() == {}
+    finally:
+        client.close()
+    assert os.path.getsize(tmp_path / "out" / "run.csv") > 0
+
+
+def test_rejects_unknown_options_and_paths(service):
+    client = daemon.AcquisitionClient(service.address)
+    try:
+        with pytest.raises(RuntimeError, match="Unknown session option"):
+            client.start(gauges=[1], manage_device=True)
+        with pytest.raises(RuntimeError, match="inside"):
+            client.start(gauges=[1], filename="../escape.csv")
+    finally:
+        client.close()
@@ -0,0 +1,58 @@
+import csv
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from deadband import HOLD, DeadbandFilter, reconstruct
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+STEP = 0.25  # exact in binary, so grid points land on the row times
+THRESHOLD = 0.05
+
+
+def _record(path, series, filt, reset_at=()):
+    """Write rows the way the session does in deadband mode: held cells empty, unchanged rows dropped."""
+    n = len(series[0])
+    written = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "a", "b"])
+        for i in range(n):
+            if i in reset_at:
+                filt.reset()
+            cells = []
+            for addr, values in enumerate(series, start=1):
+                v = values[i]
+                if not filt.changed(addr, v, i * STEP):
+                    cells.append(HOLD)
+                else:
+                    cells.append("error" if v is None else repr(v))
+            if any(cell != HOLD for cell in cells) or i == n - 1:
+                writer.writerow([(START + timedelta(seconds=i * STEP)).isoformat()] + cells)
+                written.append((i, cells))
+    return written
+
+
+def test_reconstruction_stays_within_the_deadband(tmp_path):
+    rng = random.Random(7)
+    n = 2000
+    a = np.cumsum([rng.gauss(0, 0.01) for _ in range(n)]).tolist()
+    b = [None if 500 <= i < 520 else 1.0 for i in range(n)]  # constant apart from a failure burst
+    filt = DeadbandFilter([1, 2], {1: THRESHOLD}, heartbeat=60.0)
+    written = _record(tmp_path / "run.csv", [a, b], filt, reset_at={1000})
+    assert len(written) < n / 2 and filt.held > filt.written
+
+    names, grid, values = reconstruct(tmp_path / "run.csv", STEP)
+    assert names == ["a", "b"] and len(grid) == n
+    assert np.max(np.abs(values[:, 0] - a)) <= THRESHOLD
+    expected_b = np.array([np.nan if v is None else v for v in b])
+    assert np.array_equal(np.isnan(values[:, 1]), np.isnan(expected_b))
+    assert np.nanmax(np.abs(values[:, 1] - expected_b)) == 0.0
+
+    rows = dict(written)
+    assert rows[0] == [repr(a[0]), "1.0"]  # first values always written
+    assert rows[500][1] == "error" and rows[520][1] == "1.0"  # valid <-> failed changes
+    assert rows[1000] == [repr(a[1000]), "1.0"]  # reset() forces every gauge
+    assert 240 in rows and rows[240][1] == "1.0"  # heartbeat: unchanged b rewritten after 60 s
+    assert n - 1 in rows  # end of the run is kept even when nothing changed
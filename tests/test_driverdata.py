@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from driverdata import ReadTimingModel
+
+USD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IBR_DDK.USD")
+
+
+def test_model_is_capped_at_the_measured_round_time():
+    gauges = [1, 2, 3, 4, 5, 6]
+    model = ReadTimingModel.from_files(USD, gauges, "IBR C100", cache_dir=None, measured_read_time=0.13 / 6)
+    # 7E2 at 4800 baud, 3 request + 12 response characters; T07 (400 ms) is not a per-read cost
+    assert model.read_time(1) == pytest.approx(15 * 11 / 4800)
+    assert model.model_round_time == pytest.approx(0.20625)
+    assert model.overestimates and model.round_time == pytest.approx(0.13)
+    model.validate(1 / 0.13)  # the empirical limit is accepted
+    with pytest.raises(ValueError):
+        model.validate(10.0)
+
+
+def test_cap_scales_with_the_gauge_count():
+    model = ReadTimingModel.from_files(USD, [1, 2], "IBR C100", cache_dir=None, measured_read_time=0.13 / 6)
+    assert model.model_round_time == pytest.approx(2 * 15 * 11 / 4800)
+    assert model.overestimates
+    assert model.round_time == pytest.approx(0.13 / 3)  # two of the six gauges' measured round
+    model.validate(20.0)
+    with pytest.raises(ValueError):
+        model.validate(25.0)
+
+
+def test_no_measurement_uses_the_model():
+    model = ReadTimingModel.from_files(USD, [1, 2, 3], "IBR C100", cache_dir=None)
+    assert model.measured_round_time is None and not model.overestimates
+    assert model.round_time == pytest.approx(3 * 15 * 11 / 4800)
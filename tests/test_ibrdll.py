@@ -0,0 +1,26 @@
+import threading
+from array import array
+
+from bench_reads import StubDll, main as bench_main
+from ibrdll import IbrDll
+
+
+def test_get_values_matches_get_value_on_a_stub():
+    ibr = IbrDll("stub.dll", dll=StubDll())
+    burst = [1, 2, 3] * 4
+    values, statuses = ibr.get_values(1, burst, (array("d", bytes(8 * len(burst))), array("h", bytes(2 * len(burst)))))
+    assert list(statuses) == [0] * len(burst)
+    assert list(values) == [ibr.get_value(1, addr)[1] for addr in burst]
+
+
+def test_benchmark_runs_without_the_ddk(capsys):
+    bench_main(["2", "3", "2"])
+    assert "get_values" in capsys.readouterr().out
+
+
+def test_cancelled_burst_reads_nothing_more():
+    ibr = IbrDll("stub.dll", dll=StubDll())
+    cancel = threading.Event()
+    cancel.set()
+    values, statuses = ibr.get_values(1, [1, 2], (array("d", [7.0, 7.0]), array("h", [9, 9])), cancel)
+    assert list(values) == [7.0, 7.0] and list(statuses) == [9, 9]
@@ -0,0 +1,28 @@
+import io
+import json
+
+from liveview import LiveView
+
+
+def _view():
+    view = LiveView(["a", "b"], 0.1, stream=io.StringIO(), window=60)
+    for k in range(1000):
+        view.on_sample(k * 100_000_000, [float(k % 50), None])
+    view._drain()
+    return view
+
+
+def test_bands_merge_buckets_keeping_extremes():
+    (name, latest, t, lo, hi, _), (_, missing, _, empty_lo, _, _) = _view().bands(60, 10, now_ns=100_000_000_000)
+    assert (name, latest, missing) == ("a", 49.0, None)
+    assert len(lo) == len(hi) == len(t) == 10
+    assert lo.min() == 0.0 and hi.max() == 49.0
+    assert t[0] < t[-1] <= 0
+    assert not len(empty_lo)
+
+
+def test_frames_render_and_serialize():
+    view = _view()
+    frame = view.render_text(now_ns=100_000_000_000)
+    assert "a: 49.000000" in frame and "b: no data" in frame and "#" in frame
+    json.dumps(view.series(60, 100, now_ns=100_000_000_000))
@@ -0,0 +1,78 @@
+from errors import OUT_OF_RANGE, ErrorAccounting
+from metrics import EXPORT_BOUNDS, Metrics
+
+
+class ListLog:
+    def __init__(self):
+        self.lines = []
+
+    def info(self, msg):
+        self.lines.append(("info", msg))
+
+    def warning(self, msg):
+        self.lines.append(("warning", msg))
+
+    def error(self, msg):
+        self.lines.append(("error", msg))
+
+
+def test_prometheus_text_exposition():
+    m = Metrics()
+    m.inc("reads_total", gauge=1)
+    m.inc("reads_total", 2, gauge=1)
+    m.inc("reads_total", gauge=2)
+    m.set("oversample_count", 4)
+    for ns in (40_000, 2_000_000, 2_000_000_000):
+        m.observe_read(1, ns)
+
+    lines = m.prometheus_text().splitlines()
+    assert lines[:5] == [
+        "# TYPE ibr_reads_total counter",
+        'ibr_reads_total{gauge="1"} 3',
+        'ibr_reads_total{gauge="2"} 1',
+        "# TYPE ibr_oversample_count gauge",
+        "ibr_oversample_count 4",
+    ]
+    assert lines[5] == "# TYPE ibr_read_latency_seconds histogram"
+    buckets = lines[6:6 + len(EXPORT_BOUNDS) + 1]
+    assert all(line.startswith('ibr_read_latency_seconds_bucket{gauge="1",le="') for line in buckets)
+    cumulative = {line.split('le="')[1].split('"')[0]: int(line.rsplit(" ", 1)[1]) for line in buckets}
+    assert (cumulative["5e-05"], cumulative["0.001"], cumulative["0.0025"], cumulative["1"]) == (1, 1, 2, 2)
+    assert (cumulative["2.5"], cumulative["+Inf"]) == (3, 3)
+    assert list(cumulative.values()) == sorted(cumulative.values())
+    assert lines[-2] == 'ibr_read_latency_seconds_sum{gauge="1"} 2.00204'
+    assert lines[-1] == 'ibr_read_latency_seconds_count{gauge="1"} 3'
+
+
+def test_error_totals_and_transitions():
+    log = ListLog()
+    errors = ErrorAccounting([1, 2], {1: "Z"}, window=3600, logger=log)
+    for _ in range(3):
+        errors.record(1, OUT_OF_RANGE)
+    errors.record(2, 5)
+    assert errors.end_tick({1: 0, 2: 4}) == [3, 1]  # gauge 2 still had valid samples
+    assert errors.state == {1: OUT_OF_RANGE, 2: None}
+    errors.record(1, OUT_OF_RANGE)
+    assert errors.end_tick({1: 2, 2: 4}) == [1, 0]
+    assert errors.state == {1: None, 2: None}
+    assert log.lines == [("warning", "Gauge #1 (Z) entered out of range"),
+                         ("info", "Gauge #1 (Z) left out of range")]
+    assert errors.totals == {}  # totals are folded in per summary window
+
+    errors.flush()
+    assert errors.totals == {(1, OUT_OF_RANGE): 4, (2, 5): 1}
+    level, summary = log.lines[-1]
+    assert level == "warning" and summary.endswith("#1 out of range x4, #2 error 5 x1")
+    errors.flush()  # empty window: nothing logged, totals kept
+    assert len(log.lines) == 3 and sum(errors.totals.values()) == 5
+
+
+def test_multirate_gauges_keep_counting_until_due():
+    errors = ErrorAccounting([1, 2], window=3600, logger=ListLog())
+    errors.record(2, OUT_OF_RANGE)
+    assert errors.end_tick({1: 1}) == [0, 1]
+    errors.record(2, OUT_OF_RANGE)
+    assert errors.end_tick({1: 1, 2: 0}) == [0, 2]
+    assert errors.state[2] == OUT_OF_RANGE
+    errors.flush()
+    assert errors.totals[(2, OUT_OF_RANGE)] == 2
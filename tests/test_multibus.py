@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from multibus import Bus, MultiBusSupervisor
+
+
+def test_simulated_buses_merge_in_time_order():
+    buses = [Bus(module, [1, 2, 3]) for module in (1, 2)]
+    supervisor = MultiBusSupervisor(buses, frequency_hz=20.0, oversample_count=2).start()
+    samples = []
+    try:
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            samples.extend(supervisor.drain())
+            time.sleep(0.02)
+    finally:
+        samples.extend(supervisor.stop())
+
+    assert samples
+    assert [s[0] for s in samples] == sorted(s[0] for s in samples)
+    assert {s[1] for s in samples} == {1, 2}
+    assert {s[2] for s in samples} == {1, 2, 3}
+    assert set(supervisor.summaries) == {1, 2}
+    assert supervisor.emitted == len(samples)
+    assert supervisor.rings == {}
+
+
+def test_failed_bus_stops_the_others_and_raises():
+    buses = [Bus(1, [1, 2]), Bus(2, [1, 2], dll_path="/nonexistent/ibr_ddk.dll")]
+    supervisor = MultiBusSupervisor(buses, frequency_hz=10.0)
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match="bus"):
+        supervisor.start(timeout=30.0)
+    assert time.monotonic() - t0 < 15.0
+    assert supervisor.rings == {}
+    assert supervisor._processes == {}
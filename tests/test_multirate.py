@@ -0,0 +1,14 @@
+from acquisition import SimulatedIbr
+from main3 import MeasurementSession, default_oversample_count, gauge_rate_map
+
+
+def test_unlisted_gauges_use_the_session_oversampling(tmp_path):
+    rates = {1: (10, 2)}
+    session = MeasurementSession(SimulatedIbr(seed=1), [1, 2], {1: "a", 2: "b"}, 2.0, None,
+                                 str(tmp_path / "run.csv"), gauge_rates=rates)
+    count = default_oversample_count(2.0, 2)
+    assert session.oversample_count == count > 1
+    assert gauge_rate_map([1, 2], rates, 2.0, count) == {1: (10, 2), 2: (2.0, count)}  # what main() validates
+    planned = {g.addr: (g.rate_hz, g.oversamples) for g in session.planner.gauges}
+    assert planned == {1: (10.0, 2), 2: (2.0, count)}
+    assert session.frequency_hz == 10.0
@@ -0,0 +1,17 @@
+import math
+
+from recording import BinaryRecorder, open_recording, STATUS_NO_DATA
+
+
+def test_large_and_negative_statuses_round_trip(tmp_path):
+    path = tmp_path / "run.bin"
+    rec = BinaryRecorder(str(path), [1, 2, 3], {1: "a", 2: "b", 3: "c"}, 1.0)
+    rec.write(10, [1.5, None, None], [0, 0xC0000005, STATUS_NO_DATA])
+    rec.write(20, [2.5, 3.5, None], [0, 0, 40000])
+    rec.close()
+
+    meta, records = open_recording(str(path))
+    assert meta["gauge_descriptions"] == ["a", "b", "c"]
+    assert records["t_ns"].tolist() == [10, 20]
+    assert records["status"].tolist() == [[0, 2**31 - 1, STATUS_NO_DATA], [0, 0, 40000]]
+    assert math.isnan(records["value"][0][1])
@@ -0,0 +1,69 @@
+import csv
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from acquisition import SimulatedIbr
+from main3 import MeasurementSession
+from replay import OUT_OF_RANGE, ReplayIbr, drift_profile, load_profile
+from timeindex import gauge_columns, parse_time
+
+START = datetime(2025, 3, 1, 8, 0, tzinfo=timezone(timedelta(hours=1)))
+
+
+def _record(path, seconds):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "Z °C", "X left", "Z °C err", "X left err"])
+        for i in range(seconds + 1):
+            writer.writerow([(START + timedelta(seconds=i)).isoformat(), f"{i:.1f}", "" if i % 2 else f"{-i:.1f}",
+                             "0", "0"])
+
+
+def _run(ibr, gauges, names, frequency_hz, seconds, path):
+    session = MeasurementSession(ibr, gauges, names, frequency_hz, seconds / 3600, str(path))
+    session.run()
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return session, rows[0], rows[1:]
+
+
+def test_load_profile_keeps_recorded_names(tmp_path):
+    _record(tmp_path / "run.csv", 4)
+    times, series, names, start = load_profile(tmp_path / "run.csv", [4, 6])
+    assert names == {4: "Z °C", 6: "X left"}
+    assert start == START
+    assert times == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert series[6] == [0.0, 0.0, -2.0, -2.0, -4.0]  # empty cells hold
+
+
+def test_replayed_rows_are_stamped_in_replay_time(tmp_path):
+    _record(tmp_path / "run.csv", 20)
+    speed = 20.0
+    ibr = ReplayIbr(str(tmp_path / "run.csv"), speed=speed)
+    session, header, rows = _run(ibr, list(ibr.series), ibr.names, 1.0 * speed, 20 / speed, tmp_path / "out.csv")
+
+    assert gauge_columns(header) == ["Z °C", "X left"]
+    assert abs(len(rows) - 20) <= 2
+    stamps = [parse_time(row[0]) for row in rows]
+    assert stamps[0] - START.timestamp() == pytest.approx(0.0, abs=1.0)
+    spacing = (stamps[-1] - stamps[0]) / (len(stamps) - 1)
+    assert spacing == pytest.approx(1.0, rel=0.2)  # one row per replay second, not per real 50 ms
+
+
+@pytest.mark.parametrize("backend", ["replay", "simulated"])
+def test_injected_out_of_range_reads(tmp_path, backend):
+    gauges = [1, 2]
+    names = {1: "a", 2: "b"}
+    if backend == "replay":
+        ibr = ReplayIbr(drift_profile(), speed=10.0, out_of_range_rate=0.5, seed=3)
+    else:
+        ibr = SimulatedIbr(out_of_range_rate=0.5, seed=3)
+    session, header, rows = _run(ibr, gauges, names, 20.0, 0.5, tmp_path / "out.csv")
+
+    assert header[:3] == ["Timestamp", "a", "b"]
+    assert abs(len(rows) - 10) <= 2
+    failed = {addr: n for (addr, status), n in session.errors.totals.items() if status == OUT_OF_RANGE}
+    assert set(failed) == set(gauges)
+    err = [header.index(f"{name} err") for name in names.values()]
+    assert [sum(int(row[c]) for row in rows) for c in err] == [failed[addr] for addr in gauges]
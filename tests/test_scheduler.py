@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import scheduler
+from scheduler import DeadlineScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    return clock
+
+
+def test_skip_drops_missed_deadlines(clock):
+    s = DeadlineScheduler(1.0, policy="skip")
+    assert s.wait() == 0
+    clock.now = 3.5  # the tick's work overran two whole deadlines
+    assert s.wait() == 2
+    assert s.wait() == 0
+    assert clock.now == 4.0  # back on the grid
+    summary = s.summary()
+    assert (summary["ticks"], summary["overruns"], summary["skipped"]) == (3, 1, 2)
+    assert summary["max_lateness_s"] == pytest.approx(0.5)
+
+
+def test_burst_catches_up_within_max_burst(clock):
+    s = DeadlineScheduler(1.0, policy="burst", max_burst=2)
+    s.wait()
+    clock.now = 4.5
+    assert [s.wait() for _ in range(3)] == [0, 0, 1]  # two back-to-back ticks, then the rest is dropped
+    assert s.wait() == 0
+    assert clock.now == 5.0
+    summary = s.summary()
+    assert (summary["ticks"], summary["overruns"], summary["skipped"]) == (5, 3, 1)
+    assert summary["max_lateness_s"] == pytest.approx(3.5)
+    assert summary["mean_lateness_s"] == pytest.approx((0 + 3.5 + 2.5 + 0.5 + 0) / 5)
+
+
+def test_stop_ends_the_wait_without_consuming_the_deadline(clock):
+    s = DeadlineScheduler(1.0)
+    s.wait()
+    stop = threading.Event()
+    stop.set()
+    assert s.wait(stop) == 0
+    assert s.ticks == 1
+    assert s.wait() == 0 and clock.now == 1.0
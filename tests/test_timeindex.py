@@ -0,0 +1,35 @@
+from timeindex import gauge_columns, read_range
+from writer import CsvOutput
+
+
+def test_gauge_columns_by_position():
+    header = ["Timestamp", "a", "b", "a std", "b std", "a n", "b n", "a err", "b err", "a t", "b t", "Oversamples"]
+    assert gauge_columns(header) == ["a", "b"]
+    # User names that look like extra columns are still gauges
+    assert gauge_columns(["Timestamp", "Z t", "X raw", "Z t err", "X raw err"]) == ["Z t", "X raw"]
+
+
+def test_non_ascii_names_round_trip(tmp_path):
+    path = str(tmp_path / "run.csv")
+    out = CsvOutput(path, ["Timestamp", "Z °C", "Z °C t"], index_every=1)
+    out.writerows([["2025-01-01T00:00:00+00:00", "1.5", "0.1"], ["2025-01-01T00:00:01+00:00", "error", ""]])
+    out.close()
+
+    header, rows = read_range(path, "2025-01-01T00:00:00+00:00", "2025-01-01T00:00:01+00:00")
+    assert gauge_columns(header) == ["Z °C"]
+    assert [row[1] for row in rows] == [1.5, None]
+
+
+def test_size_counts_bytes_without_flushing(tmp_path):
+    path = tmp_path / "run.csv"
+    out = CsvOutput(str(path), ["Timestamp", "Z °C"], index_every=2)
+    on_disk = path.stat().st_size  # the header is flushed on open
+    for i in range(20):
+        out.writerows([[f"2025-01-01T00:00:{i:02d}+00:00", f"{i}.5 °"]])
+    assert path.stat().st_size == on_disk  # batches stay buffered until the writer flushes
+    size = out.size
+    out.close()
+    assert size == path.stat().st_size
+
+    header, rows = read_range(str(path), "2025-01-01T00:00:07+00:00", "2025-01-01T00:00:09+00:00")
+    assert [row[0] for row in rows] == [f"2025-01-01T00:00:0{i}+00:00" for i in (7, 8, 9)]
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from tracing import NULL_SPAN, TICK_SPAN, Tracer, load_trace, span, summarize
+
+
+def test_disabled_tracer_is_a_shared_no_op():
+    with span(None, "write") as s:
+        pass
+    assert s is NULL_SPAN and span(None, "read") is NULL_SPAN
+
+
+def test_emitted_spans_and_capacity():
+    tracer = Tracer(capacity=4)
+    tick = tracer.name_id(TICK_SPAN)
+    read = tracer.name_id("read")
+    assert tracer.name_id("read") == read  # names are interned once
+    tracer.add(tick, 1_000, 11_000)
+    tracer.add(read, 2_000, 5_000)
+    tracer.add(read, 6_000, 7_000)
+    with span(tracer, "write"):
+        pass
+    tracer.add(read, 8_000, 9_000)  # over capacity
+
+    spans = list(tracer.records())
+    assert tracer.count == 4 and tracer.dropped == 1
+    assert [(name, start, dur) for name, _, start, dur in spans[:3]] == [
+        (TICK_SPAN, 1_000, 10_000), ("read", 2_000, 3_000), ("read", 6_000, 1_000)]
+    assert spans[3][0] == "write" and spans[3][3] >= 0
+    assert {tid for _, tid, _, _ in spans} == {threading.get_ident()}
+
+    rows = summarize(spans[:3])
+    assert rows[0] == (TICK_SPAN, 0.01, 0.01, 1.0, 1.0)
+    assert rows[1] == pytest.approx(("read", 0.004, 0.004, 2.0, 0.4))
+
+
+@pytest.mark.parametrize("suffix", ["json", "bin"])
+def test_trace_files_round_trip(tmp_path, suffix):
+    tracer = Tracer(capacity=8)
+    tracer.add(tracer.name_id(TICK_SPAN), 5_000, 25_000)
+    tracer.add(tracer.name_id("read"), 6_000, 8_000)
+    path = tmp_path / f"run.trace.{suffix}"
+    tracer.write(path)
+
+    spans = load_trace(path)
+    # Chrome JSON is relative to the first span, binary keeps the raw stamps
+    offset = 5_000 if suffix == "json" else 0
+    assert [(name, start + offset, dur) for name, _, start, dur in spans] == [
+        (TICK_SPAN, 5_000, 20_000), ("read", 6_000, 2_000)]
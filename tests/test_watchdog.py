@@ -0,0 +1,85 @@
+import threading
+import time
+from array import array
+
+from acquisition import SimulatedIbr
+from watchdog import DeviceWatchdog
+
+
+class StallingIbr(SimulatedIbr):
+    """SimulatedIbr whose reads block while `stall` is set, recording every call."""
+
+    def __init__(self):
+        super().__init__(seed=1)
+        self.stall = threading.Event()
+        self.release = threading.Event()
+        self.reads = []  # (thread name, address)
+        self.calls = []  # device calls in order
+        self.initialized = True
+
+    def get_value(self, devicenr, address):
+        self.reads.append((threading.current_thread().name, address))
+        if self.stall.is_set():
+            self.release.wait()
+        return super().get_value(devicenr, address)
+
+    def deinit_device(self):
+        self.calls.append("deinit")
+        return super().deinit_device()
+
+    def init_device(self, setup_filename=None, **kwargs):
+        self.calls.append("init")
+        return super().init_device(setup_filename, **kwargs)
+
+
+def _out(n):
+    return array("d", bytes(8 * n)), array("h", bytes(2 * n))
+
+
+def test_abandoned_burst_stops_at_the_next_read():
+    ibr = StallingIbr()
+    watchdog = DeviceWatchdog(ibr, None, 1, read_timeout=0.05, max_burst=0.1)
+    ibr.stall.set()
+    assert watchdog.get_values(1, [1, 2, 3, 4], _out(4)) is None
+    assert watchdog.timeouts == 1
+    stuck = watchdog._abandoned[-1]
+
+    ibr.stall.clear()
+    ibr.release.set()
+    assert stuck.join(1.0)
+    assert len(ibr.reads) == 1  # the stuck read returned; the rest of its burst was cancelled
+
+    out = watchdog.get_values(1, [1, 2], _out(2))
+    assert list(out[1]) == [0, 0]
+    watchdog.close()
+
+
+def test_recover_waits_for_the_abandoned_thread():
+    ibr = StallingIbr()
+    watchdog = DeviceWatchdog(ibr, None, 1, read_timeout=0.05, max_burst=0.1, max_failures=1, init_timeout=5.0)
+    ibr.stall.set()
+    assert watchdog.get_values(1, [1, 2], _out(2)) is None
+    assert watchdog.needs_recovery
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (watchdog.recover(1), done.set()), daemon=True).start()
+    time.sleep(0.2)
+    assert ibr.calls == []  # no deinit while the old thread is still inside a read
+    ibr.stall.clear()
+    ibr.release.set()
+    assert done.wait(5.0)
+    assert ibr.calls == ["deinit", "init"]
+    assert watchdog.dead_threads == 0 and len(watchdog.recoveries) == 1
+    watchdog.close()
+
+
+def test_thread_stuck_past_init_timeout_is_given_up():
+    ibr = StallingIbr()
+    watchdog = DeviceWatchdog(ibr, None, 1, read_timeout=0.05, max_burst=0.1, max_failures=1, init_timeout=0.2)
+    ibr.stall.set()
+    watchdog.get_values(1, [1], _out(1))
+    ibr.stall.clear()  # later reads work; the first one stays stuck
+    assert watchdog.recover(1) is not None
+    assert watchdog.dead_threads == 1 and ibr.calls == ["deinit", "init"]
+    ibr.release.set()
+    watchdog.close()
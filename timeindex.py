@@ -0,0 +1,191 @@
+import io
+import csv
+import gzip
+import struct
+from bisect import bisect_right
+from datetime import datetime
+
+# ------------------ Sparse Time Index ------------------
+#
+# Sidecar "<file>.idx" next to a measurement CSV:
+#   header:  magic (8s) | every (u32)
+#   entries: epoch seconds of the row's timestamp (f8) | byte offset of the row (q)
+# One entry per `every` data rows, appended while the CSV is written.
+
+MAGIC = b"IBRIDX\x00\x01"
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<dq")
+DEFAULT_EVERY = 1000
+
+
+def index_path(path) -> str:
+    """Sidecar index path for a CSV (a compressed segment shares its CSV's index)."""
+    path = str(path)
+    if path.endswith(".gz"):
+        path = path[:-3]
+    return path + ".idx"
+
+
+def parse_time(value) -> float:
+    """Epoch seconds from an epoch number, datetime or ISO string (naive = local time)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+# Per-gauge extra columns written by MeasurementSession after the value columns
+_EXTRA_SUFFIXES = (" raw", " std", " n", " err", " t")
+
+
+def gauge_columns(header) -> list[str]:
+    """
+    Names of the gauge value columns in a measurement CSV header.
+
+    Found by position, not by name: the header is Timestamp, N gauge names,
+    then groups of N per-gauge columns ("<name> raw", " std", " n", " err",
+    " t", each in gauge order) and optionally "Oversamples". N is the smallest
+    count for which the rest of the header is made of such groups, so a gauge
+    may be called e.g. "Z t" without being taken for a time column.
+    """
+    columns = list(header[1:])
+    if columns and columns[-1] == "Oversamples":
+        columns.pop()
+    total = len(columns)
+    for groups in range(len(_EXTRA_SUFFIXES), 0, -1):
+        if total % (groups + 1):
+            continue
+        n = total // (groups + 1)
+        names = columns[:n]
+        rest = columns[n:]
+        if all(any(rest[g * n:(g + 1) * n] == [name + suffix for name in names] for suffix in _EXTRA_SUFFIXES)
+               for g in range(groups)):
+            return names
+    return columns
+
+
+class IndexWriter:
+    """Appends (time, offset) entries for every `every`-th row; owned by writer.CsvOutput."""
+
+    def __init__(self, csv_path, every: int = DEFAULT_EVERY):
+        self.every = every
+        self._file = open(index_path(csv_path), "wb")
+        self._file.write(_HEADER.pack(MAGIC, every))
+        self.rows = 0
+
+    def due(self) -> bool:
+        return self.rows % self.every == 0
+
+    def add(self, timestamp, offset: int):
+        try:
+            t = parse_time(timestamp)
+        except (TypeError, ValueError):
+            return  # unparsable timestamp: skip this entry, the next one will do
+        self._file.write(_ENTRY.pack(t, offset))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_index(path):
+    """Return (every, times, offsets) from the sidecar index of `path`."""
+    with open(index_path(path), "rb") as f:
+        data = f.read()
+    magic, every = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{index_path(path)}: not a measurement index")
+    body = data[_HEADER.size:]
+    body = body[:len(body) - len(body) % _ENTRY.size]  # ignore a torn last entry
+    times = []
+    offsets = []
+    for t, offset in _ENTRY.iter_unpack(body):
+        times.append(t)
+        offsets.append(offset)
+    return every, times, offsets
+
+
+def build_index(path, every: int = DEFAULT_EVERY) -> int:
+    """(Re)build the sidecar index of an existing CSV in one streaming pass. Returns entries written."""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    entries = 0
+    with opener(path, "rb") as f, open(index_path(path), "wb") as out:
+        out.write(_HEADER.pack(MAGIC, every))
+        f.readline()  # header
+        rows = 0
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if rows % every == 0:
+                stamp = line.split(b",", 1)[0].decode("utf-8", "replace").strip()
+                try:
+                    out.write(_ENTRY.pack(parse_time(stamp), offset))
+                    entries += 1
+                except ValueError:
+                    pass
+            rows += 1
+    return entries
+
+# ------------------ Random Access Reader ------------------
+
+def read_range(path, t0, t1, gauges=None):
+    """
+    Rows of a measurement CSV with t0 <= timestamp <= t1 without scanning from the start.
+
+    t0/t1: epoch seconds, datetimes or ISO strings. gauges: column names to keep
+    (default: all value columns). Builds the index first if it is missing.
+    Returns (header, rows); each row is [timestamp, value...] with float values
+    and None for "error"/empty cells.
+    """
+    t0 = parse_time(t0)
+    t1 = parse_time(t1)
+    try:
+        _, times, offsets = load_index(path)
+    except FileNotFoundError:
+        build_index(path)
+        _, times, offsets = load_index(path)
+
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as raw:
+        full_header = next(csv.reader([raw.readline().decode("utf-8")]))
+        if gauges is None:
+            columns = list(range(1, len(full_header)))
+        else:
+            missing = [g for g in gauges if g not in full_header]
+            if missing:
+                raise ValueError(f"Unknown gauge column(s): {missing}")
+            columns = [full_header.index(g) for g in gauges]
+        header = [full_header[0]] + [full_header[c] for c in columns]
+
+        # Start at the last indexed row at or before t0
+        i = bisect_right(times, t0) - 1
+        if i >= 0:
+            raw.seek(offsets[i])
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+        rows = []
+        for record in csv.reader(text):
+            if not record:
+                continue
+            try:
+                t = parse_time(record[0])
+            except ValueError:
+                continue
+            if t < t0:
+                continue
+            if t > t1:
+                break
+            row = [record[0]]
+            for c in columns:
+                cell = record[c] if c < len(record) else ""
+                try:
+                    row.append(float(cell))
+                except ValueError:
+                    row.append(None)
+            rows.append(row)
+    return header, rows
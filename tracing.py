@@ -0,0 +1,241 @@
+"""
+Span tracer for finding where a tick's time goes.
+
+Instrumented code holds `tracer = None` when tracing is off: per-read call
+sites then cost one `is None` check, per-tick phases one call returning a shared
+no-op span. An enabled Tracer stores complete spans (name, thread, start,
+duration) in preallocated arrays, so memory is bounded by `capacity` and
+recording never allocates, and writes them as Chrome trace-event JSON
+(chrome://tracing, Perfetto) or as a compact binary trace.
+
+    python tracing.py summary Measurements/measurement_<time>.trace.json [--top 10]
+    python tracing.py overhead
+"""
+import sys
+import json
+import time
+import struct
+import argparse
+import threading
+from array import array
+from bisect import bisect_left
+
+DEFAULT_CAPACITY = 1 << 20  # spans kept; later spans are counted in `dropped`
+TICK_SPAN = "tick"
+
+# Binary trace: magic (8s) | name table length (u32) | JSON name table | records
+_MAGIC = b"IBRTRC\x00\x01"
+_PREFIX = struct.Struct("<8sI")
+_RECORD = struct.Struct("<HQqq")  # name id | thread id | start ns | duration ns
+
+# ------------------ Tracer ------------------
+
+class _Span:
+    __slots__ = ("tracer", "name_id", "start")
+
+    def __init__(self, tracer, name_id):
+        self.tracer = tracer
+        self.name_id = name_id
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name_id, self.start, time.perf_counter_ns())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(tracer, name: str):
+    """`with span(self.tracer, "phase"):` for cold paths; a no-op when tracer is None."""
+    return NULL_SPAN if tracer is None else tracer.span(name)
+
+
+class Tracer:
+    """
+    Bounded in-memory span recorder, safe to use from several threads.
+
+    Hot paths intern the name once (name_id) and call add(id, start_ns, end_ns)
+    with their own perf_counter_ns stamps; everything else uses span(name).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.names = []
+        self._ids = {}
+        self._name_ids = array("H", bytes(2 * capacity))
+        self._tids = array("Q", bytes(8 * capacity))
+        self._starts = array("q", bytes(8 * capacity))
+        self._durs = array("q", bytes(8 * capacity))
+        self._next = 0  # next free slot, claimed under _lock
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def name_id(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(name)
+                if i is None:
+                    i = self._ids[name] = len(self.names)
+                    self.names.append(name)
+        return i
+
+    def add(self, name_id: int, start_ns: int, end_ns: int):
+        with self._lock:
+            i = self._next
+            if i >= self.capacity:
+                self.dropped += 1
+                return
+            self._next = i + 1
+        self._name_ids[i] = name_id
+        self._tids[i] = threading.get_ident()
+        self._starts[i] = start_ns
+        self._durs[i] = end_ns - start_ns
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, self.name_id(name))
+
+    @property
+    def count(self) -> int:
+        return self._next
+
+    def records(self):
+        """(name, thread id, start ns, duration ns) for every stored span."""
+        names = self.names
+        for i in range(self.count):
+            yield names[self._name_ids[i]], self._tids[i], self._starts[i], self._durs[i]
+
+    def write_chrome(self, path):
+        t0 = min(self._starts[:self.count], default=0)
+        events = [{"name": name, "ph": "X", "pid": 1, "tid": tid,
+                   "ts": (start - t0) / 1e3, "dur": dur / 1e3}
+                  for name, tid, start, dur in self.records()]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped": self.dropped}}, f)
+
+    def write_binary(self, path):
+        table = json.dumps(self.names).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_PREFIX.pack(_MAGIC, len(table)))
+            f.write(table)
+            for i in range(self.count):
+                f.write(_RECORD.pack(self._name_ids[i], self._tids[i], self._starts[i], self._durs[i]))
+
+    def write(self, path):
+        """Chrome JSON for *.json paths, binary otherwise."""
+        if str(path).endswith(".json"):
+            self.write_chrome(path)
+        else:
+            self.write_binary(path)
+
+
+def measure_overhead(n: int = 200_000) -> float:
+    """Seconds one traced span adds (add() with perf_counter_ns stamps), measured on this machine."""
+    tracer = Tracer(capacity=n)
+    name_id = tracer.name_id("overhead")
+    clock = time.perf_counter_ns
+    t0 = clock()
+    for _ in range(n):
+        tracer.add(name_id, clock(), clock())
+    traced = clock() - t0
+    t0 = clock()
+    for _ in range(n):
+        pass
+    empty = clock() - t0
+    return max(traced - empty, 0) / n / 1e9
+
+# ------------------ Reading and Summary ------------------
+
+def load_trace(path):
+    """Return spans as (name, thread id, start ns, duration ns) tuples from either format."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(_MAGIC):
+        _, table_len = _PREFIX.unpack_from(data)
+        names = json.loads(data[_PREFIX.size:_PREFIX.size + table_len])
+        body = data[_PREFIX.size + table_len:]
+        body = body[:len(body) - len(body) % _RECORD.size]
+        return [(names[n], tid, start, dur) for n, tid, start, dur in _RECORD.iter_unpack(body)]
+    events = json.loads(data)["traceEvents"]
+    return [(e["name"], e["tid"], int(e["ts"] * 1e3), int(e["dur"] * 1e3)) for e in events if e.get("ph") == "X"]
+
+
+def summarize(spans, top: int = 10) -> list[tuple[str, float, float, float, float]]:
+    """
+    Top time sinks inside "tick" spans: spans on any thread (reads on an I/O
+    thread, writes on the writer thread) that start within a tick, totalled per
+    name and inclusive of nested spans, so shares can add up to more than 100 %.
+    Returns (name, mean ms per tick, max ms per tick, calls per tick, share of tick time).
+    """
+    ticks = [s for s in spans if s[0] == TICK_SPAN]
+    if not ticks:
+        return []
+    others = sorted((s for s in spans if s[0] != TICK_SPAN), key=lambda s: s[2])
+    starts = [s[2] for s in others]
+
+    totals = {}
+    maxima = {}
+    calls = {}
+    tick_total = 0
+    for _, _, start, dur in ticks:
+        tick_total += dur
+        per_tick = {}
+        i = bisect_left(starts, start)
+        while i < len(others) and others[i][2] < start + dur:
+            name, _, _, d = others[i]
+            per_tick[name] = per_tick.get(name, 0) + d
+            calls[name] = calls.get(name, 0) + 1
+            i += 1
+        for name, d in per_tick.items():
+            totals[name] = totals.get(name, 0) + d
+            maxima[name] = max(maxima.get(name, 0), d)
+
+    n = len(ticks)
+    rows = [(name, total / n / 1e6, maxima[name] / 1e6, calls[name] / n, total / tick_total if tick_total else 0.0)
+            for name, total in totals.items()]
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return [(TICK_SPAN, tick_total / n / 1e6, max(t[3] for t in ticks) / 1e6, 1.0, 1.0)] + rows[:top]
+
+# ------------------ Main ------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize span traces written by MeasurementSession.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("summary", help="top time sinks per tick")
+    p.add_argument("path")
+    p.add_argument("--top", type=int, default=10)
+    sub.add_parser("overhead", help="measure the cost of one traced span")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "overhead":
+        print(f"~{measure_overhead() * 1e9:.0f} ns per span")
+        return
+
+    spans = load_trace(args.path)
+    rows = summarize(spans, args.top)
+    if not rows:
+        print(f"{len(spans)} spans, no '{TICK_SPAN}' spans to summarize.")
+        return
+    print(f"{len(spans)} spans, {sum(1 for s in spans if s[0] == TICK_SPAN)} ticks")
+    print(f"{'span':<24}{'mean ms/tick':>14}{'max ms':>10}{'calls/tick':>12}{'share':>8}")
+    for name, mean_ms, max_ms, per_tick, share in rows:
+        print(f"{name:<24}{mean_ms:>14.3f}{max_ms:>10.3f}{per_tick:>12.1f}{share:>8.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
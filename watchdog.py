@@ -0,0 +1,239 @@
+import time
+import queue
+import logging
+import threading
+from array import array
+from datetime import datetime
+
+from errors import OUT_OF_RANGE
+
+READ_TIMEOUT = 125  # status reported for reads that missed their deadline (124 = init timeout)
+BURST_MARGIN = 2.0  # a burst may take this multiple of its expected time (plus one read timeout)
+
+# ------------------ I/O Thread ------------------
+
+class ReadTimeout(Exception):
+    pass
+
+
+class IoThread:
+    """
+    Dedicated thread that runs blocking backend calls, so the caller can give
+    each call a deadline. A call that misses its deadline leaves the thread
+    stuck inside the DLL; the owner then abandons it (close()) and starts a new
+    one. close() sets `cancel`, which get_values() checks between reads, so once
+    the stuck read returns the abandoned burst ends without another
+    Device_Value call and the thread exits; join() waits for that.
+    """
+
+    def __init__(self, name: str = "IbrIO"):
+        self.cancel = threading.Event()
+        self._jobs = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            fn, args, done, result = job
+            try:
+                result[0] = fn(*args)
+            except Exception as e:
+                result[1] = e
+            done.set()
+
+    def call(self, fn, *args, timeout: float | None = None):
+        """Run fn(*args) on the I/O thread; raise ReadTimeout after `timeout` seconds."""
+        done = threading.Event()
+        result = [None, None]
+        self._jobs.put((fn, args, done, result))
+        if not done.wait(timeout):
+            raise ReadTimeout(f"{getattr(fn, '__name__', fn)} did not return within {timeout:.3f} s")
+        if result[1] is not None:
+            raise result[1]
+        return result[0]
+
+    def close(self):
+        self.cancel.set()
+        self._jobs.put(None)
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for the thread to exit; False if it is still running after `timeout` seconds."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+# ------------------ Device Watchdog ------------------
+
+class DeviceWatchdog:
+    """
+    Guards device reads against a stalled DLL.
+
+    get_values() runs the backend's get_values() on an IoThread with a deadline
+    based on the expected burst time: `expected_read` (seconds per read, kept
+    up to date by the caller from its latency estimate) x reads x BURST_MARGIN,
+    plus `read_timeout` of slack for one slow read, capped at `max_burst` (the
+    tick interval). Without an estimate it allows `read_timeout` per read, still
+    capped. A burst fails when it times out, raises,
+    or returns no usable read (only statuses other than 0 and out-of-range).
+    After `max_failures` failed bursts in a row `needs_recovery` is set and the
+    caller runs recover(): deinit_device + init_device, retried with backoff,
+    until a probe read succeeds. Each recovery is recorded in `recoveries` with
+    its time-to-recover, measured from the first failure of the streak.
+
+    A timed-out I/O thread is abandoned, not reused: its burst is cancelled
+    before the next read, the backend keeps its read scratch per thread, and
+    the next burst gets buffers of its own. recover() only deinitializes once
+    every abandoned thread has left the DLL; one still stuck after
+    `init_timeout` is given up as dead (counted in `dead_threads`) and the
+    re-initialization goes ahead regardless.
+    """
+
+    def __init__(self, ibr, setup_path, devicenr: int, *, read_timeout: float = 0.5,
+                 init_timeout: float = 30.0, max_failures: int = 3, max_backoff: float = 30.0,
+                 max_burst: float | None = None, expected_read: float | None = None):
+        self.ibr = ibr
+        self.setup_path = setup_path
+        self.devicenr = devicenr
+        self.read_timeout = read_timeout
+        self.init_timeout = init_timeout
+        self.max_failures = max_failures
+        self.max_backoff = max_backoff
+        self.max_burst = max_burst
+        self.expected_read = expected_read
+
+        self._io = IoThread()
+        self._abandoned = []  # timed-out I/O threads that may still be inside a DLL call
+        self.dead_threads = 0
+        self._buffers_shared = True  # still handing out the caller's `out` buffers
+        self._buffers = None  # after a timeout: buffers owned by the current I/O thread, reused every burst
+        self.failures = 0
+        self.timeouts = 0
+        self._failing_since = None  # (monotonic, wall) of the first failure in the streak
+        self.recoveries = []
+
+    @property
+    def needs_recovery(self) -> bool:
+        return self.failures >= self.max_failures
+
+    def _abandon(self):
+        # The old thread may still write into the buffers it was given: never reuse them
+        self._io.close()
+        self._abandoned = [io for io in self._abandoned if not io.join(0)] + [self._io]
+        self._io = IoThread()
+        self._buffers_shared = False
+        self._buffers = None
+
+    def _settle(self, stop=None) -> bool:
+        """
+        Wait for abandoned I/O threads to return from the DLL, each for at most
+        init_timeout; still stuck after that, they are given up as dead.
+        False if `stop` was set while waiting.
+        """
+        for io in self._abandoned:
+            deadline = time.monotonic() + self.init_timeout
+            while not io.join(0.1):
+                if stop is not None and stop.is_set():
+                    return False
+                if time.monotonic() >= deadline:
+                    self.dead_threads += 1
+                    logging.error(f"An abandoned I/O thread is still inside the DLL after {self.init_timeout:.0f} s; "
+                                  f"re-initializing anyway.")
+                    break
+        self._abandoned = []
+        return True
+
+    def _failed(self, reason: str):
+        self.failures += 1
+        if self._failing_since is None:
+            self._failing_since = (time.monotonic(), datetime.now().astimezone())
+        logging.debug(f"Device read failed ({self.failures}/{self.max_failures}): {reason}")
+
+    def burst_timeout(self, reads: int) -> float:
+        """Deadline in seconds for a burst of `reads` Device_Value calls."""
+        if self.expected_read is None:
+            timeout = self.read_timeout * reads
+        else:
+            timeout = self.expected_read * reads * BURST_MARGIN + self.read_timeout
+        if self.max_burst is not None:
+            timeout = min(timeout, self.max_burst)
+        return max(timeout, self.read_timeout)
+
+    def get_values(self, devicenr: int, addresses, out):
+        """
+        Like ibr.get_values() but with a deadline. Returns the filled buffers
+        (not necessarily `out` after a timeout), or None if the burst timed out.
+        """
+        if not self._buffers_shared:
+            # The abandoned thread may still write into `out`; this thread fills its own set
+            buffers = self._buffers
+            if buffers is None or len(buffers[0]) < len(out[0]):
+                buffers = self._buffers = tuple(array(buf.typecode, bytes(buf.itemsize * len(buf))) for buf in out)
+            out = buffers
+        io = self._io
+        try:
+            out = io.call(self.ibr.get_values, devicenr, addresses, out, io.cancel,
+                          timeout=self.burst_timeout(len(addresses)))
+        except ReadTimeout as e:
+            self.timeouts += 1
+            self._abandon()
+            self._failed(str(e))
+            return None
+        except Exception as e:
+            self._failed(f"{type(e).__name__}: {e}")
+            return None
+        statuses = out[1]
+        if any(s == 0 or s == OUT_OF_RANGE for s in statuses[:len(addresses)]):
+            self.failures = 0
+            self._failing_since = None
+        else:
+            self._failed(f"no usable read, statuses {sorted(set(statuses[:len(addresses)]))}")
+        return out
+
+    def _probe(self, address: int) -> bool:
+        status, _ = self._io.call(self.ibr.get_value, self.devicenr, address, timeout=self.read_timeout)
+        return status == 0 or status == OUT_OF_RANGE
+
+    def recover(self, probe_address: int, stop=None) -> float | None:
+        """
+        Re-initialize the device until a read of `probe_address` works again.
+        Returns the time-to-recover in seconds, or None if `stop` was set first.
+        """
+        started_mono, started_wall = self._failing_since or (time.monotonic(), datetime.now().astimezone())
+        attempt = 0
+        while True:
+            if stop is not None and stop.is_set():
+                return None
+            attempt += 1
+            self._abandon()
+            if not self._settle(stop):
+                return None
+            try:
+                self._io.call(self.ibr.deinit_device, timeout=self.init_timeout)
+            except Exception as e:
+                logging.warning(f"Deinit before re-initialization failed: {e}")
+            rc = self.ibr.init_device(self.setup_path, timeout_s=self.init_timeout)
+            if rc == 0:
+                try:
+                    if self._probe(probe_address):
+                        break
+                    logging.warning(f"Re-initialization attempt {attempt}: probe read failed.")
+                except Exception as e:
+                    logging.warning(f"Re-initialization attempt {attempt}: probe read failed: {e}")
+            else:
+                logging.warning(f"Re-initialization attempt {attempt} failed (rc={rc}).")
+            backoff = min(2.0 ** (attempt - 1), self.max_backoff)
+            if stop is None:
+                time.sleep(backoff)
+            elif stop.wait(backoff):
+                return None
+
+        seconds = time.monotonic() - started_mono
+        self.recoveries.append({"started": started_wall.isoformat(), "seconds": seconds, "attempts": attempt})
+        self.failures = 0
+        self._failing_since = None
+        return seconds
+
+    def close(self):
+        self._io.close()
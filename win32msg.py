@@ -0,0 +1,139 @@
+"""
+Win32 side of ibrdll: a hidden message window and its message pump, which keep
+Device_Init from deadlocking while it runs on a worker thread. Loading user32 /
+kernel32 and declaring the prototypes happens at import, so ibrdll imports this
+module only inside IbrDll.init_device.
+"""
+import os
+import ctypes
+from ctypes import wintypes
+
+# ---- define missing Win32 types (some Python builds omit these in wintypes) ----
+# LRESULT is a LONG_PTR (signed pointer-sized integer)
+if ctypes.sizeof(ctypes.c_void_p) == 8:
+    LRESULT = ctypes.c_longlong
+else:
+    LRESULT = ctypes.c_long
+
+# Win32 DLLs (needed for the hidden message window + pump)
+user32 = ctypes.WinDLL("user32", use_last_error=True)
+kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+PM_REMOVE = 0x0001
+ERROR_CLASS_ALREADY_EXISTS = 1410
+
+
+WNDPROCTYPE = ctypes.WINFUNCTYPE(
+    LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM
+)
+
+class WNDCLASSEXW(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.UINT),
+        ("style", wintypes.UINT),
+        ("lpfnWndProc", WNDPROCTYPE),
+        ("cbClsExtra", ctypes.c_int),
+        ("cbWndExtra", ctypes.c_int),
+        ("hInstance", wintypes.HINSTANCE),
+        ("hIcon", wintypes.HICON),
+        ("hCursor", wintypes.HCURSOR),
+        ("hbrBackground", wintypes.HBRUSH),
+        ("lpszMenuName", wintypes.LPCWSTR),
+        ("lpszClassName", wintypes.LPCWSTR),
+        ("hIconSm", wintypes.HICON),
+    ]
+
+class POINT(ctypes.Structure):
+    _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
+
+class MSG(ctypes.Structure):
+    _fields_ = [
+        ("hwnd", wintypes.HWND),
+        ("message", wintypes.UINT),
+        ("wParam", wintypes.WPARAM),
+        ("lParam", wintypes.LPARAM),
+        ("time", wintypes.DWORD),
+        ("pt", POINT),
+    ]
+
+# Prototypes used by the pump
+user32.RegisterClassExW.argtypes = [ctypes.POINTER(WNDCLASSEXW)]
+user32.RegisterClassExW.restype  = wintypes.ATOM
+
+user32.CreateWindowExW.argtypes = [
+    wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+    wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID
+]
+user32.CreateWindowExW.restype = wintypes.HWND
+
+user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+user32.DefWindowProcW.restype  = LRESULT
+
+user32.PeekMessageW.argtypes   = [ctypes.POINTER(MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT, wintypes.UINT]
+user32.PeekMessageW.restype    = wintypes.BOOL
+
+user32.TranslateMessage.argtypes = [ctypes.POINTER(MSG)]
+user32.TranslateMessage.restype  = wintypes.BOOL
+
+user32.DispatchMessageW.argtypes  = [ctypes.POINTER(MSG)]
+user32.DispatchMessageW.restype   = LRESULT
+
+kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
+kernel32.GetModuleHandleW.restype  = wintypes.HINSTANCE
+
+
+def create_hidden_message_window(owner) -> wintypes.HWND:
+    """
+    Create a hidden Win32 window on the *calling thread* so we can pump messages
+    while Device_Init runs on a worker thread (prevents DLL init deadlock).
+    owner keeps the window procedure alive in its _wndproc_ref attribute.
+    """
+    class_name = f"IBR_DDK_PY_MSGWND_{os.getpid()}"
+
+    @WNDPROCTYPE
+    def wndproc(hwnd, msg, wparam, lparam):
+        return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+    owner._wndproc_ref = wndproc  # keep alive
+
+    hinst = kernel32.GetModuleHandleW(None)
+
+    wc = WNDCLASSEXW()
+    wc.cbSize = ctypes.sizeof(WNDCLASSEXW)
+    wc.style = 0
+    wc.lpfnWndProc = wndproc
+    wc.cbClsExtra = 0
+    wc.cbWndExtra = 0
+    wc.hInstance = hinst
+    wc.hIcon = 0
+    wc.hCursor = 0
+    wc.hbrBackground = 0
+    wc.lpszMenuName = None
+    wc.lpszClassName = class_name
+    wc.hIconSm = 0
+
+    atom = user32.RegisterClassExW(ctypes.byref(wc))
+    if not atom:
+        err = ctypes.get_last_error()
+        # OK if class already exists in this process (unlikely with PID suffix, but safe)
+        if err != ERROR_CLASS_ALREADY_EXISTS:
+            raise OSError(f"RegisterClassExW failed: {err} / {ctypes.FormatError(err).strip()}")
+
+    hwnd = user32.CreateWindowExW(
+        0, class_name, "IBRHidden", 0,
+        0, 0, 0, 0,
+        0, 0, hinst, None
+    )
+    if not hwnd:
+        err = ctypes.get_last_error()
+        raise OSError(f"CreateWindowExW failed: {err} / {ctypes.FormatError(err).strip()}")
+
+    return hwnd
+
+
+def pump_messages(msg: MSG):
+    """Dispatch every message queued for this thread."""
+    while user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, PM_REMOVE):
+        user32.TranslateMessage(ctypes.byref(msg))
+        user32.DispatchMessageW(ctypes.byref(msg))
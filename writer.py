@@ -0,0 +1,210 @@
+import csv
+import time
+import queue
+import logging
+import threading
+
+from timeindex import IndexWriter
+from tracing import span
+
+_STOP = object()
+
+# ------------------ Background Row Writer ------------------
+
+class RowWriter:
+    """
+    Moves CSV writing, flushing and console output off the acquisition thread.
+
+    `out` is a text file (rows are written with csv.writer) or any sink with
+    writerows()/flush(), such as recording.BinaryRecorder.
+
+    Rows go into a bounded queue; a writer thread writes them in batches and
+    flushes the file every `flush_rows` rows or `flush_interval` seconds,
+    whichever comes first. The console shows only the newest row, at most
+    `console_hz` times per second (0 disables printing).
+
+    When the queue is full, `block=True` makes write() wait (no data loss, the
+    wait is counted in `blocked_s`); `block=False` drops the row instead.
+    """
+
+    def __init__(self, out, *, maxsize: int = 4096, flush_rows: int = 100,
+                 flush_interval: float = 1.0, console_hz: float = 2.0, block: bool = True,
+                 console_format=" | ".join):
+        self.out = out
+        self.row_writer = out if hasattr(out, "writerows") else csv.writer(out)
+        self.console_format = console_format
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.console_period = 1.0 / console_hz if console_hz > 0 else None
+        self.block = block
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.tracer = None  # tracing.Tracer for write/flush/print spans, None = off
+
+        # Backpressure metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0  # rows whose writerows() raised
+        self.flushes = 0
+        self.max_depth = 0
+        self.blocked_s = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="RowWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, row) -> bool:
+        """Queue a row for writing. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            if not self.block:
+                self.dropped += 1
+                return False
+            t0 = time.perf_counter()
+            self._queue.put(row)
+            self.blocked_s += time.perf_counter() - t0
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        pending = 0
+        last_flush = time.monotonic()
+        last_print = 0.0
+        latest = None
+        stopping = False
+
+        while not stopping:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                # Take whatever else is already waiting without blocking
+                while len(batch) < self.flush_rows:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if batch and batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+
+            if batch:
+                try:
+                    with span(self.tracer, "write rows"):
+                        self.row_writer.writerows(batch)
+                except Exception as e:
+                    logging.error(f"Writing {len(batch)} row(s) failed: {e}")
+                    self.failed += len(batch)
+                else:
+                    self.written += len(batch)
+                    pending += len(batch)
+                latest = batch[-1]
+
+            now = time.monotonic()
+            if pending and (stopping or pending >= self.flush_rows or now - last_flush >= self.flush_interval):
+                try:
+                    with span(self.tracer, "flush"):
+                        self.out.flush()
+                except Exception as e:
+                    logging.error(f"Flushing output failed: {e}")
+                self.flushes += 1
+                pending = 0
+                last_flush = now
+            elif not pending:
+                last_flush = now
+
+            if latest is not None and self.console_period is not None and (stopping or now - last_print >= self.console_period):
+                with span(self.tracer, "console print"):
+                    print(self.console_format(latest))
+                latest = None
+                last_print = now
+
+    def close(self, timeout: float | None = None) -> bool:
+        """Drain the queue, flush and stop the writer thread. Returns False on timeout."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def metrics(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "max_depth": self.max_depth,
+            "blocked_s": self.blocked_s,
+        }
+
+# ------------------ CSV Output ------------------
+
+class _CountingFile:
+    """
+    Text file wrapper for csv.writer that counts the UTF-8 bytes written, so
+    the size is known without tell(): on a text file tell() flushes first.
+    """
+
+    __slots__ = ("file", "bytes")
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text) if text.isascii() else len(text.encode("utf-8"))
+        return self.file.write(text)
+
+
+class CsvOutput:
+    """
+    CSV file sink for RowWriter: writes the header on open and reports its size.
+    With index_every > 0 it also maintains a sparse time index (timeindex.py)
+    holding the byte offset of every index_every-th row.
+    """
+
+    def __init__(self, path, header, index_every: int = 0):
+        self.path = path
+        self._file = open(path, mode='w', newline='', encoding='utf-8')
+        self._counted = _CountingFile(self._file)
+        self._writer = csv.writer(self._counted)
+        self._writer.writerow(header)
+        self._file.flush()
+        self._index = IndexWriter(path, index_every) if index_every else None
+
+    def writerows(self, rows):
+        index = self._index
+        if index is None:
+            self._writer.writerows(rows)
+            return
+        for row in rows:
+            if index.due():
+                index.add(row[0], self._counted.bytes)
+            self._writer.writerow(row)
+            index.rows += 1
+
+    def flush(self):
+        self._file.flush()
+        if self._index is not None:
+            self._index.flush()
+
+    def close(self):
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+
+    @property
+    def size(self) -> int:
+        return self._counted.bytes
+
+    @staticmethod
+    def row_time(row):
+        return row[0]